@@ -0,0 +1,144 @@
+"""
+Microbenchmark: BufferReader decode cost per frame.
+
+Compares the original slice + struct.unpack reader against the current
+BufferReader in copy mode and zero-copy mode, decoding an advert packet
+(header, path, public key, timestamp, signature, app data) and a
+fixed-width heavy telemetry frame.
+
+    python bench/bench_buffer_reader.py [--frames N]
+"""
+import argparse
+import struct
+import time
+
+from meshcore.buffer_reader import BufferReader
+
+
+class LegacyBufferReader:
+    """
+    The pre-struct.Struct reader, kept here as the benchmark baseline.
+    """
+
+    def __init__(self, data: bytes):
+        self.pointer = 0
+        self.buffer = data if isinstance(data, (bytes, bytearray)) else bytes(data)
+
+    def get_remaining_bytes_count(self) -> int:
+        return len(self.buffer) - self.pointer
+
+    def read_byte(self) -> int:
+        return self.read_bytes(1)[0]
+
+    def read_bytes(self, count: int) -> bytes:
+        data = self.buffer[self.pointer:self.pointer + count]
+        self.pointer += count
+        return data
+
+    def read_remaining_bytes(self) -> bytes:
+        return self.read_bytes(self.get_remaining_bytes_count())
+
+    def read_int8(self) -> int:
+        return struct.unpack("b", self.read_bytes(1))[0]
+
+    def read_uint8(self) -> int:
+        return struct.unpack("B", self.read_bytes(1))[0]
+
+    def read_uint16_be(self) -> int:
+        return struct.unpack(">H", self.read_bytes(2))[0]
+
+    def read_int16_be(self) -> int:
+        return struct.unpack(">h", self.read_bytes(2))[0]
+
+    def read_uint32_le(self) -> int:
+        return struct.unpack("<I", self.read_bytes(4))[0]
+
+    def read_int32_le(self) -> int:
+        return struct.unpack("<i", self.read_bytes(4))[0]
+
+
+def make_advert_frame() -> bytes:
+    app_data = b"\x91" + struct.pack("<ii", 47_600_000, -122_300_000) + b"repeater-north-01"
+    advert = bytes(range(32)) + struct.pack("<I", 1_700_000_000) + bytes(64) + app_data
+    return bytes([0x11, 3]) + b"\xa1\xb2\xc3" + advert
+
+
+def make_telemetry_frame() -> bytes:
+    # 16 channels of (channel, type, int16 value)
+    return b"".join(struct.pack(">BBh", ch, 0x67, ch * 10) for ch in range(16))
+
+
+def decode_advert(reader):
+    header = reader.read_byte()
+    path_len = reader.read_int8()
+    path = reader.read_bytes(path_len)
+    public_key = reader.read_bytes(32)
+    timestamp = reader.read_uint32_le()
+    signature = reader.read_bytes(64)
+    flags = reader.read_uint8()
+    lat = reader.read_int32_le()
+    lon = reader.read_int32_le()
+    name = reader.read_remaining_bytes()
+    return header, path, public_key, timestamp, signature, flags, lat, lon, name
+
+
+def decode_telemetry(reader):
+    values = []
+    while reader.get_remaining_bytes_count() >= 4:
+        channel = reader.read_uint8()
+        type_ = reader.read_uint8()
+        values.append((channel, type_, reader.read_int16_be()))
+    return values
+
+
+def count_copies(reader_cls, decode, frame, **kwargs) -> tuple[int, int]:
+    """
+    Count the bytes objects sliced out of the frame by one decode.
+    """
+    copies = [0, 0]
+
+    class CountingReader(reader_cls):
+        def read_bytes(self, count):
+            data = super().read_bytes(count)
+            if not isinstance(data, memoryview):
+                copies[0] += 1
+                copies[1] += len(data)
+            return data
+
+    decode(CountingReader(frame, **kwargs))
+    return copies[0], copies[1]
+
+
+def time_per_frame(make_reader, decode, frame, frames: int) -> float:
+    start = time.perf_counter_ns()
+    for _ in range(frames):
+        decode(make_reader(frame))
+    return (time.perf_counter_ns() - start) / frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--frames", type=int, default=200_000)
+    args = parser.parse_args()
+
+    variants = [
+        ("legacy", LegacyBufferReader, {}),
+        ("struct", BufferReader, {}),
+        ("zero-copy", BufferReader, {"zero_copy": True}),
+    ]
+    workloads = [
+        ("advert", decode_advert, make_advert_frame()),
+        ("telemetry", decode_telemetry, make_telemetry_frame()),
+    ]
+
+    print(f"{'workload':<10} {'reader':<10} {'ns/frame':>9} {'copies':>7} {'bytes':>6}")
+    for workload, decode, frame in workloads:
+        for name, reader_cls, kwargs in variants:
+            make_reader = (lambda data, cls=reader_cls, kw=kwargs: cls(data, **kw))
+            ns = time_per_frame(make_reader, decode, frame, args.frames)
+            copies, copied = count_copies(reader_cls, decode, frame, **kwargs)
+            print(f"{workload:<10} {name:<10} {ns:>9.0f} {copies:>7} {copied:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""
+Benchmark: NodeListener command handling over an in-memory transport.
+
+A client sends a weighted mix of commands with up to --window outstanding
+and matches each to its final response (responses come back in order).
+Reports frames/sec, p50/p99 command latency and, from a second run under
+tracemalloc, peak traced memory and the blocks/bytes still held per frame
+afterwards. Results are printed as JSON, and written to --json if given,
+so runs can be compared. With --profile, the timed run is also sampled
+and its stacks written as a collapsed-stack file for a flame graph.
+
+    python bench/bench_listener.py [--frames N] [--window W] [--contacts K]
+        [--mix app_start=1,send_txt_msg=4,get_contacts=1,send_raw_data=2,telemetry=2]
+        [--seed S] [--json PATH] [--profile PATH]
+"""
+import argparse
+import asyncio
+import json
+import random
+import struct
+import time
+import tracemalloc
+from collections import deque
+
+from meshcore.constants import Constants
+from meshcore.contact_store import ContactStore
+from meshcore.listener.memory_transport import MemoryTransport
+from meshcore.listener.node_listener import NodeListener
+from meshcore.profiling import SamplingProfiler
+
+DEFAULT_MIX = "app_start=1,send_txt_msg=4,get_contacts=1,send_raw_data=2,telemetry=2"
+
+_CONTACT_BODY = struct.Struct("<32sBBb64s32sIii")
+
+
+def app_start(rng):
+    return bytes((Constants.CommandCodes.AppStart, 1)) + bytes(6) + b"bench"
+
+
+def send_txt_msg(rng):
+    return (struct.pack("<BBBI6s", Constants.CommandCodes.SendTxtMsg, 0, 0, int(time.time()), rng.randbytes(6))
+            + b"hello from the benchmark")
+
+
+def get_contacts(rng):
+    return bytes((Constants.CommandCodes.GetContacts,))
+
+
+def send_raw_data(rng):
+    return bytes((Constants.CommandCodes.SendRawData, 2)) + rng.randbytes(2) + rng.randbytes(rng.randrange(16, 160))
+
+
+def telemetry(rng):
+    return bytes((Constants.CommandCodes.SendTelemetryReq, 0, 0, 0)) + rng.randbytes(32)
+
+
+# command name -> (frame builder, code of the last response it produces)
+COMMANDS = {
+    "app_start": (app_start, Constants.ResponseCodes.SelfInfo),
+    "send_txt_msg": (send_txt_msg, Constants.ResponseCodes.Sent),
+    "get_contacts": (get_contacts, Constants.ResponseCodes.EndOfContacts),
+    "send_raw_data": (send_raw_data, Constants.PushCodes.LogRxData),
+    "telemetry": (telemetry, Constants.PushCodes.TelemetryResponse),
+}
+
+
+def parse_mix(text: str) -> dict:
+    mix = {}
+    for item in text.split(","):
+        name, _, weight = item.partition("=")
+        if name not in COMMANDS:
+            raise SystemExit(f"unknown command {name!r}; choose from {', '.join(COMMANDS)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def make_workload(count: int, mix: dict, seed: int) -> list:
+    rng = random.Random(seed)
+    names = rng.choices(list(mix), weights=list(mix.values()), k=count)
+    return [(COMMANDS[name][0](rng), COMMANDS[name][1]) for name in names]
+
+
+def make_contacts(count: int, seed: int) -> ContactStore:
+    rng = random.Random(seed)
+    store = ContactStore()
+    for i in range(count):
+        store.add_update(_CONTACT_BODY.pack(rng.randbytes(32), 1, 0, -1, bytes(64),
+                                            f"node-{i}".encode(), 0, 0, 0))
+    return store
+
+
+async def drive(workload: list, window: int, contacts: int, seed: int) -> dict:
+    node_side, client = MemoryTransport.pair()
+    listener = NodeListener(node_side, contacts=make_contacts(contacts, seed))
+    await listener.start()
+
+    outstanding = deque()
+    latencies = []
+    done = asyncio.Event()
+
+    async def read_responses():
+        while len(latencies) < len(workload):
+            frame = await client.receive()
+            if outstanding and frame[0] == outstanding[0][0]:
+                latencies.append(time.perf_counter() - outstanding.popleft()[1])
+                if len(outstanding) < window:
+                    done.set()
+
+    reader = asyncio.create_task(read_responses())
+    start = time.perf_counter()
+    for frame, final_code in workload:
+        while len(outstanding) >= window:
+            done.clear()
+            await done.wait()
+        outstanding.append((final_code, time.perf_counter()))
+        await client.send(frame)
+    await reader
+    elapsed = time.perf_counter() - start
+    await listener.stop()
+
+    latencies.sort()
+    return {
+        "elapsed_s": elapsed,
+        "frames_per_sec": len(workload) / elapsed,
+        "latency_p50_us": latencies[len(latencies) // 2] * 1e6,
+        "latency_p99_us": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1e6,
+        "responses": node_side.frames_sent,
+    }
+
+
+async def drive_traced(workload: list, window: int, contacts: int, seed: int) -> dict:
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    await drive(workload, window, contacts, seed)
+    after = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    diff = [stat for stat in after.compare_to(before, "filename") if stat.count_diff > 0]
+    return {
+        "peak_traced_bytes": peak,
+        "retained_blocks_per_frame": sum(stat.count_diff for stat in diff) / len(workload),
+        "retained_bytes_per_frame": sum(stat.size_diff for stat in diff) / len(workload),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--frames", type=int, default=100_000)
+    parser.add_argument("--window", type=int, default=32)
+    parser.add_argument("--contacts", type=int, default=50)
+    parser.add_argument("--mix", default=DEFAULT_MIX)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--trace-frames", type=int, default=10_000,
+                        help="frames for the tracemalloc run (0 to skip)")
+    parser.add_argument("--json", help="also write the results to this file")
+    parser.add_argument("--profile", help="write sampled stacks of the timed run to this file")
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix)
+    workload = make_workload(args.frames, mix, args.seed)
+    results = {
+        "frames": args.frames,
+        "window": args.window,
+        "contacts": args.contacts,
+        "mix": mix,
+        "seed": args.seed,
+    }
+    profiler = SamplingProfiler() if args.profile else None
+    if profiler:
+        profiler.start()
+    results.update(asyncio.run(drive(workload, args.window, args.contacts, args.seed)))
+    if profiler:
+        profiler.stop()
+        profiler.write(args.profile)
+        results["profile_samples"] = profiler.samples
+    if args.trace_frames:
+        traced = workload[:args.trace_frames]
+        results.update(asyncio.run(drive_traced(traced, args.window, args.contacts, args.seed)))
+
+    output = json.dumps(results, indent=2)
+    print(output)
+    if args.json:
+        with open(args.json, "w") as f:
+            f.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
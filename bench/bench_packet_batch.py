@@ -0,0 +1,75 @@
+"""
+Benchmark: columnar batch decode against one Packet.from_bytes per frame.
+
+Builds a synthetic capture of random flood/direct frames and times reading
+header, route_type, payload_type, version, path_len and payload offset for
+every frame both ways.
+
+    python bench/bench_packet_batch.py [--frames N] [--seed S]
+"""
+import argparse
+import random
+import time
+
+from meshcore.packet import Packet
+from meshcore import packet_batch
+
+
+def make_capture(count: int, seed: int) -> list[bytes]:
+    rng = random.Random(seed)
+    frames = []
+    for _ in range(count):
+        header = (rng.randrange(1, 3)) | (rng.randrange(0, 10) << Packet.PH_TYPE_SHIFT)
+        path_len = rng.randrange(0, 9)
+        payload_len = rng.randrange(10, 180)
+        frames.append(bytes((header, path_len)) + rng.randbytes(path_len + payload_len))
+    return frames
+
+
+def decode_per_packet(frames) -> list:
+    rows = []
+    for frame in frames:
+        packet = Packet.from_bytes(frame)
+        rows.append((
+            packet.header,
+            packet.route_type,
+            packet.payload_type,
+            packet.payload_version,
+            len(packet.path),
+            2 + len(packet.path),
+        ))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--frames", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"building {args.frames} synthetic frames...")
+    frames = make_capture(args.frames, args.seed)
+
+    start = time.perf_counter()
+    rows = decode_per_packet(frames)
+    per_packet = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = Packet.decode_batch(frames)
+    batched = time.perf_counter() - start
+
+    # spot-check that both paths agree
+    for i in range(0, len(frames), max(1, len(frames) // 1000)):
+        header, route_type, payload_type, version, path_len, _ = rows[i]
+        assert batch.header[i] == header and batch.route_type[i] == route_type
+        assert batch.payload_type[i] == payload_type and batch.version[i] == version
+        assert batch.path_len[i] == path_len
+
+    backend = "numpy" if packet_batch.HAS_NUMPY else "array"
+    print(f"Packet.from_bytes loop: {per_packet:8.3f} s  {args.frames / per_packet:12,.0f} frames/s")
+    print(f"decode_batch ({backend}):  {batched:8.3f} s  {args.frames / batched:12,.0f} frames/s")
+    print(f"speedup: {per_packet / batched:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
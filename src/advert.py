@@ -1,12 +1,9 @@
+import struct
+
+from .advert_verifier import AdvertVerifier, HAS_NACL
 from .buffer_reader import BufferReader
-from .buffer_writer import BufferWriter
 
-try:
-    from nacl.signing import VerifyKey
-    from nacl.exceptions import BadSignatureError
-    HAS_NACL = True
-except ImportError:
-    HAS_NACL = False
+_TIMESTAMP = struct.Struct("<I")
 
 
 class Advert:
@@ -55,27 +52,23 @@ class Advert:
             return "ROOM"
         return None
 
-    async def is_verified(self) -> bool:
+    def get_signed_data(self) -> bytes:
+        """
+        The bytes covered by the signature: public key, timestamp, app data.
+        """
+        return b"".join((self.public_key, _TIMESTAMP.pack(self.timestamp), self.app_data))
+
+    async def is_verified(self, verifier: AdvertVerifier | None = None) -> bool:
         """
         Verify the advert signature using Ed25519.
-        Requires PyNaCl installed.
+        Requires PyNaCl installed. Runs on verifier's executor (the shared
+        AdvertVerifier by default), so repeated adverts hit its cache.
         """
         if not HAS_NACL:
             raise RuntimeError("PyNaCl is required for signature verification")
-
-        # build signed data
-        bw = BufferWriter()
-        bw.write_bytes(self.public_key)
-        bw.write_uint32_le(self.timestamp)
-        bw.write_bytes(self.app_data)
-        signed_data = bw.to_bytes()
-
-        try:
-            vk = VerifyKey(self.public_key)
-            vk.verify(signed_data, self.signature)
-            return True
-        except BadSignatureError:
-            return False
+        if verifier is None:
+            verifier = AdvertVerifier.shared()
+        return await verifier.verify(self)
 
     def parse_app_data(self) -> dict:
         br = BufferReader(self.app_data)
@@ -0,0 +1,217 @@
+import struct
+from bisect import bisect_left, insort
+
+from .advert import Advert
+from .buffer_reader import BufferUnderflowError
+
+_TIMESTAMP = struct.Struct("<I")
+# public key, timestamp, signature and the app data flags byte
+_MIN_PAYLOAD = 32 + _TIMESTAMP.size + 64 + 1
+
+
+class AdvertRecord:
+    """
+    Latest known state of one node, as heard in its adverts.
+    lat/lon are in micro-degrees, as carried in the advert.
+    """
+
+    __slots__ = ("public_key", "timestamp", "type", "name", "lat", "lon")
+
+    def __init__(self, public_key: bytes, timestamp: int, type_: int | None,
+                 name: str | None, lat: int | None, lon: int | None):
+        self.public_key = public_key
+        self.timestamp = timestamp
+        self.type = type_
+        self.name = name
+        self.lat = lat
+        self.lon = lon
+
+    def __repr__(self) -> str:
+        return (f"AdvertRecord({self.public_key[:6].hex()}, timestamp={self.timestamp}, "
+                f"type={self.type}, name={self.name!r}, lat={self.lat}, lon={self.lon})")
+
+
+class AdvertStore:
+    """
+    In-memory table of heard nodes, keyed by public key.
+
+    Secondary indexes:
+    - hash byte: the first byte of the public key, as used for the src/dest
+      bytes of routed packets
+    - name prefix (case-insensitive)
+    - geographic grid cell of cell_size micro-degrees
+
+    Updates are ignored unless the advert timestamp is newer than the stored
+    one, so a re-flooded duplicate costs a single dict lookup.
+    """
+
+    def __init__(self, cell_size: int = 100_000):
+        self.cell_size = cell_size
+        self._records = {}
+        self._by_hash = {}
+        self._by_cell = {}
+        # sorted (casefolded name, public key) pairs for prefix search
+        self._names = []
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __contains__(self, public_key: bytes) -> bool:
+        return public_key in self._records
+
+    def __iter__(self):
+        return iter(self._records.values())
+
+    def get(self, public_key: bytes) -> AdvertRecord | None:
+        return self._records.get(public_key)
+
+    # -------------------------
+    # Updates
+    # -------------------------
+
+    def add_payload(self, payload: bytes) -> bool:
+        """
+        Store an ADVERT packet payload. The app data is only parsed when the
+        advert is newer than what is already stored. Returns True if stored.
+        Raises BufferUnderflowError if payload is too short to be an advert.
+        """
+        if len(payload) < _MIN_PAYLOAD:
+            raise BufferUnderflowError(_MIN_PAYLOAD, len(payload))
+        public_key = bytes(payload[:32])
+        (timestamp,) = _TIMESTAMP.unpack_from(payload, 32)
+        record = self._records.get(public_key)
+        if record is not None and timestamp <= record.timestamp:
+            return False
+        return self.add_advert(Advert.from_bytes(payload))
+
+    def add_packet(self, packet) -> bool:
+        """
+        Store the advert carried by an ADVERT packet; other packets are ignored.
+        """
+        if packet.payload_type != packet.PAYLOAD_TYPE_ADVERT:
+            return False
+        return self.add_payload(packet.payload)
+
+    def add_advert(self, advert: Advert) -> bool:
+        parsed = advert.parsed
+        return self.update(
+            advert.public_key,
+            advert.timestamp,
+            advert.get_type(),
+            parsed["name"],
+            parsed["lat"],
+            parsed["lon"],
+        )
+
+    def update(self, public_key: bytes, timestamp: int, type_: int | None = None,
+               name: str | None = None, lat: int | None = None, lon: int | None = None) -> bool:
+        """
+        Insert or refresh a node. Returns False if timestamp is not newer.
+        """
+        record = self._records.get(public_key)
+        if record is None:
+            record = AdvertRecord(public_key, timestamp, type_, name, lat, lon)
+            self._records[public_key] = record
+            self._by_hash.setdefault(public_key[0], set()).add(public_key)
+            self._index_name(record)
+            self._index_cell(record)
+            return True
+
+        if timestamp <= record.timestamp:
+            return False
+
+        record.timestamp = timestamp
+        record.type = type_
+        if name != record.name:
+            self._unindex_name(record)
+            record.name = name
+            self._index_name(record)
+        if lat != record.lat or lon != record.lon:
+            self._unindex_cell(record)
+            record.lat = lat
+            record.lon = lon
+            self._index_cell(record)
+        return True
+
+    def remove(self, public_key: bytes) -> bool:
+        record = self._records.pop(public_key, None)
+        if record is None:
+            return False
+        keys = self._by_hash[public_key[0]]
+        keys.discard(public_key)
+        if not keys:
+            del self._by_hash[public_key[0]]
+        self._unindex_name(record)
+        self._unindex_cell(record)
+        return True
+
+    # -------------------------
+    # Lookups
+    # -------------------------
+
+    def find_by_hash(self, hash_byte: int) -> list[AdvertRecord]:
+        """
+        Nodes whose public key starts with hash_byte (the src/dest byte of a
+        routed packet). Usually zero or one result.
+        """
+        keys = self._by_hash.get(hash_byte)
+        if not keys:
+            return []
+        return [self._records[key] for key in keys]
+
+    def find_by_name_prefix(self, prefix: str) -> list[AdvertRecord]:
+        prefix = prefix.casefold()
+        results = []
+        index = bisect_left(self._names, (prefix,))
+        while index < len(self._names):
+            name, public_key = self._names[index]
+            if not name.startswith(prefix):
+                break
+            results.append(self._records[public_key])
+            index += 1
+        return results
+
+    def find_near(self, lat: int, lon: int, cells: int = 0) -> list[AdvertRecord]:
+        """
+        Nodes in the grid cell containing (lat, lon), plus `cells` rings of
+        neighbouring cells around it.
+        """
+        cell_lat, cell_lon = self._cell(lat, lon)
+        results = []
+        for d_lat in range(-cells, cells + 1):
+            for d_lon in range(-cells, cells + 1):
+                keys = self._by_cell.get((cell_lat + d_lat, cell_lon + d_lon))
+                if keys:
+                    results.extend(self._records[key] for key in keys)
+        return results
+
+    # -------------------------
+    # Index maintenance
+    # -------------------------
+
+    def _cell(self, lat: int, lon: int) -> tuple[int, int]:
+        return lat // self.cell_size, lon // self.cell_size
+
+    def _index_name(self, record: AdvertRecord):
+        if record.name:
+            insort(self._names, (record.name.casefold(), record.public_key))
+
+    def _unindex_name(self, record: AdvertRecord):
+        if record.name:
+            entry = (record.name.casefold(), record.public_key)
+            index = bisect_left(self._names, entry)
+            if index < len(self._names) and self._names[index] == entry:
+                del self._names[index]
+
+    def _index_cell(self, record: AdvertRecord):
+        if record.lat is not None and record.lon is not None:
+            self._by_cell.setdefault(self._cell(record.lat, record.lon), set()).add(record.public_key)
+
+    def _unindex_cell(self, record: AdvertRecord):
+        if record.lat is not None and record.lon is not None:
+            cell = self._cell(record.lat, record.lon)
+            keys = self._by_cell.get(cell)
+            if keys is not None:
+                keys.discard(record.public_key)
+                if not keys:
+                    del self._by_cell[cell]
@@ -0,0 +1,173 @@
+import asyncio
+import time
+from collections import OrderedDict
+from concurrent.futures import Executor, ThreadPoolExecutor
+from functools import partial
+
+try:
+    from nacl.signing import VerifyKey
+    from nacl.exceptions import BadSignatureError, CryptoError
+    HAS_NACL = True
+except ImportError:
+    HAS_NACL = False
+
+
+class AdvertVerifier:
+    """
+    Verifies advert signatures in batches on an executor, off the event loop.
+
+    - VerifyKey objects are kept in an LRU keyed by public key.
+    - Results are memoized by (public_key, timestamp, signature, app_data),
+      so re-flooded copies of an advert are answered without re-verifying,
+      while a copy with altered app data is verified on its own.
+    - Concurrent requests for the same advert share one verification.
+    """
+
+    _shared = None
+
+    def __init__(self, executor: Executor | None = None, max_workers: int | None = None,
+                 batch_size: int = 32, key_cache_size: int = 1024, result_cache_size: int = 8192):
+        self._owns_executor = executor is None
+        self._executor = executor or ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="advert-verify"
+        )
+        self.batch_size = batch_size
+        self.key_cache_size = key_cache_size
+        self.result_cache_size = result_cache_size
+
+        self._keys = OrderedDict()
+        self._results = OrderedDict()
+        self._pending = {}
+        self._batch = []
+        self._flush_handle = None
+
+        # counters
+        self.cache_hits = 0
+        self.verified = 0
+        self.verify_seconds = 0.0
+
+    @classmethod
+    def shared(cls) -> "AdvertVerifier":
+        """
+        Process-wide default verifier, used by Advert.is_verified().
+        """
+        if cls._shared is None:
+            cls._shared = cls()
+        return cls._shared
+
+    async def verify(self, advert) -> bool:
+        """
+        Verify one advert. Adverts submitted in the same loop iteration are
+        verified together as one batch.
+        """
+        if not HAS_NACL:
+            raise RuntimeError("PyNaCl is required for signature verification")
+
+        key = (advert.public_key, advert.timestamp, advert.signature, advert.app_data)
+        result = self._results.get(key)
+        if result is not None:
+            self._results.move_to_end(key)
+            self.cache_hits += 1
+            return result
+
+        future = self._pending.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._pending[key] = future
+            self._batch.append((key, advert))
+            if len(self._batch) >= self.batch_size:
+                self._flush()
+            elif self._flush_handle is None:
+                self._flush_handle = loop.call_soon(self._flush)
+        return await asyncio.shield(future)
+
+    async def verify_many(self, adverts) -> list[bool]:
+        """
+        Verify many adverts at once, spread over the executor in batches.
+        """
+        return list(await asyncio.gather(*(self.verify(advert) for advert in adverts)))
+
+    def close(self):
+        """
+        Shut down the executor if this verifier created it.
+        """
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if self._owns_executor:
+            self._executor.shutdown(wait=False)
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._batch = self._batch, []
+        if not batch:
+            return
+
+        items = [
+            (self._verify_key(advert.public_key), advert.get_signed_data(), advert.signature)
+            for _, advert in batch
+        ]
+        loop = asyncio.get_running_loop()
+        job = loop.run_in_executor(self._executor, _verify_batch, items)
+        job.add_done_callback(partial(self._on_batch_done, [key for key, _ in batch], time.perf_counter()))
+
+    def _on_batch_done(self, keys, started: float, job: asyncio.Future):
+        self.verify_seconds += time.perf_counter() - started
+        cancelled = job.cancelled()
+        error = None if cancelled else job.exception()
+        ok = not cancelled and error is None
+        results = job.result() if ok else [None] * len(keys)
+        for key, result in zip(keys, results):
+            future = self._pending.pop(key, None)
+            if ok:
+                self._remember(key, result)
+            if future is None or future.done():
+                continue
+            if ok:
+                future.set_result(result)
+            elif cancelled:
+                future.cancel()
+            else:
+                future.set_exception(error)
+        if ok:
+            self.verified += len(keys)
+
+    def _verify_key(self, public_key: bytes):
+        verify_key = self._keys.get(public_key)
+        if verify_key is not None:
+            self._keys.move_to_end(public_key)
+            return verify_key
+        try:
+            verify_key = VerifyKey(public_key)
+        except (CryptoError, ValueError, TypeError):
+            # malformed key, every signature under it is invalid
+            return None
+        self._keys[public_key] = verify_key
+        if len(self._keys) > self.key_cache_size:
+            self._keys.popitem(last=False)
+        return verify_key
+
+    def _remember(self, key, result: bool):
+        self._results[key] = result
+        if len(self._results) > self.result_cache_size:
+            self._results.popitem(last=False)
+
+
+def _verify_batch(items) -> list[bool]:
+    """
+    Runs on the executor: check each (verify_key, signed_data, signature).
+    """
+    results = []
+    for verify_key, signed_data, signature in items:
+        if verify_key is None:
+            results.append(False)
+            continue
+        try:
+            verify_key.verify(signed_data, signature)
+            results.append(True)
+        except (BadSignatureError, ValueError, TypeError):
+            results.append(False)
+    return results
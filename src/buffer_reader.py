@@ -1,68 +1,107 @@
 import struct
 
+# precompiled readers for the fixed-width fields, shared by every BufferReader
+_INT8 = struct.Struct("b")
+_UINT16_LE = struct.Struct("<H")
+_UINT16_BE = struct.Struct(">H")
+_UINT32_LE = struct.Struct("<I")
+_UINT32_BE = struct.Struct(">I")
+_INT16_LE = struct.Struct("<h")
+_INT16_BE = struct.Struct(">h")
+_INT32_LE = struct.Struct("<i")
+# signed high byte + unsigned low word, combined into a signed 24-bit value
+_INT24_BE = struct.Struct(">bH")
+
+
+class BufferUnderflowError(IndexError):
+    """
+    Raised when a read asks for more bytes than remain in the buffer.
+    """
+
+    def __init__(self, requested: int, available: int):
+        super().__init__(f"buffer underflow: requested {requested} bytes, {available} available")
+        self.requested = requested
+        self.available = available
+
+
+def _fixed_width_reader(fmt: struct.Struct):
+    """
+    Build a read_* method that unpacks fmt in place at the current pointer.
+    """
+    unpack_from = fmt.unpack_from
+    size = fmt.size
+
+    def read(self) -> int:
+        try:
+            (value,) = unpack_from(self.buffer, self.pointer)
+        except struct.error:
+            raise BufferUnderflowError(size, self.get_remaining_bytes_count()) from None
+        self.pointer += size
+        return value
+
+    return read
+
+
 class BufferReader:
-    def __init__(self, data: bytes):
+    def __init__(self, data: bytes, zero_copy: bool = False):
         self.pointer = 0
-        # store as bytes for slicing
-        self.buffer = data if isinstance(data, (bytes, bytearray)) else bytes(data)
+        self.zero_copy = zero_copy
+        if zero_copy:
+            # read_bytes() hands out views into the caller's buffer
+            view = memoryview(data)
+            self.buffer = view if view.format == "B" else view.cast("B")
+        else:
+            # store as bytes for slicing
+            self.buffer = data if isinstance(data, (bytes, bytearray)) else bytes(data)
 
     def get_remaining_bytes_count(self) -> int:
         return len(self.buffer) - self.pointer
 
     def read_byte(self) -> int:
-        return self.read_bytes(1)[0]
+        try:
+            value = self.buffer[self.pointer]
+        except IndexError:
+            raise BufferUnderflowError(1, 0) from None
+        self.pointer += 1
+        return value
 
     def read_bytes(self, count: int) -> bytes:
-        data = self.buffer[self.pointer:self.pointer + count]
-        self.pointer += count
-        return data
+        """
+        Read count bytes. Returns a copy, or a memoryview into the
+        original data when the reader was created with zero_copy=True.
+        """
+        start = self.pointer
+        end = start + count
+        if count < 0 or end > len(self.buffer):
+            raise BufferUnderflowError(count, len(self.buffer) - start)
+        self.pointer = end
+        return self.buffer[start:end]
 
     def read_remaining_bytes(self) -> bytes:
         return self.read_bytes(self.get_remaining_bytes_count())
 
     def read_string(self) -> str:
-        return self.read_remaining_bytes().decode("utf-8", errors="ignore")
+        return str(self.read_remaining_bytes(), "utf-8", "ignore")
 
     def read_cstring(self, max_length: int) -> str:
-        bytes_ = self.read_bytes(max_length)
         # stop at first null terminator
-        terminator_index = bytes_.find(b"\x00")
-        if terminator_index != -1:
-            bytes_ = bytes_[:terminator_index]
-        return bytes_.decode("utf-8", errors="ignore")
-
-    def read_int8(self) -> int:
-        return struct.unpack("b", self.read_bytes(1))[0]
-
-    def read_uint8(self) -> int:
-        return struct.unpack("B", self.read_bytes(1))[0]
-
-    def read_uint16_le(self) -> int:
-        return struct.unpack("<H", self.read_bytes(2))[0]
-
-    def read_uint16_be(self) -> int:
-        return struct.unpack(">H", self.read_bytes(2))[0]
-
-    def read_uint32_le(self) -> int:
-        return struct.unpack("<I", self.read_bytes(4))[0]
-
-    def read_uint32_be(self) -> int:
-        return struct.unpack(">I", self.read_bytes(4))[0]
-
-    def read_int16_le(self) -> int:
-        return struct.unpack("<h", self.read_bytes(2))[0]
-
-    def read_int16_be(self) -> int:
-        return struct.unpack(">h", self.read_bytes(2))[0]
-
-    def read_int32_le(self) -> int:
-        return struct.unpack("<i", self.read_bytes(4))[0]
+        return str(self.read_bytes(max_length), "utf-8", "ignore").split("\x00", 1)[0]
+
+    read_int8 = _fixed_width_reader(_INT8)
+    read_uint8 = read_byte
+    read_uint16_le = _fixed_width_reader(_UINT16_LE)
+    read_uint16_be = _fixed_width_reader(_UINT16_BE)
+    read_uint32_le = _fixed_width_reader(_UINT32_LE)
+    read_uint32_be = _fixed_width_reader(_UINT32_BE)
+    read_int16_le = _fixed_width_reader(_INT16_LE)
+    read_int16_be = _fixed_width_reader(_INT16_BE)
+    read_int32_le = _fixed_width_reader(_INT32_LE)
 
     def read_int24_be(self) -> int:
-        # read 3 bytes big endian
-        b1, b2, b3 = self.read_bytes(3)
-        value = (b1 << 16) | (b2 << 8) | b3
-        # convert to signed 24-bit
-        if value & 0x800000:
-            value -= 0x1000000
-        return value
+        # read 3 bytes big endian as a signed 24-bit value
+        try:
+            high, low = _INT24_BE.unpack_from(self.buffer, self.pointer)
+        except struct.error:
+            raise BufferUnderflowError(3, self.get_remaining_bytes_count()) from None
+        self.pointer += 3
+        return (high << 16) | low
@@ -0,0 +1,134 @@
+import struct
+
+# precompiled writers for the fixed-width fields, shared by every BufferWriter
+_INT8 = struct.Struct("b")
+_UINT16_LE = struct.Struct("<H")
+_UINT16_BE = struct.Struct(">H")
+_UINT32_LE = struct.Struct("<I")
+_UINT32_BE = struct.Struct(">I")
+_INT16_LE = struct.Struct("<h")
+_INT16_BE = struct.Struct(">h")
+_INT32_LE = struct.Struct("<i")
+# signed high byte + unsigned low word of a signed 24-bit value
+_INT24_BE = struct.Struct(">bH")
+
+
+def _fixed_width_writer(fmt: struct.Struct):
+    """
+    Build a write_* method that packs fmt in place at the end of the frame.
+    """
+    pack_into = fmt.pack_into
+    size = fmt.size
+
+    def write(self, value: int):
+        start = self.length
+        end = start + size
+        if end > len(self.buffer):
+            self._grow(end)
+        pack_into(self.buffer, start, value)
+        self.length = end
+
+    return write
+
+
+class BufferWriter:
+    """
+    Frame builder backed by a preallocated bytearray.
+
+    A writer can be reused with reset(). getbuffer() returns a view of the
+    frame without copying it; the view is only valid until the next reset()
+    or write, so anything that needs to keep the frame should use to_bytes().
+    """
+
+    def __init__(self, capacity: int = 256):
+        self.buffer = bytearray(capacity)
+        self.length = 0
+
+    def __len__(self) -> int:
+        return self.length
+
+    def _grow(self, min_capacity: int):
+        # allocate a fresh buffer instead of resizing in place, so views
+        # handed out by getbuffer() never block growth
+        capacity = max(min_capacity, len(self.buffer) * 2)
+        grown = bytearray(capacity)
+        grown[:self.length] = memoryview(self.buffer)[:self.length]
+        self.buffer = grown
+
+    def reset(self):
+        """
+        Discard the current frame and keep the allocated buffer for the next one.
+        """
+        self.length = 0
+
+    def getbuffer(self) -> memoryview:
+        """
+        Return a zero-copy view of the frame written so far.
+        """
+        return memoryview(self.buffer)[:self.length]
+
+    def to_bytes(self) -> bytes:
+        return bytes(self.getbuffer())
+
+    def reserve(self, count: int) -> int:
+        """
+        Extend the frame by count bytes and return the offset they start at,
+        so callers can pack_into() buffer directly.
+        """
+        start = self.length
+        end = start + count
+        if end > len(self.buffer):
+            self._grow(end)
+        self.length = end
+        return start
+
+    def write_bytes(self, data: bytes):
+        start = self.length
+        end = start + len(data)
+        if end > len(self.buffer):
+            self._grow(end)
+        self.buffer[start:end] = data
+        self.length = end
+
+    def write_byte(self, value: int):
+        start = self.length
+        if start >= len(self.buffer):
+            self._grow(start + 1)
+        self.buffer[start] = value
+        self.length = start + 1
+
+    def write_string(self, string: str):
+        self.write_bytes(string.encode("utf-8"))
+
+    def write_cstring(self, string: str, max_length: int):
+        """
+        Write string as a fixed-size, null-terminated field of max_length bytes.
+        """
+        encoded = string.encode("utf-8")[:max_length - 1]
+        start = self.length
+        end = start + max_length
+        if end > len(self.buffer):
+            self._grow(end)
+        self.buffer[start:start + len(encoded)] = encoded
+        # pad the rest of the field, including the terminator, with zeros
+        self.buffer[start + len(encoded):end] = bytes(max_length - len(encoded))
+        self.length = end
+
+    write_int8 = _fixed_width_writer(_INT8)
+    write_uint8 = write_byte
+    write_uint16_le = _fixed_width_writer(_UINT16_LE)
+    write_uint16_be = _fixed_width_writer(_UINT16_BE)
+    write_uint32_le = _fixed_width_writer(_UINT32_LE)
+    write_uint32_be = _fixed_width_writer(_UINT32_BE)
+    write_int16_le = _fixed_width_writer(_INT16_LE)
+    write_int16_be = _fixed_width_writer(_INT16_BE)
+    write_int32_le = _fixed_width_writer(_INT32_LE)
+
+    def write_int24_be(self, value: int):
+        # split into a signed high byte and an unsigned low word
+        start = self.length
+        end = start + 3
+        if end > len(self.buffer):
+            self._grow(end)
+        _INT24_BE.pack_into(self.buffer, start, value >> 16, value & 0xFFFF)
+        self.length = end
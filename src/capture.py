@@ -0,0 +1,317 @@
+import asyncio
+import mmap
+import struct
+import time
+from bisect import bisect_left
+from collections import namedtuple
+
+from .listener.node_listener import NodeTransport
+from .packet import Packet
+
+# file header: magic, version, index interval, capture start (microseconds since epoch)
+_FILE_HEADER = struct.Struct("<4sHHQ")
+# record header: kind, milliseconds since capture start, RSSI (dBm), SNR (quarter dB), length
+_RECORD = struct.Struct("<BIhbH")
+# index record body: previous index offset (0 = none), first frame offset, first frame time, frame count
+_INDEX = struct.Struct("<QQII")
+# written by close(): offset of the last index record
+_FOOTER = struct.Struct("<Q4s")
+
+_MAGIC = b"MCCP"
+_FOOTER_MAGIC = b"MCIX"
+_VERSION = 1
+
+DIRECTION_RX = 0
+DIRECTION_TX = 1
+_KIND_INDEX = 0x80
+
+CaptureRecord = namedtuple("CaptureRecord", "timestamp direction rssi snr frame")
+
+
+class CaptureWriter:
+    """
+    Appends frames to a capture log.
+
+    Each frame is stored behind a 10-byte header holding its direction,
+    the time in milliseconds since the capture started, RSSI and SNR.
+    Every index_interval frames an index record summarising them is
+    appended, chained to the previous one; close() writes a footer pointing
+    at the last, so readers find every segment without scanning frames.
+    """
+
+    def __init__(self, path: str, index_interval: int = 1024, start_time: float | None = None):
+        self.path = path
+        self.index_interval = index_interval
+        self.start_time = time.time() if start_time is None else start_time
+        self._start_us = int(self.start_time * 1_000_000)
+        self._file = open(path, "wb")
+        self._file.write(_FILE_HEADER.pack(_MAGIC, _VERSION, index_interval, self._start_us))
+        self._offset = _FILE_HEADER.size
+        self._last_index = 0
+        self._segment_offset = self._offset
+        self._segment_start = None
+        self._segment_end = 0
+        self._segment_count = 0
+
+        # counters
+        self.frames = 0
+
+    def write(self, frame: bytes, direction: int = DIRECTION_RX, rssi: int = 0, snr: float = 0.0,
+              timestamp: float | None = None):
+        if timestamp is None:
+            timestamp = time.time()
+        ms = (int(timestamp * 1_000_000) - self._start_us) // 1000
+        if not 0 <= ms <= 0xFFFFFFFF:
+            raise ValueError("timestamp outside the 49 days a capture can span")
+        if self._segment_start is None:
+            self._segment_start = ms
+        self._segment_end = ms
+        header = _RECORD.pack(direction, ms, rssi, max(-128, min(127, round(snr * 4))), len(frame))
+        self._file.write(header)
+        self._file.write(frame)
+        self._offset += _RECORD.size + len(frame)
+        self._segment_count += 1
+        self.frames += 1
+        if self._segment_count >= self.index_interval:
+            self._write_index()
+
+    def _write_index(self):
+        if not self._segment_count:
+            return
+        body = _INDEX.pack(self._last_index, self._segment_offset, self._segment_start, self._segment_count)
+        self._file.write(_RECORD.pack(_KIND_INDEX, self._segment_end, 0, 0, len(body)) + body)
+        self._last_index = self._offset
+        self._offset += _RECORD.size + len(body)
+        self._segment_offset = self._offset
+        self._segment_start = None
+        self._segment_count = 0
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        if self._file is None:
+            return
+        self._write_index()
+        self._file.write(_FOOTER.pack(self._last_index, _FOOTER_MAGIC))
+        self._file.close()
+        self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class CaptureReader:
+    """
+    Reads a capture log through mmap. Frames are memoryviews into the
+    mapping, so they can go straight into Packet.from_bytes; they must be
+    released (or copied) before close().
+
+    A log that was not closed (e.g. the capturing process died) has no
+    footer; its records are then scanned once on open instead.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._map)
+        magic, version, self.index_interval, start_us = _FILE_HEADER.unpack_from(self._map)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError(f"{path} is not a version {_VERSION} capture")
+        self.start_time = start_us / 1_000_000
+        # (first ms, last ms, first frame offset, frame count), in file order
+        self._segments = []
+        self._end = len(self._map)
+        if self._end >= _FILE_HEADER.size + _FOOTER.size and \
+                self._map[self._end - 4:self._end] == _FOOTER_MAGIC:
+            self._end -= _FOOTER.size
+            self._load_index()
+        else:
+            self._scan()
+        self._segment_ends = [segment[1] for segment in self._segments]
+
+    def __len__(self) -> int:
+        return sum(segment[3] for segment in self._segments)
+
+    def _load_index(self):
+        (offset, _) = _FOOTER.unpack_from(self._map, self._end)
+        while offset:
+            _, last_ms, _, _, _ = _RECORD.unpack_from(self._map, offset)
+            prev, first_offset, first_ms, count = _INDEX.unpack_from(self._map, offset + _RECORD.size)
+            self._segments.append((first_ms, last_ms, first_offset, count))
+            offset = prev
+        self._segments.reverse()
+
+    def _scan(self):
+        offset = _FILE_HEADER.size
+        first_offset, first_ms, last_ms, count = offset, None, 0, 0
+        while offset + _RECORD.size <= self._end:
+            kind, ms, _, _, length = _RECORD.unpack_from(self._map, offset)
+            end = offset + _RECORD.size + length
+            if end > self._end:
+                # torn trailing record
+                break
+            if kind & _KIND_INDEX:
+                if count:
+                    self._segments.append((first_ms, last_ms, first_offset, count))
+                first_offset, first_ms, count = end, None, 0
+            else:
+                if first_ms is None:
+                    first_ms = ms
+                last_ms = ms
+                count += 1
+            offset = end
+        if count:
+            self._segments.append((first_ms, last_ms, first_offset, count))
+        self._end = offset
+
+    def _record_at(self, offset: int):
+        kind, ms, rssi, snr, length = _RECORD.unpack_from(self._map, offset)
+        start = offset + _RECORD.size
+        return kind, ms, rssi, snr, self._view[start:start + length], start + length
+
+    def seek(self, timestamp: float) -> int:
+        """
+        Offset of the first frame recorded at or after timestamp.
+        """
+        ms = (timestamp - self.start_time) * 1000
+        index = bisect_left(self._segment_ends, ms)
+        if index == len(self._segments):
+            return self._end
+        offset = self._segments[index][2]
+        while offset < self._end:
+            kind, record_ms, _, _, _, end = self._record_at(offset)
+            if not kind & _KIND_INDEX and record_ms >= ms:
+                return offset
+            offset = end
+        return self._end
+
+    def records(self, start_time: float | None = None, end_time: float | None = None,
+                direction: int | None = None):
+        """
+        Yield CaptureRecords in file order, optionally limited to a time range
+        (end_time exclusive) and one direction.
+        """
+        offset = _FILE_HEADER.size if start_time is None else self.seek(start_time)
+        end_ms = None if end_time is None else (end_time - self.start_time) * 1000
+        start_time = self.start_time
+        while offset < self._end:
+            kind, ms, rssi, snr, frame, offset = self._record_at(offset)
+            if kind & _KIND_INDEX:
+                continue
+            if end_ms is not None and ms >= end_ms:
+                return
+            if direction is None or kind == direction:
+                yield CaptureRecord(start_time + ms / 1000, kind, rssi, snr / 4, frame)
+
+    def __iter__(self):
+        return self.records()
+
+    def packets(self, **kwargs):
+        """
+        Yield (record, Packet) for each record, decoded without copying.
+        """
+        for record in self.records(**kwargs):
+            yield record, Packet.from_bytes(record.frame)
+
+    def close(self):
+        self._view.release()
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class ReplayTransport(NodeTransport):
+    """
+    NodeTransport that receives the frames of a capture.
+
+    speed scales the recorded inter-frame gaps: 1.0 replays in real time,
+    10.0 ten times faster, and None as fast as possible. Only frames of the
+    given direction are replayed (received frames by default). Once the
+    capture is exhausted "end" is emitted, finished is set and receive()
+    waits forever. Sent frames are counted, not stored.
+
+    carries_packets says what the capture holds: raw mesh packets from a
+    radio (the default), which NodeListener handles as received packets,
+    or the command frames of a client-side transport.
+    """
+
+    def __init__(self, reader: CaptureReader, speed: float | None = 1.0, direction: int = DIRECTION_RX,
+                 start_time: float | None = None, end_time: float | None = None, carries_packets: bool = True):
+        super().__init__()
+        self.reader = reader
+        self.speed = speed
+        self.carries_packets = carries_packets
+        self._records = reader.records(start_time, end_time, direction)
+        self._first_timestamp = None
+        self._started_at = None
+        self.finished = asyncio.Event()
+
+        # counters
+        self.frames_received = 0
+        self.frames_sent = 0
+        self.bytes_sent = 0
+
+    async def receive(self) -> bytes:
+        """
+        Next captured frame, as a memoryview into the capture.
+        """
+        record = next(self._records, None)
+        if record is None:
+            if not self.finished.is_set():
+                self.finished.set()
+                self.emit("end")
+            await asyncio.Future()
+        if self.speed:
+            now = time.monotonic()
+            if self._first_timestamp is None:
+                self._first_timestamp = record.timestamp
+                self._started_at = now
+            due = self._started_at + (record.timestamp - self._first_timestamp) / self.speed
+            if due > now:
+                await asyncio.sleep(due - now)
+        self.frames_received += 1
+        return record.frame
+
+    async def send(self, data: bytes):
+        self.frames_sent += 1
+        self.bytes_sent += len(data)
+
+    async def close(self):
+        self._records.close()
+
+
+class CaptureTransport(NodeTransport):
+    """
+    Wraps another NodeTransport and records everything it receives and
+    sends to a CaptureWriter.
+    """
+
+    def __init__(self, inner: NodeTransport, writer: CaptureWriter):
+        super().__init__()
+        self.inner = inner
+        self.writer = writer
+        self.carries_packets = inner.carries_packets
+
+    async def receive(self) -> bytes:
+        frame = await self.inner.receive()
+        if frame:
+            self.writer.write(frame, DIRECTION_RX)
+        return frame
+
+    async def send(self, data: bytes):
+        self.writer.write(data, DIRECTION_TX)
+        await self.inner.send(data)
+
+    async def close(self):
+        await self.inner.close()
+        self.writer.close()
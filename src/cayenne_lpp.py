@@ -1,4 +1,18 @@
-from .buffer_reader import BufferReader
+import struct
+from array import array
+from collections import namedtuple
+
+from .buffer_reader import BufferUnderflowError
+from .buffer_writer import BufferWriter
+
+# one decoded reading; value is a number, or a tuple for multi-field types
+LppReading = namedtuple("LppReading", ["channel", "type", "value"])
+
+# size: bytes after channel/type (None = length-prefixed), unpack_from/pack_into:
+# convert the raw field tuple, scales: divisor per field, fields: names of
+# multi-field values
+_LppType = namedtuple("_LppType", ["size", "unpack_from", "pack_into", "scales", "fields"])
+
 
 class CayenneLpp:
     LPP_DIGITAL_INPUT = 0
@@ -31,77 +45,263 @@ class CayenneLpp:
 
     @staticmethod
     def parse(data: bytes):
-        buffer = BufferReader(data)
+        """
+        Decode a payload into a list of {"channel", "type", "value"} dicts.
+        Multi-field values (GPS, accelerometer, ...) are dicts keyed by field name.
+        """
         telemetry = []
+        for channel, type_, value in _iter_readings(data):
+            fields = _LPP_TYPES[type_].fields
+            if fields is not None:
+                value = dict(zip(fields, value))
+            telemetry.append({"channel": channel, "type": type_, "value": value})
+        return telemetry
+
+    @staticmethod
+    def parse_tuples(data: bytes) -> list[LppReading]:
+        """
+        Decode a payload into LppReading tuples, without a dict per reading.
+        """
+        return [LppReading._make(reading) for reading in _iter_readings(data)]
 
-        while buffer.get_remaining_bytes_count() >= 2:
-            channel = buffer.read_uint8()
-            type_ = buffer.read_uint8()
-
-            # stop parsing if channel and type are zero
-            if channel == 0 and type_ == 0:
-                break
-
-            if type_ == CayenneLpp.LPP_GENERIC_SENSOR:
-                value = buffer.read_uint32_be()
-                telemetry.append({"channel": channel, "type": type_, "value": value})
-
-            elif type_ == CayenneLpp.LPP_LUMINOSITY:
-                lux = buffer.read_int16_be()
-                telemetry.append({"channel": channel, "type": type_, "value": lux})
-
-            elif type_ == CayenneLpp.LPP_PRESENCE:
-                presence = buffer.read_uint8()
-                telemetry.append({"channel": channel, "type": type_, "value": presence})
-
-            elif type_ == CayenneLpp.LPP_TEMPERATURE:
-                temperature = buffer.read_int16_be() / 10
-                telemetry.append({"channel": channel, "type": type_, "value": temperature})
-
-            elif type_ == CayenneLpp.LPP_RELATIVE_HUMIDITY:
-                rh = buffer.read_uint8() / 2
-                telemetry.append({"channel": channel, "type": type_, "value": rh})
-
-            elif type_ == CayenneLpp.LPP_BAROMETRIC_PRESSURE:
-                pressure = buffer.read_uint16_be() / 10
-                telemetry.append({"channel": channel, "type": type_, "value": pressure})
-
-            elif type_ == CayenneLpp.LPP_VOLTAGE:
-                voltage = buffer.read_int16_be() / 100
-                telemetry.append({"channel": channel, "type": type_, "value": voltage})
-
-            elif type_ == CayenneLpp.LPP_CURRENT:
-                current = buffer.read_int16_be() / 1000
-                telemetry.append({"channel": channel, "type": type_, "value": current})
-
-            elif type_ == CayenneLpp.LPP_PERCENTAGE:
-                percentage = buffer.read_uint8()
-                telemetry.append({"channel": channel, "type": type_, "value": percentage})
-
-            elif type_ == CayenneLpp.LPP_CONCENTRATION:
-                concentration = buffer.read_uint16_be()
-                telemetry.append({"channel": channel, "type": type_, "value": concentration})
-
-            elif type_ == CayenneLpp.LPP_POWER:
-                power = buffer.read_uint16_be()
-                telemetry.append({"channel": channel, "type": type_, "value": power})
-
-            elif type_ == CayenneLpp.LPP_GPS:
-                latitude = buffer.read_int24_be() / 10000
-                longitude = buffer.read_int24_be() / 10000
-                altitude = buffer.read_int24_be() / 100
-                telemetry.append({
-                    "channel": channel,
-                    "type": type_,
-                    "value": {
-                        "latitude": latitude,
-                        "longitude": longitude,
-                        "altitude": altitude,
-                    },
-                })
-
-            else:
-                # unsupported type, stop parsing further
-                return telemetry
+    @staticmethod
+    def parse_bulk(payloads) -> dict:
+        """
+        Decode many payloads into per-channel columns.
 
-        return telemetry
+        Returns {(channel, type): columns}, where columns["index"] is the
+        position of the source payload in payloads and each value field is an
+        array("d"): "value" for single-value types, or one array per field name
+        ("latitude", "x", "r", ...) for multi-field types. Polyline readings
+        are skipped since they have no fixed shape.
+        """
+        channels = {}
+        for index, data in enumerate(payloads):
+            for channel, type_, value in _iter_readings(data):
+                spec = _LPP_TYPES[type_]
+                if spec.size is None:
+                    continue
+                columns = channels.get((channel, type_))
+                if columns is None:
+                    columns = {"index": array("L")}
+                    for field in spec.fields or ("value",):
+                        columns[field] = array("d")
+                    channels[(channel, type_)] = columns
+                columns["index"].append(index)
+                if spec.fields is None:
+                    columns["value"].append(value)
+                else:
+                    for field, field_value in zip(spec.fields, value):
+                        columns[field].append(field_value)
+        return channels
+
+    @staticmethod
+    def write(writer: BufferWriter, channel: int, type_: int, value):
+        """
+        Encode one reading into writer. value takes the same shape parse()
+        returns: a number, a dict or tuple for multi-field types, or the raw
+        encoded points for LPP_POLYLINE.
+        """
+        spec = _lpp_type(type_)
+        if not 0 <= channel <= 0xFF:
+            raise ValueError(f"LPP channel {channel} does not fit in a byte")
+        if spec.size is None:
+            if len(value) > 0xFE:
+                raise ValueError(f"{len(value)} bytes of polyline points do not fit the size byte")
+            writer.write_uint8(channel)
+            writer.write_uint8(type_)
+            writer.write_uint8(len(value) + 1)
+            writer.write_bytes(value)
+            return
+
+        raw = _to_raw(spec, value)
+        offset = writer.reserve(2 + spec.size)
+        buffer = writer.buffer
+        buffer[offset] = channel
+        buffer[offset + 1] = type_
+        try:
+            spec.pack_into(buffer, offset + 2, *raw)
+        except struct.error:
+            # drop the half-written reading
+            writer.length = offset
+            raise
+
+
+class LppTemplate:
+    """
+    Precompiled payload for a fixed sensor layout.
+
+    The channel/type headers are written once; set() and update() only
+    repack the value fields in place, and write_to() copies the finished
+    payload into a writer in one go. Values are packed into a scratch copy
+    first, so one that does not fit raises struct.error and leaves the
+    template unchanged.
+    """
+
+    def __init__(self, layout):
+        """
+        layout: iterable of (channel, type) pairs, in payload order.
+        """
+        layout = [(channel, type_, _lpp_type(type_)) for channel, type_ in layout]
+        for _, type_, spec in layout:
+            if spec.size is None:
+                raise ValueError(f"LPP type {type_} has no fixed size and cannot be templated")
+
+        self.buffer = bytearray(sum(2 + spec.size for _, _, spec in layout))
+        self._slots = []
+        offset = 0
+        for channel, type_, spec in layout:
+            self.buffer[offset] = channel
+            self.buffer[offset + 1] = type_
+            self._slots.append((offset + 2, spec))
+            offset += 2 + spec.size
+        # same headers as buffer; value fields are only meaningful while packing
+        self._scratch = bytearray(self.buffer)
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def set(self, index: int, value):
+        """
+        Patch the value of reading number index.
+        """
+        offset, spec = self._slots[index]
+        spec.pack_into(self._scratch, offset, *_to_raw(spec, value))
+        end = offset + spec.size
+        self.buffer[offset:end] = self._scratch[offset:end]
+
+    def update(self, values):
+        """
+        Patch every reading, in layout order.
+        """
+        end = 0
+        for index, value in enumerate(values):
+            offset, spec = self._slots[index]
+            spec.pack_into(self._scratch, offset, *_to_raw(spec, value))
+            end = offset + spec.size
+        self.buffer[:end] = self._scratch[:end]
+
+    def getbuffer(self) -> memoryview:
+        return memoryview(self.buffer)
+
+    def write_to(self, writer: BufferWriter):
+        writer.write_bytes(self.buffer)
+
+
+def _lpp_type(type_: int) -> _LppType:
+    spec = _LPP_TYPES.get(type_)
+    if spec is None:
+        raise ValueError(f"unsupported LPP type {type_}")
+    return spec
+
+
+def _to_raw(spec: _LppType, value) -> tuple:
+    """
+    Scale a reading back to the integer fields it is encoded as.
+    """
+    if spec.fields is None:
+        return (round(value * spec.scales[0]),)
+    if isinstance(value, dict):
+        value = [value[field] for field in spec.fields]
+    return tuple(round(v * s) for v, s in zip(value, spec.scales))
+
+
+def _iter_readings(data: bytes):
+    """
+    Yield (channel, type, value) for each reading until the end of data, a
+    zero channel/type pair, or a type with no table entry.
+    """
+    end = len(data)
+    offset = 0
+    while end - offset >= 2:
+        channel = data[offset]
+        type_ = data[offset + 1]
+
+        # stop parsing if channel and type are zero
+        if channel == 0 and type_ == 0:
+            return
+
+        spec = _LPP_TYPES.get(type_)
+        if spec is None:
+            # unsupported type, stop parsing further
+            return
+        offset += 2
+
+        size = spec.size
+        if size is None:
+            # length-prefixed: the first byte counts itself
+            if offset >= end:
+                raise BufferUnderflowError(1, 0)
+            size = data[offset]
+            if size < 1:
+                raise ValueError(f"malformed LPP type {type_} reading: size byte is 0")
+        if offset + size > end:
+            raise BufferUnderflowError(size, end - offset)
+
+        raw = spec.unpack_from(data, offset)
+        offset += size
+
+        scales = spec.scales
+        if scales is None:
+            value = raw
+        elif spec.fields is None:
+            value = raw[0] / scales[0] if scales[0] != 1 else raw[0]
+        else:
+            value = tuple(v / s if s != 1 else v for v, s in zip(raw, scales))
+        yield channel, type_, value
+
+
+def _fixed(fmt: str, scales: tuple, fields: tuple | None = None) -> _LppType:
+    fmt = struct.Struct(fmt)
+    return _LppType(fmt.size, fmt.unpack_from, fmt.pack_into, scales, fields)
+
+
+_GPS_RAW = struct.Struct(">bHbHbH")
+
+
+def _unpack_gps(data, offset):
+    # three signed 24-bit big endian values
+    lat_hi, lat_lo, lon_hi, lon_lo, alt_hi, alt_lo = _GPS_RAW.unpack_from(data, offset)
+    return (lat_hi << 16) | lat_lo, (lon_hi << 16) | lon_lo, (alt_hi << 16) | alt_lo
+
+
+def _pack_gps(buffer, offset, lat, lon, alt):
+    _GPS_RAW.pack_into(buffer, offset, lat >> 16, lat & 0xFFFF, lon >> 16, lon & 0xFFFF, alt >> 16, alt & 0xFFFF)
+
+
+def _unpack_polyline(data, offset):
+    # keep the encoded points as-is, after the size byte
+    return bytes(data[offset + 1:offset + data[offset]])
+
+
+_XYZ = ("x", "y", "z")
+
+_LPP_TYPES = {
+    CayenneLpp.LPP_DIGITAL_INPUT: _fixed(">B", (1,)),
+    CayenneLpp.LPP_DIGITAL_OUTPUT: _fixed(">B", (1,)),
+    CayenneLpp.LPP_ANALOG_INPUT: _fixed(">h", (100,)),
+    CayenneLpp.LPP_ANALOG_OUTPUT: _fixed(">h", (100,)),
+    CayenneLpp.LPP_GENERIC_SENSOR: _fixed(">I", (1,)),
+    CayenneLpp.LPP_LUMINOSITY: _fixed(">h", (1,)),
+    CayenneLpp.LPP_PRESENCE: _fixed(">B", (1,)),
+    CayenneLpp.LPP_TEMPERATURE: _fixed(">h", (10,)),
+    CayenneLpp.LPP_RELATIVE_HUMIDITY: _fixed(">B", (2,)),
+    CayenneLpp.LPP_ACCELEROMETER: _fixed(">hhh", (1000, 1000, 1000), _XYZ),
+    CayenneLpp.LPP_BAROMETRIC_PRESSURE: _fixed(">H", (10,)),
+    CayenneLpp.LPP_VOLTAGE: _fixed(">h", (100,)),
+    CayenneLpp.LPP_CURRENT: _fixed(">h", (1000,)),
+    CayenneLpp.LPP_FREQUENCY: _fixed(">I", (1,)),
+    CayenneLpp.LPP_PERCENTAGE: _fixed(">B", (1,)),
+    CayenneLpp.LPP_ALTITUDE: _fixed(">h", (1,)),
+    CayenneLpp.LPP_CONCENTRATION: _fixed(">H", (1,)),
+    CayenneLpp.LPP_POWER: _fixed(">H", (1,)),
+    CayenneLpp.LPP_DISTANCE: _fixed(">I", (1000,)),
+    CayenneLpp.LPP_ENERGY: _fixed(">I", (1000,)),
+    CayenneLpp.LPP_DIRECTION: _fixed(">H", (1,)),
+    CayenneLpp.LPP_UNIXTIME: _fixed(">I", (1,)),
+    CayenneLpp.LPP_GYROMETER: _fixed(">hhh", (100, 100, 100), _XYZ),
+    CayenneLpp.LPP_COLOUR: _fixed(">BBB", (1, 1, 1), ("r", "g", "b")),
+    CayenneLpp.LPP_GPS: _LppType(9, _unpack_gps, _pack_gps, (10000, 10000, 100), ("latitude", "longitude", "altitude")),
+    CayenneLpp.LPP_SWITCH: _fixed(">B", (1,)),
+    CayenneLpp.LPP_POLYLINE: _LppType(None, _unpack_polyline, None, None, None),
+}
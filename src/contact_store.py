@@ -0,0 +1,226 @@
+import os
+import struct
+import time
+
+from .constants import Constants
+
+# record body, in the order AddUpdateContact sends it:
+# public key, type, flags, out_path_len, out_path, adv_name, last_advert, adv_lat, adv_lon
+_BODY = struct.Struct("<32sBBb64s32sIii")
+_LASTMOD = struct.Struct("<I")
+_FILE_HEADER = struct.Struct("<4sHH")
+
+_MAGIC = b"MCCS"
+_VERSION = 1
+
+# a stored record is the Contact frame itself: code byte, body, lastmod
+_LIVE = Constants.ResponseCodes.Contact
+_REMOVED = 0x00
+
+# out_path_len value meaning "no known path, use flood"
+_NO_PATH = -1
+
+
+class ContactStore:
+    """
+    Contact table backed by an append-only log of fixed-size records.
+
+    Each record is stored exactly as the Contact response frame (code byte,
+    143-byte body, lastmod), so GetContacts sends records without encoding
+    anything. Removals append a tombstone; compact() rewrites the log as a
+    snapshot of the live records. With path=None the store is memory-only.
+    """
+
+    BODY_SIZE = _BODY.size
+    RECORD_SIZE = 1 + _BODY.size + _LASTMOD.size
+
+    def __init__(self, path: str | None = None, compact_ratio: float = 2.0):
+        self.path = path
+        self.compact_ratio = compact_ratio
+        self._records = {}
+        self._log_records = 0
+        self._file = None
+        if path is not None:
+            self._load()
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __contains__(self, public_key: bytes) -> bool:
+        return public_key in self._records
+
+    # -------------------------
+    # Persistence
+    # -------------------------
+
+    def _load(self):
+        size = self.RECORD_SIZE
+        try:
+            with open(self.path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            data = b""
+
+        if len(data) < _FILE_HEADER.size:
+            self.compact()
+            return
+
+        magic, version, record_size = _FILE_HEADER.unpack_from(data)
+        if magic != _MAGIC or version != _VERSION or record_size != size:
+            raise ValueError(f"{self.path} is not a version {_VERSION} contact store")
+
+        # records are kept as slices of the file; fields are decoded on demand
+        records = self._records
+        end = len(data) - (len(data) - _FILE_HEADER.size) % size
+        for offset in range(_FILE_HEADER.size, end, size):
+            public_key = data[offset + 1:offset + 33]
+            if data[offset] == _LIVE:
+                records[public_key] = data[offset:offset + size]
+            else:
+                records.pop(public_key, None)
+        self._log_records = (end - _FILE_HEADER.size) // size
+
+        if end != len(data) or self._needs_compaction():
+            # drop a torn trailing record, or shrink a log full of stale entries
+            self.compact()
+        else:
+            self._file = open(self.path, "ab")
+
+    def _needs_compaction(self) -> bool:
+        return self._log_records > max(64, len(self._records) * self.compact_ratio)
+
+    def _append(self, record: bytes):
+        if self._file is None:
+            return
+        self._file.write(record)
+        self._file.flush()
+        self._log_records += 1
+        if self._needs_compaction():
+            self.compact()
+
+    def _write_snapshot(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(_FILE_HEADER.pack(_MAGIC, _VERSION, self.RECORD_SIZE))
+            f.write(b"".join(self._records.values()))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self._log_records = len(self._records)
+
+    def compact(self):
+        """
+        Rewrite the log as a snapshot holding only live records.
+        """
+        if self.path is None:
+            return
+        if self._file is not None:
+            self._file.close()
+        self._write_snapshot()
+        self._file = open(self.path, "ab")
+
+    def sync(self):
+        if self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    # -------------------------
+    # Updates
+    # -------------------------
+
+    def add_update(self, body: bytes, lastmod: int | None = None) -> bytes:
+        """
+        Store a contact from an AddUpdateContact body. A body without the
+        trailing lat/lon is zero-padded. Returns the stored record.
+        """
+        if len(body) < self.BODY_SIZE:
+            body = bytes(body) + bytes(self.BODY_SIZE - len(body))
+        if lastmod is None:
+            lastmod = int(time.time())
+        record = b"".join((bytes((_LIVE,)), body[:self.BODY_SIZE], _LASTMOD.pack(lastmod)))
+        self._records[record[1:33]] = record
+        self._append(record)
+        return record
+
+    def remove(self, public_key: bytes) -> bool:
+        record = self._records.pop(public_key, None)
+        if record is None:
+            return False
+        self._append(bytes((_REMOVED,)) + record[1:])
+        return True
+
+    def reset_path(self, public_key: bytes) -> bool:
+        """
+        Forget the out path of a contact so it is reached by flood again.
+        """
+        contact = self.get(public_key)
+        if contact is None:
+            return False
+        contact["out_path_len"] = _NO_PATH
+        contact["out_path"] = bytes(64)
+        self.add_update(self._encode_body(contact))
+        return True
+
+    # -------------------------
+    # Lookups
+    # -------------------------
+
+    def get_record(self, public_key: bytes) -> bytes | None:
+        """
+        The stored Contact frame for public_key.
+        """
+        return self._records.get(public_key)
+
+    def get(self, public_key: bytes) -> dict | None:
+        record = self._records.get(public_key)
+        return None if record is None else self.decode(record)
+
+    def records(self, since: int = 0) -> list[bytes]:
+        """
+        Contact frames modified after since (0 = all).
+        """
+        if not since:
+            return list(self._records.values())
+        return [record for record in self._records.values()
+                if _LASTMOD.unpack_from(record, 1 + _BODY.size)[0] > since]
+
+    def most_recent_lastmod(self) -> int:
+        offset = 1 + _BODY.size
+        return max((_LASTMOD.unpack_from(record, offset)[0] for record in self._records.values()), default=0)
+
+    @staticmethod
+    def decode(record: bytes) -> dict:
+        (public_key, type_, flags, out_path_len, out_path, adv_name,
+         last_advert, adv_lat, adv_lon) = _BODY.unpack_from(record, 1)
+        (lastmod,) = _LASTMOD.unpack_from(record, 1 + _BODY.size)
+        return {
+            "public_key": public_key,
+            "type": type_,
+            "flags": flags,
+            "out_path_len": out_path_len,
+            "out_path": out_path,
+            "adv_name": adv_name.split(b"\x00", 1)[0].decode("utf-8", errors="ignore"),
+            "last_advert": last_advert,
+            "adv_lat": adv_lat,
+            "adv_lon": adv_lon,
+            "lastmod": lastmod,
+        }
+
+    @staticmethod
+    def _encode_body(contact: dict) -> bytes:
+        return _BODY.pack(
+            contact["public_key"],
+            contact["type"],
+            contact["flags"],
+            contact["out_path_len"],
+            contact["out_path"],
+            contact["adv_name"].encode("utf-8")[:31],
+            contact["last_advert"],
+            contact["adv_lat"],
+            contact["adv_lon"],
+        )
@@ -0,0 +1,78 @@
+import time
+
+from .buffer_reader import BufferUnderflowError
+from .packet import Packet
+
+
+class DuplicateFilter:
+    """
+    Remembers recently heard packets so re-flooded copies can be dropped
+    before any payload parsing.
+
+    Packets are identified by a hash of (payload_type, payload); the path is
+    left out since it grows at every hop. Memory is bounded by a fixed-size
+    ring of hashes: once full, the oldest entry is forgotten. With window set,
+    an entry also expires that many seconds after it was first heard.
+    """
+
+    def __init__(self, capacity: int = 4096, window: float | None = None):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self.window = window
+        self._ring = [None] * capacity
+        self._pos = 0
+        # hash -> time first heard
+        self._seen = {}
+
+        # counters
+        self.unique = 0
+        self.duplicates = 0
+
+    def __len__(self) -> int:
+        return len(self._seen)
+
+    def check(self, payload_type: int, payload: bytes) -> bool:
+        """
+        Return True if this packet was already heard; otherwise remember it
+        and return False.
+        """
+        key = hash((payload_type, bytes(payload)))
+        now = time.monotonic() if self.window is not None else 0.0
+        heard_at = self._seen.get(key)
+        if heard_at is not None and (self.window is None or now - heard_at < self.window):
+            self.duplicates += 1
+            return True
+
+        if heard_at is None:
+            # claim the oldest ring slot
+            oldest = self._ring[self._pos]
+            if oldest is not None:
+                del self._seen[oldest]
+            self._ring[self._pos] = key
+            self._pos = (self._pos + 1) % self.capacity
+        self._seen[key] = now
+        self.unique += 1
+        return False
+
+    def check_frame(self, frame: bytes) -> bool:
+        """
+        check() a raw packet frame, reading only its header and path length.
+        Raises BufferUnderflowError, remembering nothing, if the frame is too
+        short for its header or path, as Packet.from_bytes() would.
+        """
+        if len(frame) < 2:
+            raise BufferUnderflowError(2, len(frame))
+        path_end = 2 + frame[1]
+        if len(frame) < path_end:
+            raise BufferUnderflowError(frame[1], len(frame) - 2)
+        payload_type = (frame[0] >> Packet.PH_TYPE_SHIFT) & Packet.PH_TYPE_MASK
+        return self.check(payload_type, frame[path_end:])
+
+    def check_packet(self, packet: Packet) -> bool:
+        return self.check(packet.payload_type, packet.payload)
+
+    def clear(self):
+        self._ring = [None] * self.capacity
+        self._pos = 0
+        self._seen.clear()
@@ -1,34 +1,193 @@
 import asyncio
-from collections import defaultdict
+import inspect
+from collections import deque
+
 
 class EventEmitter:
+    """
+    Listeners are kept per event as a tuple of (callback, sync, once)
+    entries that is only rebuilt when a listener is added or removed, so
+    emit() never copies. Each emit() runs the listeners registered when it
+    was called; once() listeners are removed as soon as an emit() picks
+    them up, so a second emit() never sees them, even before they have run.
+
+    Listeners registered with sync=True run inline inside emit(); use it
+    for cheap handlers on hot events. The others run together in a single
+    loop.call_soon callback after emit() returns. A listener returning a
+    coroutine is run as a task. A listener that raises, or whose task
+    fails, is reported as an "error" event with {"error": e, "event": event}.
+    """
+
     def __init__(self):
-        self._event_listeners = defaultdict(list)
+        self._event_listeners = {}
+        # events with at least one once() listener
+        self._once_events = set()
+        self._listener_tasks = set()
 
-    def on(self, event: str, callback):
+    def on(self, event: str, callback, sync: bool = False):
         """Register a persistent listener for an event."""
-        self._event_listeners[event].append(callback)
+        self._event_listeners[event] = self._event_listeners.get(event, ()) + ((callback, sync, False),)
 
     def off(self, event: str, callback):
         """Remove a specific listener for an event."""
-        if event in self._event_listeners:
-            self._event_listeners[event] = [
-                cb for cb in self._event_listeners[event] if cb != callback
-            ]
+        listeners = self._event_listeners.get(event)
+        if not listeners:
+            return
+        remaining = tuple(entry for entry in listeners if entry[0] != callback)
+        if len(remaining) != len(listeners):
+            self._set_listeners(event, remaining)
 
-    def once(self, event: str, callback):
+    def once(self, event: str, callback, sync: bool = False):
         """Register a one-time listener for an event."""
+        self._event_listeners[event] = self._event_listeners.get(event, ()) + ((callback, sync, True),)
+        self._once_events.add(event)
 
-        def internal_callback(*args, **kwargs):
-            self.off(event, internal_callback)
-            loop = asyncio.get_event_loop()
-            loop.call_soon(callback, *args, **kwargs)
+    def _set_listeners(self, event: str, listeners: tuple):
+        if listeners:
+            self._event_listeners[event] = listeners
+        else:
+            del self._event_listeners[event]
+        if not any(entry[2] for entry in listeners):
+            self._once_events.discard(event)
 
-        self.on(event, internal_callback)
+    def listener_count(self, event: str) -> int:
+        return len(self._event_listeners.get(event, ()))
 
     def emit(self, event: str, *args, **kwargs):
-        """Trigger all listeners for an event asynchronously."""
-        if event in self._event_listeners:
-            loop = asyncio.get_event_loop()
-            for listener in list(self._event_listeners[event]):
-                loop.call_soon(listener, *args, **kwargs)
+        """Trigger all listeners for an event."""
+        listeners = self._event_listeners.get(event)
+        if not listeners:
+            return
+        if event in self._once_events:
+            self._set_listeners(event, tuple(entry for entry in listeners if not entry[2]))
+        deferred = False
+        for callback, sync, _ in listeners:
+            if not sync:
+                deferred = True
+                continue
+            try:
+                result = callback(*args, **kwargs)
+            except Exception as e:
+                self._listener_failed(event, e)
+                continue
+            if result is not None:
+                self._schedule(event, result)
+        if deferred:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                # no loop to defer to; run them now
+                self._call_deferred(event, listeners, args, kwargs)
+            else:
+                loop.call_soon(self._call_deferred, event, listeners, args, kwargs)
+
+    def _call_deferred(self, event: str, listeners: tuple, args: tuple, kwargs: dict):
+        for callback, sync, _ in listeners:
+            if sync:
+                continue
+            try:
+                result = callback(*args, **kwargs)
+            except Exception as e:
+                self._listener_failed(event, e)
+                continue
+            if result is not None:
+                self._schedule(event, result)
+
+    def _schedule(self, event: str, result):
+        """Run a listener's coroutine as a task."""
+        if inspect.isawaitable(result):
+            task = asyncio.ensure_future(result)
+            self._listener_tasks.add(task)
+            task.add_done_callback(lambda t: self._listener_done(event, t))
+
+    def _listener_done(self, event: str, task: asyncio.Task):
+        self._listener_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            self._listener_failed(event, task.exception())
+
+    def _listener_failed(self, event: str, error: Exception):
+        if event != "error" and "error" in self._event_listeners:
+            self.emit("error", {"error": error, "event": event})
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            raise error
+        loop.call_exception_handler({
+            "message": f"Unhandled error in {event!r} listener",
+            "exception": error,
+        })
+
+    def stream(self, event: str, maxsize: int = 256) -> "EventStream":
+        """
+        Subscribe to event as an async iterator, see EventStream.
+        """
+        return EventStream(self, event, maxsize)
+
+
+class EventStream:
+    """
+    Async iterator over the emissions of one event. Each item is the single
+    emitted argument, or a tuple when several were emitted. Up to maxsize
+    items are buffered; beyond that the oldest is discarded and counted in
+    dropped, so a slow consumer never holds up the emitter.
+
+        async with listener.stream("packet") as packets:
+            async for packet in packets:
+                ...
+    """
+
+    def __init__(self, emitter: EventEmitter, event: str, maxsize: int = 256):
+        self.emitter = emitter
+        self.event = event
+        self.maxsize = maxsize
+        self._items = deque()
+        self._waiter = None
+        self._closed = False
+
+        # counters
+        self.dropped = 0
+
+        emitter.on(event, self._push, sync=True)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def _push(self, *args):
+        if len(self._items) >= self.maxsize:
+            self._items.popleft()
+            self.dropped += 1
+        self._items.append(args[0] if len(args) == 1 else args)
+        waiter = self._waiter
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        while not self._items:
+            if self._closed:
+                raise StopAsyncIteration
+            self._waiter = asyncio.get_running_loop().create_future()
+            try:
+                await self._waiter
+            finally:
+                self._waiter = None
+        return self._items.popleft()
+
+    def close(self):
+        """Unsubscribe; buffered items can still be read."""
+        if self._closed:
+            return
+        self._closed = True
+        self.emitter.off(self.event, self._push)
+        waiter = self._waiter
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.close()
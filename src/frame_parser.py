@@ -0,0 +1,120 @@
+import struct
+
+from .constants import Constants
+
+_FRAME_HEADER = struct.Struct("<BH")
+
+
+class FrameParser:
+    """
+    Incremental decoder for marker + uint16 LE length framed streams.
+
+    feed() accepts chunks of any size and yields every frame completed so
+    far. Bytes are kept in a fixed ring buffer; a frame that does not wrap
+    around the end of the ring is yielded as a memoryview into it, so it is
+    only valid until the next frame is requested. Copy it to keep it.
+
+    Anything that does not start with marker, or announces a frame longer
+    than max_frame_len, is skipped one byte at a time until the stream
+    lines up again. Skipped bytes are counted in dropped_bytes.
+    """
+
+    HEADER_SIZE = _FRAME_HEADER.size
+
+    def __init__(self, marker: int = Constants.SerialFrameTypes.Outgoing,
+                 capacity: int = 4096, max_frame_len: int | None = None):
+        if max_frame_len is None:
+            max_frame_len = capacity - _FRAME_HEADER.size
+        if max_frame_len > capacity - _FRAME_HEADER.size:
+            raise ValueError("max_frame_len does not fit in the ring buffer")
+        self.marker = marker
+        self.capacity = capacity
+        self.max_frame_len = max_frame_len
+        self._buf = bytearray(capacity)
+        self._view = memoryview(self._buf)
+        self._start = 0
+        self._len = 0
+
+        # counters
+        self.frames = 0
+        self.dropped_bytes = 0
+
+    def __len__(self) -> int:
+        """Bytes buffered but not yet part of a complete frame."""
+        return self._len
+
+    @staticmethod
+    def encode(data: bytes, marker: int = Constants.SerialFrameTypes.Incoming) -> bytes:
+        """Frame data for the other end of the stream."""
+        return _FRAME_HEADER.pack(marker, len(data)) + data
+
+    def reset(self):
+        self._start = 0
+        self._len = 0
+
+    def feed(self, data: bytes):
+        """
+        Add a chunk of the stream and yield each complete frame.
+        """
+        data = memoryview(data).cast("B") if not isinstance(data, (bytes, bytearray)) else data
+        offset = 0
+        while offset < len(data):
+            offset += self._write(data, offset)
+            yield from self._frames()
+
+    def _write(self, data, offset: int) -> int:
+        """Copy as much of data[offset:] as fits into the ring; return the count."""
+        capacity = self.capacity
+        count = min(len(data) - offset, capacity - self._len)
+        end = (self._start + self._len) % capacity
+        first = min(count, capacity - end)
+        self._buf[end:end + first] = data[offset:offset + first]
+        if first < count:
+            self._buf[:count - first] = data[offset + first:offset + count]
+        self._len += count
+        return count
+
+    def _drop(self, count: int):
+        self._start = (self._start + count) % self.capacity
+        self._len -= count
+        self.dropped_bytes += count
+
+    def _frames(self):
+        buf = self._buf
+        capacity = self.capacity
+        marker = self.marker
+        while self._len >= _FRAME_HEADER.size:
+            start = self._start
+            if buf[start] != marker:
+                self._drop(self._skip_to_marker())
+                continue
+
+            length = buf[(start + 1) % capacity] | buf[(start + 2) % capacity] << 8
+            if length > self.max_frame_len:
+                # not a real header; look for the next marker
+                self._drop(1)
+                continue
+            if self._len < _FRAME_HEADER.size + length:
+                return
+
+            body = (start + _FRAME_HEADER.size) % capacity
+            self._start = (body + length) % capacity
+            self._len -= _FRAME_HEADER.size + length
+            self.frames += 1
+            if body + length <= capacity:
+                yield self._view[body:body + length]
+            else:
+                yield bytes(self._view[body:]) + self._view[:body + length - capacity]
+
+    def _skip_to_marker(self) -> int:
+        """Number of buffered bytes before the next marker (all of them if none)."""
+        start = self._start
+        end = start + self._len
+        if end <= self.capacity:
+            index = self._buf.find(self.marker, start, end)
+            return self._len if index < 0 else index - start
+        index = self._buf.find(self.marker, start)
+        if index >= 0:
+            return index - start
+        index = self._buf.find(self.marker, 0, end - self.capacity)
+        return self._len if index < 0 else self.capacity - start + index
@@ -9,7 +9,11 @@ from .connection.tcp_connection import TCPConnection
 from .connection.sx1262_connection import SX1262Connection
 from .constants import Constants
 from .advert import Advert
+from .advert_store import AdvertStore
+from .frame_parser import FrameParser
 from .packet import Packet
+from .packet_batch import PacketBatch
+from .packet_router import PacketRouter
 from .buffer_utils import BufferUtils
 from .cayenne_lpp import CayenneLpp
 
@@ -23,7 +27,11 @@ __all__ = [
     "SX1262Connection",
     "Constants",
     "Advert",
+    "AdvertStore",
+    "FrameParser",
     "Packet",
+    "PacketBatch",
+    "PacketRouter",
     "BufferUtils",
     "CayenneLpp",
 ]
@@ -1,4 +1,5 @@
-from .node_listener import NodeListener
-from .tcp_listener import TCPListener
+from .node_listener import NodeListener, NodeTransport
+from .memory_transport import MemoryTransport
+from .tcp_listener import TCPNodeListener, TCPClientsTransport
 
-__all__ = ["NodeListener", "TCPListener"]
+__all__ = ["NodeListener", "NodeTransport", "MemoryTransport", "TCPNodeListener", "TCPClientsTransport"]
@@ -0,0 +1,51 @@
+import asyncio
+
+from .node_listener import NodeTransport
+
+
+class MemoryTransport(NodeTransport):
+    """
+    One end of an in-memory link between two NodeTransports, for tests and
+    benchmarks without a radio:
+
+        node_side, client_side = MemoryTransport.pair()
+        listener = NodeListener(node_side)
+        await client_side.send(command_frame)
+        response = await client_side.receive()
+
+    Frames are copied on send, as the NodeTransport contract requires. With
+    maxsize set, send() waits while the peer has that many unread frames.
+    """
+
+    def __init__(self, maxsize: int = 0):
+        super().__init__()
+        self.peer = None
+        self._inbox = asyncio.Queue(maxsize)
+
+        # counters
+        self.frames_sent = 0
+        self.bytes_sent = 0
+
+    @classmethod
+    def pair(cls, maxsize: int = 0) -> tuple["MemoryTransport", "MemoryTransport"]:
+        a = cls(maxsize)
+        b = cls(maxsize)
+        a.peer = b
+        b.peer = a
+        return a, b
+
+    async def send(self, data: bytes):
+        frame = bytes(data)
+        self.frames_sent += 1
+        self.bytes_sent += len(frame)
+        await self.peer._inbox.put(frame)
+
+    async def receive(self) -> bytes:
+        return await self._inbox.get()
+
+    def pending(self) -> int:
+        """Frames received but not read yet."""
+        return self._inbox.qsize()
+
+    async def close(self):
+        pass
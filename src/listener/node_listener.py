@@ -1,19 +1,100 @@
 import asyncio
+import contextvars
 import time
+from meshcore.advert_verifier import AdvertVerifier
 from meshcore.buffer.buffer_writer import BufferWriter
 from meshcore.buffer.buffer_reader import BufferReader
+from meshcore.cayenne_lpp import CayenneLpp, LppTemplate
 from meshcore.constants import Constants
+from meshcore.contact_store import ContactStore
+from meshcore.duplicate_filter import DuplicateFilter
 from meshcore.events import EventEmitter
+from meshcore.message_queue import MessageQueue
+from meshcore.metrics import MetricsRegistry
+from meshcore.node_config import RADIO_FIELDS, NodeConfig
+from meshcore.packet import Packet
+from meshcore.packet_router import PacketRouter
+from meshcore.packet_stream import PacketStream
+from meshcore.profiling import Profiler
+from meshcore.response_cache import ResponseCache
 
 # section 1
 
+# command byte -> name, for metric labels
+_COMMAND_NAMES = {code: name for name, code in vars(Constants.CommandCodes).items() if not name.startswith("_")}
+
+# first byte of an outgoing frame -> name, for profiling
+_RESPONSE_NAMES = {
+    code: name
+    for codes in (Constants.ResponseCodes, Constants.PushCodes)
+    for name, code in vars(codes).items() if not name.startswith("_")
+}
+
+# command byte -> handler method, bound per listener into a 256-slot table
+_COMMAND_HANDLERS = {
+    Constants.CommandCodes.AppStart: "handle_app_start",
+    Constants.CommandCodes.SendTxtMsg: "handle_send_txt_msg",
+    Constants.CommandCodes.SendChannelTxtMsg: "handle_send_channel_txt_msg",
+    Constants.CommandCodes.GetContacts: "handle_get_contacts",
+    Constants.CommandCodes.GetDeviceTime: "handle_get_device_time",
+    Constants.CommandCodes.SetDeviceTime: "handle_set_device_time",
+    Constants.CommandCodes.SendSelfAdvert: "handle_send_self_advert",
+    Constants.CommandCodes.SetAdvertName: "handle_set_advert_name",
+    Constants.CommandCodes.AddUpdateContact: "handle_add_update_contact",
+    Constants.CommandCodes.SyncNextMessage: "handle_sync_next_message",
+    Constants.CommandCodes.SetRadioParams: "handle_set_radio_params",
+    Constants.CommandCodes.SetTxPower: "handle_set_tx_power",
+    Constants.CommandCodes.ResetPath: "handle_reset_path",
+    Constants.CommandCodes.SetAdvertLatLon: "handle_set_advert_lat_lon",
+    Constants.CommandCodes.RemoveContact: "handle_remove_contact",
+    Constants.CommandCodes.ShareContact: "handle_share_contact",
+    Constants.CommandCodes.ExportContact: "handle_export_contact",
+    Constants.CommandCodes.ImportContact: "handle_import_contact",
+    Constants.CommandCodes.Reboot: "handle_reboot",
+    Constants.CommandCodes.GetBatteryVoltage: "handle_get_battery_voltage",
+    Constants.CommandCodes.DeviceQuery: "handle_device_query",
+    Constants.CommandCodes.ExportPrivateKey: "handle_export_private_key",
+    Constants.CommandCodes.ImportPrivateKey: "handle_import_private_key",
+    Constants.CommandCodes.SendRawData: "handle_send_raw_data",
+    Constants.CommandCodes.SendLogin: "handle_send_login",
+    Constants.CommandCodes.SendStatusReq: "handle_send_status_req",
+    Constants.CommandCodes.SendTelemetryReq: "handle_send_telemetry_req",
+    Constants.CommandCodes.SendBinaryReq: "handle_send_binary_req",
+    Constants.CommandCodes.GetChannel: "handle_get_channel",
+    Constants.CommandCodes.SetChannel: "handle_set_channel",
+    Constants.CommandCodes.SignStart: "handle_sign_start",
+    Constants.CommandCodes.SignData: "handle_sign_data",
+    Constants.CommandCodes.SignFinish: "handle_sign_finish",
+    Constants.CommandCodes.SendTracePath: "handle_send_trace_path",
+    Constants.CommandCodes.SetOtherParams: "handle_set_other_params",
+}
+
+# replies that never change, sent as-is
+_OK_FRAME = bytes((Constants.ResponseCodes.Ok,))
+_ERR_FRAME = bytes((Constants.ResponseCodes.Err,))
+_ERR_FRAMES = tuple(bytes((Constants.ResponseCodes.Err, code)) for code in range(256))
+_NO_MORE_MESSAGES_FRAME = bytes((Constants.ResponseCodes.NoMoreMessages,))
+# reserved, maxSignDataLen
+_SIGN_START_FRAME = bytes((Constants.ResponseCodes.SignStart, 0)) + (1024).to_bytes(4, "little")
+_MSG_WAITING_FRAME = bytes((Constants.PushCodes.MsgWaiting,))
+
+
 class NodeTransport(EventEmitter):
     """
     Minimal transport interface expected by NodeListener.
     Subclass this for SX1262, TCP, etc. Must implement send(), receive(), close().
     """
 
+    # True for transports that receive raw mesh packets (a radio) rather
+    # than client command frames
+    carries_packets = False
+
     async def send(self, data: bytes):
+        """
+        data may be a memoryview into a writer that NodeListener reuses for
+        the next response; implementations must copy it before they await
+        anything, since another handler may build its response meanwhile.
+        """
         raise NotImplementedError("Transport must implement send()")
 
     async def receive(self) -> bytes:
@@ -31,11 +112,59 @@ class NodeListener(EventEmitter):
     - Builds and sends responses/pushes.
     """
 
-    def __init__(self, transport: NodeTransport):
+    def __init__(self, transport: NodeTransport, contacts: ContactStore | None = None,
+                 messages: MessageQueue | None = None, max_concurrency: int = 16, max_pending: int = 64,
+                 config: NodeConfig | None = None):
         super().__init__()
         self.transport = transport
+        # the node's own settings; pass NodeConfig(path) to persist them, memory-only otherwise
+        self.config = config if config is not None else NodeConfig()
+        # frame processing and sending go through these, so enable_metrics()
+        # can swap in instrumented versions without a check on every frame
+        self._process_frame = self.on_frame_received
+        self._send = transport.send
+        self.metrics = None
+        self._metrics_task = None
+        self.profiler = None
+        self._handlers = [None] * 256
+        for cmd, name in _COMMAND_HANDLERS.items():
+            self._handlers[cmd] = getattr(self, name)
+        # commands from different clients run concurrently, at most
+        # max_concurrency at once; each client's commands run in order
+        self._dispatch_slots = asyncio.Semaphore(max_concurrency)
+        self.max_pending = max_pending
+        self._pending = {}
+        self._dispatch_workers = {}
+        # contact table; pass ContactStore(path) to persist it, memory-only otherwise
+        self.contacts = contacts if contacts is not None else ContactStore()
+        # inbound messages waiting for SyncNextMessage, memory-only unless given a path
+        self.messages = messages if messages is not None else MessageQueue()
+        # set once MsgWaiting is pushed, cleared when the client drains the queue
+        self._msg_waiting_notified = False
+        self._msg_waiting_task = None
         self._running = False
         self._task = None
+        # one writer reused for every response/push built by this listener
+        self._writer = BufferWriter()
+        # encoded SelfInfo/DeviceInfo, dropped whenever the config changes
+        self.responses = ResponseCache()
+        self.config.on("change", self._on_config_change, sync=True)
+        # telemetry payload answered to SendTelemetryReq; patch values with
+        # self.telemetry.update([...]) as sensor readings change
+        self.telemetry = LppTemplate([(1, CayenneLpp.LPP_TEMPERATURE)])
+        self.telemetry.update([20.0])
+        # drops re-flooded copies of mesh packets before they are decoded
+        self.duplicate_filter = DuplicateFilter()
+        # mesh packets that could not be decoded
+        self.decode_errors = 0
+        # subscribers created by packets(), rebuilt on (un)subscribe
+        self._packet_streams = ()
+        # callbacks by (route type, payload type, dest hash), see PacketRouter.subscribe
+        self.router = PacketRouter(on_error=lambda e: self.emit("error", {"error": e}))
+        # transports that hear mesh traffic emit raw frames as "packet"
+        if isinstance(transport, EventEmitter):
+            transport.on("packet", self.on_packet_received, sync=True)
+        self._follow_radio_params(transport)
 
     # -------------------------
     # Lifecycle
@@ -45,6 +174,8 @@ class NodeListener(EventEmitter):
         """Begin listening for incoming frames."""
         self._running = True
         self._task = asyncio.create_task(self._rx_loop())
+        # messages persisted from a previous run
+        self.notify_msg_waiting()
         self.emit("listening")
 
     async def stop(self):
@@ -53,137 +184,433 @@ class NodeListener(EventEmitter):
         if self._task:
             self._task.cancel()
             await asyncio.gather(self._task, return_exceptions=True)
+        for key in list(self._dispatch_workers):
+            await self.end_dispatch(key)
+        if self._metrics_task:
+            self._metrics_task.cancel()
+            await asyncio.gather(self._metrics_task, return_exceptions=True)
+        if self.profiler:
+            self.profiler.uninstall()
         await self.transport.close()
+        self.config.flush()
         self.emit("stopped")
 
+    @property
+    def radio_params(self) -> dict:
+        """LoRa settings from the config; emitted as "radio_params" when they change."""
+        return self.config.radio_params
+
+    def _on_config_change(self, changed: dict):
+        self.responses.invalidate()
+        if any(field in changed for field in RADIO_FIELDS):
+            self.emit("radio_params", self.config.radio_params)
+
+    def _follow_radio_params(self, radio):
+        """Keep the TX scheduler of a radio transport, if it has one, on the current radio params."""
+        scheduler = getattr(radio, "scheduler", None)
+        if scheduler is not None:
+            scheduler.on_radio_params(self.radio_params)
+            self.on("radio_params", scheduler.on_radio_params, sync=True)
+
     async def _rx_loop(self):
-        """Background loop to receive frames and dispatch commands."""
+        """
+        Background loop to receive frames: commands are dispatched, and
+        mesh packets from a radio transport go through on_packet_received().
+        """
+        packets = self.transport.carries_packets
         while self._running:
             try:
                 frame = await self.transport.receive()
-                if frame:
-                    await self.on_frame_received(frame)
+                if not frame:
+                    continue
+                if packets:
+                    self.on_packet_received(frame)
+                    await self.wait_packet_room()
+                else:
+                    await self.dispatch(frame)
             except asyncio.CancelledError:
                 break
             except Exception as e:
                 self.emit("error", {"error": e})
-            await asyncio.sleep(0.01)
 
     # -------------------------
     # Frame dispatch
     # -------------------------
 
+    async def dispatch(self, frame_bytes: bytes, key=None):
+        """
+        Queue a command frame for handling. Frames with the same key (one
+        per client) are handled in arrival order, since responses carry no
+        request id; different keys are handled concurrently. Waits while
+        max_pending frames of this key are already queued.
+        """
+        queue = self._pending.get(key)
+        if queue is None:
+            queue = self._pending[key] = asyncio.Queue(self.max_pending)
+            self._dispatch_workers[key] = asyncio.create_task(self._dispatch_worker(queue))
+        await queue.put(bytes(frame_bytes))
+
+    async def end_dispatch(self, key=None):
+        """Stop handling frames for key, dropping any still queued."""
+        self._pending.pop(key, None)
+        task = self._dispatch_workers.pop(key, None)
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    async def _dispatch_worker(self, queue: asyncio.Queue):
+        while True:
+            frame = await queue.get()
+            async with self._dispatch_slots:
+                try:
+                    await self._process_frame(frame)
+                except Exception as e:
+                    self.emit("error", {"error": e})
+
     async def on_frame_received(self, frame_bytes: bytes):
         """Parse an incoming command frame and dispatch to the appropriate handler."""
         reader = BufferReader(frame_bytes)
         cmd = reader.read_uint8()
 
-        handlers = {
-            Constants.CommandCodes.AppStart: self.handle_app_start,
-            Constants.CommandCodes.SendTxtMsg: self.handle_send_txt_msg,
-            Constants.CommandCodes.SendChannelTxtMsg: self.handle_send_channel_txt_msg,
-            Constants.CommandCodes.GetContacts: self.handle_get_contacts,
-            Constants.CommandCodes.GetDeviceTime: self.handle_get_device_time,
-            Constants.CommandCodes.SetDeviceTime: self.handle_set_device_time,
-            Constants.CommandCodes.SendSelfAdvert: self.handle_send_self_advert,
-            Constants.CommandCodes.SetAdvertName: self.handle_set_advert_name,
-            Constants.CommandCodes.AddUpdateContact: self.handle_add_update_contact,
-            Constants.CommandCodes.SyncNextMessage: self.handle_sync_next_message,
-            Constants.CommandCodes.SetRadioParams: self.handle_set_radio_params,
-            Constants.CommandCodes.SetTxPower: self.handle_set_tx_power,
-            Constants.CommandCodes.ResetPath: self.handle_reset_path,
-            Constants.CommandCodes.SetAdvertLatLon: self.handle_set_advert_lat_lon,
-            Constants.CommandCodes.RemoveContact: self.handle_remove_contact,
-            Constants.CommandCodes.ShareContact: self.handle_share_contact,
-            Constants.CommandCodes.ExportContact: self.handle_export_contact,
-            Constants.CommandCodes.ImportContact: self.handle_import_contact,
-            Constants.CommandCodes.Reboot: self.handle_reboot,
-            Constants.CommandCodes.GetBatteryVoltage: self.handle_get_battery_voltage,
-            Constants.CommandCodes.DeviceQuery: self.handle_device_query,
-            Constants.CommandCodes.ExportPrivateKey: self.handle_export_private_key,
-            Constants.CommandCodes.ImportPrivateKey: self.handle_import_private_key,
-            Constants.CommandCodes.SendRawData: self.handle_send_raw_data,
-            Constants.CommandCodes.SendLogin: self.handle_send_login,
-            Constants.CommandCodes.SendStatusReq: self.handle_send_status_req,
-            Constants.CommandCodes.SendTelemetryReq: self.handle_send_telemetry_req,
-            Constants.CommandCodes.SendBinaryReq: self.handle_send_binary_req,
-            Constants.CommandCodes.GetChannel: self.handle_get_channel,
-            Constants.CommandCodes.SetChannel: self.handle_set_channel,
-            Constants.CommandCodes.SignStart: self.handle_sign_start,
-            Constants.CommandCodes.SignData: self.handle_sign_data,
-            Constants.CommandCodes.SignFinish: self.handle_sign_finish,
-            Constants.CommandCodes.SendTracePath: self.handle_send_trace_path,
-            Constants.CommandCodes.SetOtherParams: self.handle_set_other_params,
-        }
-
-        handler = handlers.get(cmd)
+        handler = self._handlers[cmd]
         if handler:
             await handler(reader)
         else:
             await self.send_err_response(err_code=Constants.ErrorCodes.UnsupportedCmd)
 
+    def on_packet_received(self, frame_bytes: bytes):
+        """
+        Handle a raw mesh packet: drop duplicates, queue it for each packets()
+        subscriber that wants its payload type, deliver it to matching
+        router subscriptions, then emit it as "packet". The packet is only
+        decoded if a subscription matched or something listens for "packet".
+        """
+        try:
+            if self.duplicate_filter.check_frame(frame_bytes):
+                return None
+        except IndexError as e:
+            self.decode_errors += 1
+            self.emit("error", {"error": e})
+            return None
+
+        if self._packet_streams:
+            header = frame_bytes[0]
+            frame = None
+            for stream in self._packet_streams:
+                if stream.accepts(header):
+                    if frame is None:
+                        frame = bytes(frame_bytes)
+                    stream.push(frame)
+
+        try:
+            packet = self.router.route(frame_bytes)
+            if not self.listener_count("packet"):
+                return packet
+            if packet is None:
+                packet = Packet.from_bytes(frame_bytes)
+        except IndexError as e:
+            self.decode_errors += 1
+            self.emit("error", {"error": e})
+            return None
+        self.emit("packet", packet)
+        return packet
+
+    def packets(self, maxsize: int = 256, overflow: str = "drop_oldest", payload_type=None) -> PacketStream:
+        """
+        Subscribe to received mesh packets:
+
+            async with listener.packets(payload_type=Packet.PAYLOAD_TYPE_ADVERT) as adverts:
+                async for packet in adverts:
+                    ...
+
+        payload_type is one type or an iterable of types to receive (all
+        when None). Each subscriber has its own queue of maxsize frames;
+        see PacketStream for the overflow policies.
+        """
+        if payload_type is not None:
+            payload_type = frozenset((payload_type,) if isinstance(payload_type, int) else payload_type)
+        stream = PacketStream(maxsize, overflow, payload_type, on_close=self._remove_packet_stream)
+        self._packet_streams = self._packet_streams + (stream,)
+        return stream
+
+    def _remove_packet_stream(self, stream: PacketStream):
+        self._packet_streams = tuple(s for s in self._packet_streams if s is not stream)
+
+    async def wait_packet_room(self):
+        """
+        Wait until every packets() subscriber with overflow="block" has room.
+        Receive loops await this between packets.
+        """
+        for stream in self._packet_streams:
+            await stream.wait_room()
+
+    # -------------------------
+    # Metrics
+    # -------------------------
+
+    def enable_metrics(self, registry: MetricsRegistry | None = None,
+                       snapshot_interval: float | None = None) -> MetricsRegistry:
+        """
+        Start recording metrics into registry (a new one if None) and return
+        it. Until this is called nothing is measured. With snapshot_interval
+        set, registry.snapshot() is also emitted as "metrics" that often.
+        """
+        registry = registry if registry is not None else MetricsRegistry()
+        self.metrics = registry
+
+        frames_in = registry.counter("frames_in_total", "Command frames received")
+        bytes_in = registry.counter("bytes_in_total", "Command bytes received")
+        frames_out = registry.counter("frames_out_total", "Frames sent to clients")
+        bytes_out = registry.counter("bytes_out_total", "Bytes sent to clients")
+        # command byte -> (count, latency), created on first use
+        commands = {}
+
+        def command_metrics(cmd):
+            labels = (("command", _COMMAND_NAMES.get(cmd, "unknown")),)
+            commands[cmd] = (
+                registry.counter("commands_total", "Commands handled", labels),
+                registry.histogram("command_duration_seconds", "Command handler latency", labels),
+            )
+            return commands[cmd]
+
+        process = self._process_frame
+        send = self._send
+        perf_counter = time.perf_counter
+
+        async def timed_process(frame_bytes):
+            frames_in.value += 1
+            bytes_in.value += len(frame_bytes)
+            cmd = frame_bytes[0] if frame_bytes else 0
+            count, latency = commands.get(cmd) or command_metrics(cmd)
+            start = perf_counter()
+            try:
+                await process(frame_bytes)
+            finally:
+                count.value += 1
+                latency.observe(perf_counter() - start)
+
+        async def counted_send(data):
+            frames_out.value += 1
+            bytes_out.value += len(data)
+            await send(data)
+
+        self._process_frame = timed_process
+        self._send = counted_send
+
+        registry.collect("dispatch_queue_depth",
+                         lambda: sum(queue.qsize() for queue in self._pending.values()),
+                         "Command frames waiting for a handler")
+        registry.collect("messages_waiting", lambda: len(self.messages), "Messages waiting for SyncNextMessage")
+        registry.collect("messages_dropped_total", lambda: self.messages.dropped,
+                         "Messages dropped from a full queue", "counter")
+        registry.collect("contacts", lambda: len(self.contacts), "Stored contacts")
+        registry.collect("packets_duplicate_total", lambda: self.duplicate_filter.duplicates,
+                         "Re-flooded packets dropped", "counter")
+        registry.collect("packets_unique_total", lambda: self.duplicate_filter.unique,
+                         "Packets heard for the first time", "counter")
+        registry.collect("packet_decode_errors_total", lambda: self.decode_errors,
+                         "Packets that failed to decode", "counter")
+        registry.collect("packet_stream_dropped_total",
+                         lambda: sum(stream.dropped for stream in self._packet_streams),
+                         "Packets dropped by packets() subscribers", "counter")
+        registry.collect("response_cache_hits_total", lambda: self.responses.hits,
+                         "Replies sent from the response cache", "counter")
+        registry.collect("packets_routed_total", lambda: self.router.routed,
+                         "Packets delivered to router subscriptions", "counter")
+
+        verifier = AdvertVerifier.shared()
+        registry.collect("adverts_verified_total", lambda: verifier.verified, "Advert signatures checked", "counter")
+        registry.collect("advert_verify_seconds_total", lambda: verifier.verify_seconds,
+                         "Time spent verifying advert batches", "counter")
+        registry.collect("advert_verify_cache_hits_total", lambda: verifier.cache_hits,
+                         "Advert verifications answered from cache", "counter")
+
+        clients = getattr(self.transport, "clients", None)
+        if clients is not None:
+            registry.collect("clients", lambda: len(clients), "Connected clients")
+            registry.collect("client_queue_depth", lambda: sum(client.queue.qsize() for client in clients),
+                             "Frames waiting in client write queues")
+        # the radio's TX scheduler; one set of tx_* collectors, for the first radio that has one
+        for radio in (self.transport, getattr(self, "radio", None)):
+            scheduler = getattr(radio, "scheduler", None)
+            if scheduler is not None:
+                self._collect_scheduler_metrics(registry, scheduler)
+                break
+
+        if snapshot_interval:
+            self._metrics_task = asyncio.ensure_future(registry.emit_snapshots(self, snapshot_interval))
+        return registry
+
+    @staticmethod
+    def _collect_scheduler_metrics(registry: MetricsRegistry, scheduler):
+        registry.collect("tx_queue_depth", lambda: {
+            (("priority", name),): depth
+            for name, depth in zip(("ack", "direct", "flood", "advert"), scheduler.queue_depth())
+        }, "Packets waiting to be transmitted")
+        registry.collect("tx_packets_total", lambda: scheduler.sent, "Packets transmitted", "counter")
+        registry.collect("tx_dropped_total", lambda: scheduler.dropped,
+                         "Packets dropped from a full TX queue", "counter")
+        registry.collect("tx_airtime_seconds_total", lambda: scheduler.airtime_total,
+                         "Time on air", "counter")
+        registry.collect("tx_airtime_window_seconds", scheduler.airtime_in_window,
+                         "Time on air within the duty-cycle window")
+
+    # -------------------------
+    # Profiling
+    # -------------------------
+
+    def enable_profiling(self, profiler: Profiler | None = None, slow_frame_ms: float | None = None,
+                         slow_frame_log=None) -> Profiler:
+        """
+        Time frame processing, each handler and each send through profiler
+        (a new one if None), install its Packet/Advert hooks, and return it.
+        Until this is called nothing is timed.
+
+        A frame whose processing takes slow_frame_ms or longer is emitted as
+        "slow_frame" with its raw bytes and the phases it went through, and
+        written to slow_frame_log if given; pass a CaptureWriter so the slow
+        frames can be fed back in through a ReplayTransport.
+
+        Calling it again returns the profiler already in use, unchanged.
+        """
+        if self.profiler is not None:
+            return self.profiler
+        profiler = profiler if profiler is not None else Profiler()
+        self.profiler = profiler
+        profiler.install()
+        perf_counter_ns = time.perf_counter_ns
+        record = profiler.record
+
+        def timed_handler(name, handler):
+            async def timed(reader):
+                start = perf_counter_ns()
+                try:
+                    await handler(reader)
+                finally:
+                    record("handler", name, perf_counter_ns() - start)
+            return timed
+
+        for cmd, name in _COMMAND_HANDLERS.items():
+            self._handlers[cmd] = timed_handler(name, self._handlers[cmd])
+
+        process = self._process_frame
+        send = self._send
+        slow_ns = None if slow_frame_ms is None else int(slow_frame_ms * 1_000_000)
+
+        async def timed_process(frame_bytes):
+            name = _COMMAND_NAMES.get(frame_bytes[0], "unknown") if frame_bytes else "unknown"
+            token, phases = Profiler.begin_frame()
+            start = perf_counter_ns()
+            try:
+                await process(frame_bytes)
+            finally:
+                elapsed = perf_counter_ns() - start
+                Profiler.end_frame(token)
+                record("frame", name, elapsed)
+                if slow_ns is not None and elapsed >= slow_ns:
+                    if slow_frame_log is not None:
+                        slow_frame_log.write(frame_bytes)
+                    self.emit("slow_frame", {"frame": frame_bytes, "elapsed_ns": elapsed, "phases": phases})
+
+        async def timed_send(data):
+            # data may be the pooled writer, rewritten by another handler
+            # while send() waits; name the response before awaiting
+            name = _RESPONSE_NAMES.get(data[0], "unknown") if data else ""
+            start = perf_counter_ns()
+            try:
+                await send(data)
+            finally:
+                record("send", name, perf_counter_ns() - start)
+
+        self._process_frame = timed_process
+        self._send = timed_send
+        return profiler
+
 # section 2
 
     # -------------------------
     # Response builders
     # -------------------------
 
+    def _response_writer(self) -> BufferWriter:
+        """Reset and return the pooled writer for the next outgoing frame."""
+        self._writer.reset()
+        return self._writer
+
     async def send_ok_response(self):
         """Send a generic OK response."""
-        writer = BufferWriter()
-        writer.write_uint8(Constants.ResponseCodes.Ok)
-        await self.transport.send(writer.to_bytes())
+        await self._send(_OK_FRAME)
 
     async def send_err_response(self, err_code=None):
         """Send an error response with optional error code."""
-        writer = BufferWriter()
-        writer.write_uint8(Constants.ResponseCodes.Err)
-        if err_code is not None:
-            writer.write_uint8(err_code)
-        await self.transport.send(writer.to_bytes())
+        await self._send(_ERR_FRAME if err_code is None else _ERR_FRAMES[err_code])
 
     async def send_self_info_response(self, **kwargs):
-        """Send SelfInfo response with node parameters."""
-        writer = BufferWriter()
+        """
+        Send SelfInfo response with node parameters. The encoded frame is
+        cached until the node configuration changes.
+        """
+        key = ("self_info",) + tuple(kwargs.items())
+        frame = self.responses.get(key)
+        if frame is not None:
+            await self._send(frame)
+            return
+        # fields not overridden by kwargs come from the config
+        config = self.config
+        writer = self._response_writer()
         writer.write_uint8(Constants.ResponseCodes.SelfInfo)
-        writer.write_uint8(kwargs.get("type_", 1))
-        writer.write_uint8(kwargs.get("tx_power", 10))
-        writer.write_uint8(kwargs.get("max_tx_power", 20))
-        writer.write_bytes(kwargs.get("public_key", b"\x00" * 32))
-        writer.write_int32_le(kwargs.get("adv_lat", 0))
-        writer.write_int32_le(kwargs.get("adv_lon", 0))
+        writer.write_uint8(kwargs.get("type_", config.type_))
+        writer.write_uint8(kwargs.get("tx_power", config.tx_power))
+        writer.write_uint8(kwargs.get("max_tx_power", config.max_tx_power))
+        writer.write_bytes(kwargs.get("public_key", config.public_key))
+        writer.write_int32_le(kwargs.get("adv_lat", config.adv_lat))
+        writer.write_int32_le(kwargs.get("adv_lon", config.adv_lon))
         writer.write_bytes(b"\x00" * 3)   # reserved
-        writer.write_uint8(kwargs.get("manual_add_contacts", 0))
-        writer.write_uint32_le(kwargs.get("radio_freq", 915_000_000))
-        writer.write_uint32_le(kwargs.get("radio_bw", 125_000))
-        writer.write_uint8(kwargs.get("radio_sf", 7))
-        writer.write_uint8(kwargs.get("radio_cr", 1))
-        writer.write_string(kwargs.get("name", "SX1262Node"))
-        await self.transport.send(writer.to_bytes())
+        writer.write_uint8(kwargs.get("manual_add_contacts", config.manual_add_contacts))
+        writer.write_uint32_le(kwargs.get("radio_freq", config.radio_freq))
+        writer.write_uint32_le(kwargs.get("radio_bw", config.radio_bw))
+        writer.write_uint8(kwargs.get("radio_sf", config.radio_sf))
+        writer.write_uint8(kwargs.get("radio_cr", config.radio_cr))
+        writer.write_string(kwargs.get("name", config.name))
+        await self._send(self.responses.put(key, writer.getbuffer()))
 
     async def send_battery_voltage_response(self, millivolts=3700):
         """Send battery voltage response in millivolts."""
-        writer = BufferWriter()
+        writer = self._response_writer()
         writer.write_uint8(Constants.ResponseCodes.BatteryVoltage)
         writer.write_uint16_le(millivolts)
-        await self.transport.send(writer.to_bytes())
+        await self._send(writer.getbuffer())
 
     async def send_device_info_response(self, firmware_ver=1, build_date="2025-11-28", manufacturer_model="SX1262Node"):
-        """Send device info response with firmware and model details."""
-        writer = BufferWriter()
+        """Send device info response with firmware and model details (cached like SelfInfo)."""
+        key = ("device_info", firmware_ver, build_date, manufacturer_model)
+        frame = self.responses.get(key)
+        if frame is not None:
+            await self._send(frame)
+            return
+        writer = self._response_writer()
         writer.write_uint8(Constants.ResponseCodes.DeviceInfo)
         writer.write_int8(firmware_ver)
         writer.write_bytes(b"\x00" * 6)  # reserved
         writer.write_cstring(build_date, 12)
         writer.write_string(manufacturer_model)
-        await self.transport.send(writer.to_bytes())
+        await self._send(self.responses.put(key, writer.getbuffer()))
+
+    async def send_sent_response(self, flood=False, expected_ack=0, est_timeout_ms=0):
+        """Send Sent response for an outgoing message."""
+        writer = self._response_writer()
+        writer.write_uint8(Constants.ResponseCodes.Sent)
+        writer.write_uint8(1 if flood else 0)
+        writer.write_uint32_le(expected_ack)
+        writer.write_uint32_le(est_timeout_ms)
+        await self._send(writer.getbuffer())
 
     async def send_curr_time_response(self, epoch_secs):
         """Send current time response as epoch seconds."""
-        writer = BufferWriter()
+        writer = self._response_writer()
         writer.write_uint8(Constants.ResponseCodes.CurrTime)
         writer.write_uint32_le(epoch_secs)
-        await self.transport.send(writer.to_bytes())
+        await self._send(writer.getbuffer())
 
 # section 3
 
@@ -196,46 +623,61 @@ class NodeListener(EventEmitter):
         app_ver = reader.read_uint8()
         _reserved = reader.read_bytes(6)
         app_name = reader.read_string()
-        await self.send_self_info_response(name=f"{app_name}-SX1262")
+        await self.send_self_info_response()
 
     async def handle_send_txt_msg(self, reader: BufferReader):
-        """Handle SendTxtMsg command: echo back as ContactMsgRecv."""
+        """Handle SendTxtMsg command: reply Sent and queue the echo as a ContactMsgRecv."""
         txt_type = reader.read_uint8()
         attempt = reader.read_uint8()
         sender_timestamp = reader.read_uint32_le()
         pubkey_prefix = reader.read_bytes(6)
         text = reader.read_string()
 
-        writer = BufferWriter()
+        writer = self._response_writer()
         writer.write_uint8(Constants.ResponseCodes.ContactMsgRecv)
         writer.write_bytes(pubkey_prefix)
         writer.write_uint8(0)  # pathLen
         writer.write_uint8(txt_type)
         writer.write_uint32_le(sender_timestamp)
         writer.write_string(text)
-        await self.transport.send(writer.to_bytes())
+        self.queue_message(writer.getbuffer())
+        await self.send_sent_response()
 
     async def handle_send_channel_txt_msg(self, reader: BufferReader):
-        """Handle SendChannelTxtMsg command: echo back as ChannelMsgRecv."""
+        """Handle SendChannelTxtMsg command: reply Sent and queue the echo as a ChannelMsgRecv."""
         txt_type = reader.read_uint8()
         channel_idx = reader.read_uint8()
         sender_timestamp = reader.read_uint32_le()
         text = reader.read_string()
 
-        writer = BufferWriter()
+        writer = self._response_writer()
         writer.write_uint8(Constants.ResponseCodes.ChannelMsgRecv)
         writer.write_uint8(channel_idx)
         writer.write_uint8(0)  # pathLen
         writer.write_uint8(txt_type)
         writer.write_uint32_le(sender_timestamp)
         writer.write_string(text)
-        await self.transport.send(writer.to_bytes())
+        self.queue_message(writer.getbuffer())
+        await self.send_sent_response()
 
     async def handle_get_contacts(self, reader: BufferReader):
-        """Handle GetContacts command: respond with EndOfContacts (no contacts)."""
-        writer = BufferWriter()
+        """Handle GetContacts command: stream ContactsStart, each stored Contact, then EndOfContacts."""
+        since = reader.read_uint32_le() if reader.get_remaining_bytes_count() >= 4 else 0
+        records = self.contacts.records(since)
+
+        writer = self._response_writer()
+        writer.write_uint8(Constants.ResponseCodes.ContactsStart)
+        writer.write_uint32_le(len(records))
+        await self._send(writer.getbuffer())
+
+        # stored records already are Contact frames
+        for record in records:
+            await self._send(record)
+
+        writer = self._response_writer()
         writer.write_uint8(Constants.ResponseCodes.EndOfContacts)
-        await self.transport.send(writer.to_bytes())
+        writer.write_uint32_le(self.contacts.most_recent_lastmod())
+        await self._send(writer.getbuffer())
 
 # setion 4
 
@@ -245,11 +687,12 @@ class NodeListener(EventEmitter):
 
     async def handle_get_device_time(self, reader: BufferReader):
         """Handle GetDeviceTime command: respond with current epoch time."""
-        await self.send_curr_time_response(int(time.time()))
+        await self.send_curr_time_response(int(time.time()) + self.config.clock_offset)
 
     async def handle_set_device_time(self, reader: BufferReader):
-        """Handle SetDeviceTime command: acknowledge with OK."""
-        _epoch = reader.read_uint32_le()
+        """Handle SetDeviceTime command: keep the offset from the system clock and acknowledge with OK."""
+        epoch = reader.read_uint32_le()
+        self.config.update(clock_offset=epoch - int(time.time()))
         await self.send_ok_response()
 
     async def handle_send_self_advert(self, reader: BufferReader):
@@ -258,69 +701,92 @@ class NodeListener(EventEmitter):
         await self.send_ok_response()
 
     async def handle_set_advert_name(self, reader: BufferReader):
-        """Handle SetAdvertName command: acknowledge with OK."""
-        _name = reader.read_string()
-        await self.send_ok_response()
+        """Handle SetAdvertName command: store the name and acknowledge with OK."""
+        await self._update_config(name=reader.read_string())
 
     async def handle_add_update_contact(self, reader: BufferReader):
-        """Handle AddUpdateContact command: acknowledge with OK."""
-        _public_key = reader.read_bytes(32)
-        _type = reader.read_uint8()
-        _flags = reader.read_uint8()
-        _out_path_len = reader.read_uint8()
-        _out_path = reader.read_bytes(64)
-        _adv_name = reader.read_cstring(32)
-        _last_advert = reader.read_uint32_le()
-        _adv_lat = reader.read_uint32_le()
-        _adv_lon = reader.read_uint32_le()
+        """Handle AddUpdateContact command: store the contact and acknowledge with OK."""
+        # public key (32), type, flags, out path len, out path (64), adv name (32),
+        # last advert, adv lat, adv lon; stored as-is, lat/lon may be omitted
+        if reader.get_remaining_bytes_count() < ContactStore.BODY_SIZE - 8:
+            await self.send_err_response(err_code=Constants.ErrorCodes.IllegalArg)
+            return
+        body = reader.read_bytes(min(reader.get_remaining_bytes_count(), ContactStore.BODY_SIZE))
+        self.contacts.add_update(body)
         await self.send_ok_response()
 
     async def handle_sync_next_message(self, reader: BufferReader):
-        """Handle SyncNextMessage command: respond with EndOfContacts (no messages)."""
-        writer = BufferWriter()
-        writer.write_uint8(Constants.ResponseCodes.NoMoreMessages)
-        await self.transport.send(writer.to_bytes())
+        """Handle SyncNextMessage command: send the oldest queued message, or NoMoreMessages."""
+        frame = self.messages.pop()
+        if frame is not None:
+            await self._send(frame)
+            return
+        # drained: the next queued message gets a fresh MsgWaiting push
+        self._msg_waiting_notified = False
+        await self._send(_NO_MORE_MESSAGES_FRAME)
 
     async def handle_set_radio_params(self, reader: BufferReader):
-        """Handle SetRadioParams command: acknowledge with OK."""
-        _freq = reader.read_uint32_le()
-        _bw = reader.read_uint32_le()
-        _sf = reader.read_uint8()
-        _cr = reader.read_uint8()
-        await self.send_ok_response()
+        """Handle SetRadioParams command: apply the LoRa settings and acknowledge with OK."""
+        await self._update_config(
+            radio_freq=reader.read_uint32_le(),
+            radio_bw=reader.read_uint32_le(),
+            radio_sf=reader.read_uint8(),
+            radio_cr=reader.read_uint8(),
+        )
 
     async def handle_set_tx_power(self, reader: BufferReader):
-        """Handle SetTxPower command: acknowledge with OK."""
-        _tx_power = reader.read_uint8()
-        await self.send_ok_response()
+        """Handle SetTxPower command: store the power and acknowledge with OK."""
+        tx_power = reader.read_uint8()
+        if tx_power > self.config.max_tx_power:
+            await self.send_err_response(err_code=Constants.ErrorCodes.IllegalArg)
+            return
+        await self._update_config(tx_power=tx_power)
 
     async def handle_reset_path(self, reader: BufferReader):
-        """Handle ResetPath command: acknowledge with OK."""
-        _pubkey = reader.read_bytes(32)
-        await self.send_ok_response()
+        """Handle ResetPath command: clear the contact's out path and acknowledge with OK."""
+        pubkey = reader.read_bytes(32)
+        if self.contacts.reset_path(pubkey):
+            await self.send_ok_response()
+        else:
+            await self.send_err_response(err_code=Constants.ErrorCodes.NotFound)
 
     async def handle_set_advert_lat_lon(self, reader: BufferReader):
-        """Handle SetAdvertLatLon command: acknowledge with OK."""
-        _lat = reader.read_int32_le()
-        _lon = reader.read_int32_le()
-        await self.send_ok_response()
+        """Handle SetAdvertLatLon command: store the position and acknowledge with OK."""
+        await self._update_config(adv_lat=reader.read_int32_le(), adv_lon=reader.read_int32_le())
 
     async def handle_remove_contact(self, reader: BufferReader):
-        """Handle RemoveContact command: acknowledge with OK."""
-        _pubkey = reader.read_bytes(32)
-        await self.send_ok_response()
+        """Handle RemoveContact command: delete the contact and acknowledge with OK."""
+        pubkey = reader.read_bytes(32)
+        if self.contacts.remove(pubkey):
+            await self.send_ok_response()
+        else:
+            await self.send_err_response(err_code=Constants.ErrorCodes.NotFound)
 
     async def handle_share_contact(self, reader: BufferReader):
-        """Handle ShareContact command: acknowledge with OK."""
-        _pubkey = reader.read_bytes(32)
-        await self.send_ok_response()
+        """Handle ShareContact command: acknowledge with OK if the contact is known."""
+        pubkey = reader.read_bytes(32)
+        if pubkey in self.contacts:
+            await self.send_ok_response()
+        else:
+            await self.send_err_response(err_code=Constants.ErrorCodes.NotFound)
 
     async def handle_export_contact(self, reader: BufferReader):
-        """Handle ExportContact command: respond with empty ExportContact."""
-        writer = BufferWriter()
+        """
+        Handle ExportContact command: respond with ExportContact carrying the
+        stored contact, in the AddUpdateContact body layout, or NotFound.
+        Without a key (export self) the payload is empty, since this node
+        has no signed advert of its own to export.
+        """
+        writer = self._response_writer()
         writer.write_uint8(Constants.ResponseCodes.ExportContact)
-        writer.write_bytes(b"")
-        await self.transport.send(writer.to_bytes())
+        if reader.get_remaining_bytes_count() >= 32:
+            record = self.contacts.get_record(reader.read_bytes(32))
+            if record is None:
+                await self.send_err_response(err_code=Constants.ErrorCodes.NotFound)
+                return
+            # drop the stored record's Contact code byte and trailing lastmod
+            writer.write_bytes(record[1:1 + ContactStore.BODY_SIZE])
+        await self._send(writer.getbuffer())
 
     async def handle_import_contact(self, reader: BufferReader):
         """Handle ImportContact command: acknowledge with OK."""
@@ -343,10 +809,10 @@ class NodeListener(EventEmitter):
 
     async def handle_export_private_key(self, reader: BufferReader):
         """Handle ExportPrivateKey command: respond with dummy private key."""
-        writer = BufferWriter()
+        writer = self._response_writer()
         writer.write_uint8(Constants.ResponseCodes.PrivateKey)
         writer.write_bytes(b"\x00" * 64)
-        await self.transport.send(writer.to_bytes())
+        await self._send(writer.getbuffer())
 
     async def handle_import_private_key(self, reader: BufferReader):
         """Handle ImportPrivateKey command: acknowledge with OK."""
@@ -359,34 +825,34 @@ class NodeListener(EventEmitter):
         path = reader.read_bytes(path_len)
         raw = reader.read_remaining_bytes()
 
-        writer = BufferWriter()
+        writer = self._response_writer()
         writer.write_uint8(Constants.PushCodes.LogRxData)
         writer.write_int8(0)   # lastSnr/4
         writer.write_int8(-90) # lastRssi
         writer.write_bytes(raw)
-        await self.transport.send(writer.to_bytes())
+        await self._send(writer.getbuffer())
 
     async def handle_send_login(self, reader: BufferReader):
         """Handle SendLogin command: respond with LoginSuccess push."""
         _public_key = reader.read_bytes(32)
         _password = reader.read_string()
 
-        writer = BufferWriter()
+        writer = self._response_writer()
         writer.write_uint8(Constants.PushCodes.LoginSuccess)
         writer.write_uint8(0)  # reserved
         writer.write_bytes(b"\x00" * 6)  # pubKeyPrefix
-        await self.transport.send(writer.to_bytes())
+        await self._send(writer.getbuffer())
 
     async def handle_send_status_req(self, reader: BufferReader):
         """Handle SendStatusReq command: respond with StatusResponse push."""
         public_key = reader.read_bytes(32)
 
-        writer = BufferWriter()
+        writer = self._response_writer()
         writer.write_uint8(Constants.PushCodes.StatusResponse)
         writer.write_uint8(0)  # reserved
         writer.write_bytes(public_key[:6])
         writer.write_bytes(b"OK")
-        await self.transport.send(writer.to_bytes())
+        await self._send(writer.getbuffer())
 
     async def handle_send_telemetry_req(self, reader: BufferReader):
         """Handle SendTelemetryReq command: respond with TelemetryResponse push."""
@@ -395,35 +861,35 @@ class NodeListener(EventEmitter):
         _r2 = reader.read_uint8()
         public_key = reader.read_bytes(32)
 
-        writer = BufferWriter()
+        writer = self._response_writer()
         writer.write_uint8(Constants.PushCodes.TelemetryResponse)
         writer.write_uint8(0)  # reserved
         writer.write_bytes(public_key[:6])
-        writer.write_bytes(b"\x01\x67\x00\xC8")  # Example CayenneLPP temp 20.0C
-        await self.transport.send(writer.to_bytes())
+        self.telemetry.write_to(writer)
+        await self._send(writer.getbuffer())
 
     async def handle_send_binary_req(self, reader: BufferReader):
         """Handle SendBinaryReq command: respond with BinaryResponse push."""
         public_key = reader.read_bytes(32)
         request = reader.read_remaining_bytes()
 
-        writer = BufferWriter()
+        writer = self._response_writer()
         writer.write_uint8(Constants.PushCodes.BinaryResponse)
         writer.write_uint8(0)        # reserved
         writer.write_uint32_le(42)   # tag
         writer.write_bytes(request)  # echo
-        await self.transport.send(writer.to_bytes())
+        await self._send(writer.getbuffer())
 
     async def handle_get_channel(self, reader: BufferReader):
         """Handle GetChannel command: respond with ChannelInfo."""
         channel_idx = reader.read_uint8()
 
-        writer = BufferWriter()
+        writer = self._response_writer()
         writer.write_uint8(Constants.ResponseCodes.ChannelInfo)
         writer.write_uint8(channel_idx)
         writer.write_string(f"Channel{channel_idx}")
         writer.write_bytes(b"\x00" * 16)  # secret placeholder
-        await self.transport.send(writer.to_bytes())
+        await self._send(writer.getbuffer())
 
     async def handle_set_channel(self, reader: BufferReader):
         """Handle SetChannel command: acknowledge with OK."""
@@ -434,20 +900,16 @@ class NodeListener(EventEmitter):
 
     async def handle_sign_start(self, reader: BufferReader):
         """Handle SignStart command: respond with SignStart response."""
-        writer = BufferWriter()
-        writer.write_uint8(Constants.ResponseCodes.SignStart)
-        writer.write_uint8(0)          # reserved
-        writer.write_uint32_le(1024)   # maxSignDataLen
-        await self.transport.send(writer.to_bytes())
+        await self._send(_SIGN_START_FRAME)
 
     async def handle_sign_data(self, reader: BufferReader):
         """Handle SignData command: respond with dummy Signature."""
         _data_to_sign = reader.read_remaining_bytes()
 
-        writer = BufferWriter()
+        writer = self._response_writer()
         writer.write_uint8(Constants.ResponseCodes.Signature)
         writer.write_bytes(b"\x00" * 64)
-        await self.transport.send(writer.to_bytes())
+        await self._send(writer.getbuffer())
 
     async def handle_sign_finish(self, reader: BufferReader):
         """Handle SignFinish command: acknowledge with OK."""
@@ -461,3 +923,47 @@ class NodeListener(EventEmitter):
         path = reader.read_remaining_bytes()
         # For now we just acknowledge; later you could log or process the path
         await self.send_ok_response()
+
+    async def handle_set_other_params(self, reader: BufferReader):
+        """Handle SetOtherParams command: store manual_add_contacts and acknowledge with OK."""
+        await self._update_config(manual_add_contacts=reader.read_uint8())
+
+    async def _update_config(self, **changes):
+        """Apply a setter's values to the config: OK, or IllegalArg if one does not fit."""
+        try:
+            self.config.update(**changes)
+        except ValueError:
+            await self.send_err_response(err_code=Constants.ErrorCodes.IllegalArg)
+            return
+        await self.send_ok_response()
+
+# section 5
+
+    # -------------------------
+    # Push events (server-initiated)
+    # -------------------------
+
+    def queue_message(self, frame: bytes):
+        """
+        Queue a ContactMsgRecv/ChannelMsgRecv frame for SyncNextMessage.
+        Only the first message queued since the client last drained the
+        queue triggers a MsgWaiting push, so a burst produces one push.
+        """
+        self.messages.push(frame)
+        self.notify_msg_waiting()
+
+    def notify_msg_waiting(self):
+        """
+        Push MsgWaiting if messages are waiting and no push is outstanding
+        since the client last drained the queue.
+        """
+        if self._msg_waiting_notified or not len(self.messages):
+            return
+        self._msg_waiting_notified = True
+        # start the push in an empty context: created from a handler, it
+        # would inherit that request's client and reach no one else
+        self._msg_waiting_task = contextvars.Context().run(asyncio.ensure_future, self.push_msg_waiting())
+
+    async def push_msg_waiting(self):
+        """Push a MsgWaiting event to notify client of pending messages."""
+        await self._send(_MSG_WAITING_FRAME)
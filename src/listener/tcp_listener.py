@@ -1,34 +1,243 @@
 # meshcore_node_py/tcp_node_listener.py
 import asyncio
-from meshcore_node_py.node_listener import NodeListener
+import contextvars
+
+from meshcore.constants import Constants
+from meshcore.frame_parser import FrameParser
+from .node_listener import NodeListener, NodeTransport
+
+# client whose request is being handled in the current task, if any
+_current_client = contextvars.ContextVar("current_client", default=None)
+
+
+class TCPClient:
+    """
+    One connected client: a bounded queue of outgoing frames drained by its
+    own writer task, so a slow socket never blocks the others.
+
+    A client that stops reading is lost: when a socket drain takes longer
+    than send_timeout, or the connection fails, on_lost(client) is called
+    and the client is marked closed.
+    """
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, max_queue: int,
+                 send_timeout: float = 5.0, on_lost=None):
+        self.reader = reader
+        self.writer = writer
+        self.peer = writer.get_extra_info("peername")
+        self.parser = FrameParser()
+        self.queue = asyncio.Queue(max_queue)
+        self.send_timeout = send_timeout
+        self.on_lost = on_lost
+        self.closed = False
+        # set once the transport has dropped the client
+        self.dropped = False
+        # task reading this client's requests, set by the listener
+        self.handler_task = None
+        self._task = asyncio.create_task(self._write_loop())
+
+    async def send(self, frame: bytes) -> bool:
+        """
+        Queue a response frame, waiting up to send_timeout for room
+        (backpressure on the requester). False if the client is closed or
+        its queue stayed full.
+        """
+        if self.closed:
+            return False
+        try:
+            self.queue.put_nowait(frame)
+            return True
+        except asyncio.QueueFull:
+            pass
+        try:
+            await asyncio.wait_for(self.queue.put(frame), self.send_timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def offer(self, frame: bytes) -> bool:
+        """Queue a pushed frame without waiting; False if the queue is full."""
+        try:
+            self.queue.put_nowait(frame)
+            return True
+        except asyncio.QueueFull:
+            return False
+
+    async def _write_loop(self):
+        try:
+            while True:
+                frame = await self.queue.get()
+                self.writer.write(frame)
+                # hand everything already queued to the socket before draining once
+                while not self.queue.empty():
+                    self.writer.write(self.queue.get_nowait())
+                if self.writer.transport.get_write_buffer_size():
+                    await asyncio.wait_for(self.writer.drain(), self.send_timeout)
+                else:
+                    await self.writer.drain()
+        except (ConnectionError, OSError, asyncio.TimeoutError):
+            if not self.closed and self.on_lost is not None:
+                self.on_lost(self)
+            self.closed = True
+
+    async def close(self):
+        self.closed = True
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except (ConnectionError, OSError):
+            pass
+
+
+class TCPClientsTransport(NodeTransport):
+    """
+    NodeTransport over the connected TCP clients. Frames sent while handling
+    a client's request go back to that client; anything else is fanned out
+    to every client.
+
+    A client is dropped, and "client_lost" emitted with it, when its queue
+    overflows on fan-out, when a response waits more than send_timeout for
+    room in its queue, or when its socket stalls or fails.
+    """
+
+    def __init__(self, max_queue: int = 256, send_timeout: float = 5.0):
+        super().__init__()
+        self.max_queue = max_queue
+        self.send_timeout = send_timeout
+        self.clients = []
+
+    def add_client(self, reader, writer) -> TCPClient:
+        client = TCPClient(reader, writer, self.max_queue, self.send_timeout, on_lost=self.drop_client)
+        self.clients.append(client)
+        return client
+
+    def drop_client(self, client: TCPClient):
+        """Disconnect a client that is not keeping up."""
+        if client in self.clients:
+            self.clients.remove(client)
+        client.closed = True
+        client.dropped = True
+        asyncio.ensure_future(client.close())
+        self.emit("client_lost", client)
+
+    async def remove_client(self, client: TCPClient):
+        if client in self.clients:
+            self.clients.remove(client)
+            await client.close()
+
+    async def send(self, data: bytes):
+        frame = FrameParser.encode(data)
+        client = _current_client.get()
+        if client is not None:
+            if not await client.send(frame):
+                if not client.closed:
+                    self.drop_client(client)
+                raise ConnectionError(f"client {client.peer} is not reading")
+        else:
+            self.broadcast(frame)
+
+    def broadcast(self, frame: bytes):
+        """Offer an already framed buffer to every client at once."""
+        for client in list(self.clients):
+            if not client.offer(frame):
+                self.drop_client(client)
+
+    async def close(self):
+        for client in list(self.clients):
+            await self.remove_client(client)
+
 
 class TCPNodeListener(NodeListener):
-    def __init__(self, host="0.0.0.0", port=9000, transport=None):
-        super().__init__(transport)
+    """
+    NodeListener serving any number of TCP clients with '<'/'>' framing.
+    radio, if given, is a NodeTransport whose received frames are handled
+    as mesh packets.
+    """
+
+    def __init__(self, host="0.0.0.0", port=9000, transport=None, max_queue=256, config=None,
+                 send_timeout=5.0):
+        super().__init__(TCPClientsTransport(max_queue, send_timeout), config=config)
+        self.transport.on("client_lost", self._on_client_lost, sync=True)
+        self.radio = transport
+        self._follow_radio_params(transport)
         self.host = host
         self.port = port
         self.server = None
-        self.clients = []
+        self._radio_task = None
+
+    @property
+    def clients(self):
+        return self.transport.clients
 
     async def start(self):
         self.server = await asyncio.start_server(self._handle_client, self.host, self.port)
         print(f"TCPNodeListener listening on {self.host}:{self.port}")
-        await super().start()  # start the radio listener loop too
+        self._running = True
+        if self.radio is not None:
+            self._radio_task = asyncio.create_task(self._radio_loop())
+        self.emit("listening")
+
+    async def stop(self):
+        """Stop accepting clients and the radio, then run NodeListener's teardown."""
+        self._running = False
+        if self.server:
+            self.server.close()
+        if self._radio_task:
+            self._radio_task.cancel()
+            await asyncio.gather(self._radio_task, return_exceptions=True)
+            await self.radio.close()
+        # ends dispatch, closes the clients, flushes the config
+        await super().stop()
+        if self.server:
+            await self.server.wait_closed()
+
+    async def _radio_loop(self):
+        while self._running:
+            try:
+                frame = await self.radio.receive()
+                if frame:
+                    self.on_packet_received(frame)
+                    await self.wait_packet_room()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                self.emit("error", {"error": e})
+
+    def _on_client_lost(self, client):
+        # stop reading the dropped client's requests; _handle_client then
+        # ends its dispatch, freeing any slot its commands were holding
+        if client.handler_task is not None and client.handler_task is not asyncio.current_task():
+            client.handler_task.cancel()
 
     async def _handle_client(self, reader, writer):
-        self.clients.append((reader, writer))
+        client = self.transport.add_client(reader, writer)
+        client.handler_task = asyncio.current_task()
+        # responses from this task's handlers go back to this client
+        _current_client.set(client)
         print("Client connected")
-        while True:
-            data = await reader.read(1024)
-            if not data:
-                break
-            # Feed client data into NodeListener
-            await self.on_frame_received(data)
-        writer.close()
-        await writer.wait_closed()
-        self.clients.remove((reader, writer))
+        if len(self.messages):
+            # one push for everything queued while no client was reading
+            self._msg_waiting_notified = True
+            client.offer(FrameParser.encode(bytes((Constants.PushCodes.MsgWaiting,))))
+        try:
+            while True:
+                data = await reader.read(4096)
+                if not data:
+                    break
+                for frame in client.parser.feed(data):
+                    await self.dispatch(frame, key=client)
+        except ConnectionError:
+            pass
+        except asyncio.CancelledError:
+            # _on_client_lost cancels a dropped client's reader; any other
+            # cancellation (server or loop shutdown) is passed on
+            if not client.dropped:
+                raise
+        finally:
+            await self.end_dispatch(client)
+            await self.transport.remove_client(client)
 
     async def send_to_clients(self, data: bytes):
-        for _, writer in self.clients:
-            writer.write(data)
-            await writer.drain()
+        self.transport.broadcast(FrameParser.encode(data))
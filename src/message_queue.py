@@ -0,0 +1,143 @@
+import os
+import struct
+from collections import deque
+
+_FILE_HEADER = struct.Struct("<4sQ")
+_LENGTH = struct.Struct("<H")
+
+_MAGIC = b"MCMQ"
+
+
+class MessageQueue:
+    """
+    Bounded FIFO of inbound message frames waiting for SyncNextMessage.
+
+    When path is set, frames are appended to a length-prefixed log and the
+    file header holds a consumer cursor: the offset of the oldest frame not
+    yet delivered. pop() only rewrites that cursor, so delivery is O(1) and
+    undelivered messages survive a restart. The log is rewritten without the
+    delivered prefix once that prefix grows past compact_bytes.
+
+    When more than maxlen frames are waiting, the oldest are dropped.
+    """
+
+    def __init__(self, path: str | None = None, maxlen: int = 1024, compact_bytes: int = 256 * 1024):
+        self.path = path
+        self.maxlen = maxlen
+        self.compact_bytes = compact_bytes
+        self._frames = deque()
+        self._cursor = _FILE_HEADER.size
+        self._log = None
+        self._header = None
+
+        # counters
+        self.dropped = 0
+
+        if path is not None:
+            self._load()
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    # -------------------------
+    # Queue
+    # -------------------------
+
+    def push(self, frame: bytes):
+        frame = bytes(frame)
+        self._frames.append(frame)
+        if self._log is not None:
+            self._log.write(_LENGTH.pack(len(frame)) + frame)
+            self._log.flush()
+        while len(self._frames) > self.maxlen:
+            self._advance(self._frames.popleft())
+            self.dropped += 1
+
+    def pop(self) -> bytes | None:
+        """
+        Remove and return the oldest waiting frame, or None if empty.
+        """
+        if not self._frames:
+            return None
+        frame = self._frames.popleft()
+        self._advance(frame)
+        return frame
+
+    def peek(self) -> bytes | None:
+        return self._frames[0] if self._frames else None
+
+    def _advance(self, frame: bytes):
+        """
+        Move the persisted cursor past frame.
+        """
+        if self._header is None:
+            return
+        self._cursor += _LENGTH.size + len(frame)
+        if self._cursor - _FILE_HEADER.size >= self.compact_bytes:
+            self.compact()
+        else:
+            self._header.seek(0)
+            self._header.write(_FILE_HEADER.pack(_MAGIC, self._cursor))
+            self._header.flush()
+
+    # -------------------------
+    # Persistence
+    # -------------------------
+
+    def _load(self):
+        try:
+            with open(self.path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            data = b""
+
+        if len(data) >= _FILE_HEADER.size:
+            magic, cursor = _FILE_HEADER.unpack_from(data)
+            if magic != _MAGIC:
+                raise ValueError(f"{self.path} is not a message queue log")
+            offset = cursor
+            while offset + _LENGTH.size <= len(data):
+                (length,) = _LENGTH.unpack_from(data, offset)
+                end = offset + _LENGTH.size + length
+                if end > len(data):
+                    # torn trailing record
+                    break
+                self._frames.append(data[offset + _LENGTH.size:end])
+                offset = end
+            while len(self._frames) > self.maxlen:
+                self._frames.popleft()
+                self.dropped += 1
+
+        # start every session from a compacted log
+        self.compact()
+
+    def compact(self):
+        """
+        Rewrite the log with only the undelivered frames.
+        """
+        if self.path is None:
+            return
+        self.close()
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(_FILE_HEADER.pack(_MAGIC, _FILE_HEADER.size))
+            f.write(b"".join(_LENGTH.pack(len(frame)) + frame for frame in self._frames))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self._cursor = _FILE_HEADER.size
+        self._log = open(self.path, "ab")
+        self._header = open(self.path, "r+b")
+
+    def sync(self):
+        for f in (self._log, self._header):
+            if f is not None:
+                f.flush()
+                os.fsync(f.fileno())
+
+    def close(self):
+        for f in (self._log, self._header):
+            if f is not None:
+                f.close()
+        self._log = None
+        self._header = None
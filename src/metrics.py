@@ -0,0 +1,196 @@
+import asyncio
+import time
+from bisect import bisect_left
+
+# handler latency buckets in seconds, 50 us .. 1 s
+DEFAULT_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+
+def _labels_text(labels: tuple) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels) + "}"
+
+
+class Counter:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: tuple = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        # counts[i]: observations in (buckets[i-1], buckets[i]]; the last slot is +Inf
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-quantile."""
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+
+class MetricsRegistry:
+    """
+    Named counters and histograms, plus collectors: functions called at
+    export time that read values other objects already keep (queue
+    lengths, the counter attributes of stores and transports). Only
+    instrumented code pays anything; collectors cost nothing between
+    exports.
+
+    Exported as Prometheus text by render() / serve(), or as a dict by
+    snapshot().
+    """
+
+    def __init__(self, prefix: str = "meshcore_"):
+        self.prefix = prefix
+        # name -> (kind, help, {labels: metric})
+        self._families = {}
+        # name -> (kind, help, fn returning a number or {labels: number})
+        self._collectors = {}
+        self._server = None
+
+    # -------------------------
+    # Registration
+    # -------------------------
+
+    def _metric(self, kind: str, name: str, help_: str, labels: tuple, factory):
+        family = self._families.get(name)
+        if family is None:
+            family = self._families[name] = (kind, help_, {})
+        metrics = family[2]
+        metric = metrics.get(labels)
+        if metric is None:
+            metric = metrics[labels] = factory()
+        return metric
+
+    def counter(self, name: str, help_: str = "", labels: tuple = ()) -> Counter:
+        return self._metric("counter", name, help_, labels, Counter)
+
+    def histogram(self, name: str, help_: str = "", labels: tuple = (),
+                  buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+        return self._metric("histogram", name, help_, labels, lambda: Histogram(buckets))
+
+    def collect(self, name: str, fn, help_: str = "", kind: str = "gauge"):
+        """
+        Export the result of fn() as name. fn returns a number, or a dict
+        mapping label tuples to numbers.
+        """
+        self._collectors[name] = (kind, help_, fn)
+
+    # -------------------------
+    # Export
+    # -------------------------
+
+    def snapshot(self) -> dict:
+        data = {"timestamp": time.time()}
+        for name, (kind, _, metrics) in self._families.items():
+            for labels, metric in metrics.items():
+                key = name + _labels_text(labels)
+                if kind == "counter":
+                    data[key] = metric.value
+                else:
+                    data[key] = {"count": metric.count, "sum": metric.sum,
+                                 "p50": metric.quantile(0.5), "p99": metric.quantile(0.99)}
+        for name, (_, _, fn) in self._collectors.items():
+            value = fn()
+            if isinstance(value, dict):
+                for labels, item in value.items():
+                    data[name + _labels_text(labels)] = item
+            else:
+                data[name] = value
+        return data
+
+    def render(self) -> str:
+        """Prometheus text exposition format."""
+        lines = []
+        prefix = self.prefix
+        for name, (kind, help_, metrics) in self._families.items():
+            full = prefix + name
+            if help_:
+                lines.append(f"# HELP {full} {help_}")
+            lines.append(f"# TYPE {full} {kind}")
+            for labels, metric in metrics.items():
+                if kind == "counter":
+                    lines.append(f"{full}{_labels_text(labels)} {metric.value}")
+                    continue
+                cumulative = 0
+                for bound, count in zip(metric.buckets + (float("inf"),), metric.counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f"{full}_bucket{_labels_text(labels + (('le', le),))} {cumulative}")
+                lines.append(f"{full}_sum{_labels_text(labels)} {metric.sum}")
+                lines.append(f"{full}_count{_labels_text(labels)} {metric.count}")
+        for name, (kind, help_, fn) in self._collectors.items():
+            full = prefix + name
+            if help_:
+                lines.append(f"# HELP {full} {help_}")
+            lines.append(f"# TYPE {full} {kind}")
+            value = fn()
+            if isinstance(value, dict):
+                for labels, item in value.items():
+                    lines.append(f"{full}{_labels_text(labels)} {item}")
+            else:
+                lines.append(f"{full} {value}")
+        return "\n".join(lines) + "\n"
+
+    async def serve(self, host: str = "0.0.0.0", port: int = 9464):
+        """
+        Serve render() over HTTP on the running loop, for Prometheus to scrape.
+        """
+        self._server = await asyncio.start_server(self._handle_scrape, host, port)
+        return self._server
+
+    async def _handle_scrape(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request = await reader.readline()
+            # skip the request headers
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass
+            if request.split(b" ")[:1] == [b"GET"]:
+                body = self.render().encode()
+                status = b"200 OK"
+            else:
+                body = b""
+                status = b"405 Method Not Allowed"
+            writer.write(b"HTTP/1.1 " + status + b"\r\n"
+                         b"Content-Type: text/plain; version=0.0.4\r\n"
+                         b"Content-Length: " + str(len(body)).encode() + b"\r\n"
+                         b"Connection: close\r\n\r\n" + body)
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def emit_snapshots(self, emitter, interval: float = 10.0, event: str = "metrics"):
+        """
+        Emit snapshot() on emitter every interval seconds; run it as a task.
+        """
+        while True:
+            await asyncio.sleep(interval)
+            emitter.emit(event, self.snapshot())
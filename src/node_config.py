@@ -0,0 +1,177 @@
+import asyncio
+import os
+import struct
+
+from .events import EventEmitter
+
+# name, public key, advert type, tx power, max tx power, advert lat, advert lon,
+# manual add contacts, radio freq, radio bw, radio sf, radio cr, clock offset
+_BODY = struct.Struct("<32s32sBBBiiBIIBBi")
+_FILE_HEADER = struct.Struct("<4sHH")
+
+_MAGIC = b"MCNC"
+_VERSION = 1
+
+# field -> default, in _BODY order
+_DEFAULTS = {
+    "name": "SX1262Node",
+    "public_key": bytes(32),
+    "type_": 1,
+    "tx_power": 10,
+    "max_tx_power": 20,
+    "adv_lat": 0,
+    "adv_lon": 0,
+    "manual_add_contacts": 0,
+    "radio_freq": 915_000_000,
+    "radio_bw": 125_000,
+    "radio_sf": 7,
+    "radio_cr": 1,
+    "clock_offset": 0,
+}
+
+RADIO_FIELDS = ("radio_freq", "radio_bw", "radio_sf", "radio_cr")
+
+
+class NodeConfig(EventEmitter):
+    """
+    The node's own settings: what SelfInfo reports and the config commands
+    change.
+
+    Fields are read as attributes and changed through update(), which
+    emits "change" with the fields that actually changed. With path set the
+    config is stored as one fixed-size record; changes are written after
+    flush_delay seconds, so a burst of setters costs one write, and each
+    write goes to a temporary file that is then renamed over the old one,
+    so a crash leaves either the old or the new config, never a mix. With
+    path=None the config is memory-only.
+    """
+
+    name: str
+    public_key: bytes
+    type_: int
+    tx_power: int
+    max_tx_power: int
+    adv_lat: int
+    adv_lon: int
+    manual_add_contacts: int
+    radio_freq: int
+    radio_bw: int
+    radio_sf: int
+    radio_cr: int
+    # seconds added to the system clock, set by SetDeviceTime
+    clock_offset: int
+
+    def __init__(self, path: str | None = None, flush_delay: float = 0.5):
+        super().__init__()
+        self.path = path
+        self.flush_delay = flush_delay
+        self._flush_handle = None
+        self._dirty = False
+        self.__dict__.update(_DEFAULTS)
+
+        # counters
+        self.flushes = 0
+
+        if path is not None:
+            self._load()
+
+    @property
+    def radio_params(self) -> dict:
+        return {field: getattr(self, field) for field in RADIO_FIELDS}
+
+    def as_dict(self) -> dict:
+        return {field: getattr(self, field) for field in _DEFAULTS}
+
+    # -------------------------
+    # Updates
+    # -------------------------
+
+    def update(self, **changes) -> dict:
+        """
+        Set fields, returning {field: value} for those whose value changed.
+        Raises ValueError, changing nothing, if a value does not fit its
+        field. With no event loop running the change is written at once; if
+        that write fails the error is raised, but the change has already
+        been applied and emitted, and stays pending for the next flush().
+        """
+        for field in changes:
+            if field not in _DEFAULTS:
+                raise AttributeError(f"NodeConfig has no field {field!r}")
+        values = self.as_dict()
+        values.update(changes)
+        _encode(values)
+
+        changed = {field: value for field, value in changes.items() if getattr(self, field) != value}
+        if not changed:
+            return changed
+        self.__dict__.update(changed)
+        self._dirty = True
+        # listeners follow the config in memory, whether or not it reaches disk
+        self.emit("change", changed)
+        self._schedule_flush()
+        return changed
+
+    # -------------------------
+    # Persistence
+    # -------------------------
+
+    def _load(self):
+        try:
+            with open(self.path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return
+        if len(data) != _FILE_HEADER.size + _BODY.size:
+            raise ValueError(f"{self.path} is not a version {_VERSION} node config")
+        magic, version, body_size = _FILE_HEADER.unpack_from(data)
+        if magic != _MAGIC or version != _VERSION or body_size != _BODY.size:
+            raise ValueError(f"{self.path} is not a version {_VERSION} node config")
+        values = dict(zip(_DEFAULTS, _BODY.unpack_from(data, _FILE_HEADER.size)))
+        values["name"] = values["name"].rstrip(b"\x00").decode("utf-8", "replace")
+        self.__dict__.update(values)
+
+    def _schedule_flush(self):
+        if self.path is None or self._flush_handle is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush()
+            return
+        self._flush_handle = loop.call_later(self.flush_delay, self.flush)
+
+    def flush(self):
+        """Write pending changes now."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if self.path is None or not self._dirty:
+            return
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(_FILE_HEADER.pack(_MAGIC, _VERSION, _BODY.size))
+            f.write(_encode(self.as_dict()))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self._dirty = False
+        self.flushes += 1
+
+    def close(self):
+        self.flush()
+
+
+def _encode(values: dict) -> bytes:
+    if not isinstance(values["name"], str):
+        raise ValueError("name must be a str")
+    name = values["name"].encode("utf-8")
+    if len(name) > 31:
+        raise ValueError("name is longer than 31 bytes")
+    if len(values["public_key"]) != 32:
+        raise ValueError("public_key must be 32 bytes")
+    fields = list(values.values())
+    fields[0] = name
+    try:
+        return _BODY.pack(*fields)
+    except struct.error as e:
+        raise ValueError(str(e)) from None
@@ -1,6 +1,10 @@
 from .buffer_reader import BufferReader
 from .advert import Advert
 
+# marks "not parsed yet", since parse_payload() may legitimately return None
+_UNPARSED = object()
+
+
 class Packet:
     # Packet::header values
     PH_ROUTE_MASK = 0x03   # 2-bits
@@ -26,66 +30,79 @@ class Packet:
     PAYLOAD_TYPE_TRACE = 0x09
     PAYLOAD_TYPE_RAW_CUSTOM = 0x0F
 
+    __slots__ = ("header", "path", "payload", "_parsed")
+
     def __init__(self, header: int, path: bytes, payload: bytes):
+        # header fields are decoded on demand from the lookup tables below
         self.header = header
         self.path = path
         self.payload = payload
-
-        # parsed info
-        self.route_type = self.get_route_type()
-        self.route_type_string = self.get_route_type_string()
-        self.payload_type = self.get_payload_type()
-        self.payload_type_string = self.get_payload_type_string()
-        self.payload_version = self.get_payload_ver()
-        self.is_marked_do_not_retransmit = self.is_marked_do_not_retransmit()
+        self._parsed = _UNPARSED
 
     @staticmethod
     def from_bytes(data: bytes) -> "Packet":
-        buffer_reader = BufferReader(data)
+        """
+        Split a raw frame into header, path and payload. path and payload are
+        memoryviews into data, so data must not be modified while the packet
+        is in use.
+        """
+        buffer_reader = BufferReader(data, zero_copy=True)
         header = buffer_reader.read_byte()
-        path_len = buffer_reader.read_int8()
+        path_len = buffer_reader.read_uint8()
         path = buffer_reader.read_bytes(path_len)
         payload = buffer_reader.read_remaining_bytes()
         return Packet(header, path, payload)
 
+    @staticmethod
+    def decode_batch(frames) -> "PacketBatch":
+        """
+        Decode the headers of many raw frames at once into columnar arrays.
+        See packet_batch.PacketBatch.
+        """
+        from .packet_batch import decode_batch
+        return decode_batch(frames)
+
+    # parsed info
+    @property
+    def route_type(self) -> int:
+        return _ROUTE_TYPES[self.header]
+
+    @property
+    def route_type_string(self) -> str | None:
+        return _ROUTE_TYPE_STRINGS[self.header]
+
+    @property
+    def payload_type(self) -> int:
+        return _PAYLOAD_TYPES[self.header]
+
+    @property
+    def payload_type_string(self) -> str | None:
+        return _PAYLOAD_TYPE_STRINGS[self.header]
+
+    @property
+    def payload_version(self) -> int:
+        return _PAYLOAD_VERSIONS[self.header]
+
     def get_route_type(self) -> int:
-        return self.header & Packet.PH_ROUTE_MASK
+        return _ROUTE_TYPES[self.header]
 
     def get_route_type_string(self) -> str | None:
-        rt = self.get_route_type()
-        if rt == Packet.ROUTE_TYPE_FLOOD:
-            return "FLOOD"
-        elif rt == Packet.ROUTE_TYPE_DIRECT:
-            return "DIRECT"
-        return None
+        return _ROUTE_TYPE_STRINGS[self.header]
 
     def is_route_flood(self) -> bool:
-        return self.get_route_type() == Packet.ROUTE_TYPE_FLOOD
+        return _ROUTE_TYPES[self.header] == Packet.ROUTE_TYPE_FLOOD
 
     def is_route_direct(self) -> bool:
-        return self.get_route_type() == Packet.ROUTE_TYPE_DIRECT
+        return _ROUTE_TYPES[self.header] == Packet.ROUTE_TYPE_DIRECT
 
     def get_payload_type(self) -> int:
-        return (self.header >> Packet.PH_TYPE_SHIFT) & Packet.PH_TYPE_MASK
+        return _PAYLOAD_TYPES[self.header]
 
     def get_payload_type_string(self) -> str | None:
-        pt = self.get_payload_type()
-        return {
-            Packet.PAYLOAD_TYPE_REQ: "REQ",
-            Packet.PAYLOAD_TYPE_RESPONSE: "RESPONSE",
-            Packet.PAYLOAD_TYPE_TXT_MSG: "TXT_MSG",
-            Packet.PAYLOAD_TYPE_ACK: "ACK",
-            Packet.PAYLOAD_TYPE_ADVERT: "ADVERT",
-            Packet.PAYLOAD_TYPE_GRP_TXT: "GRP_TXT",
-            Packet.PAYLOAD_TYPE_GRP_DATA: "GRP_DATA",
-            Packet.PAYLOAD_TYPE_ANON_REQ: "ANON_REQ",
-            Packet.PAYLOAD_TYPE_PATH: "PATH",
-            Packet.PAYLOAD_TYPE_TRACE: "TRACE",
-            Packet.PAYLOAD_TYPE_RAW_CUSTOM: "RAW_CUSTOM",
-        }.get(pt, None)
+        return _PAYLOAD_TYPE_STRINGS[self.header]
 
     def get_payload_ver(self) -> int:
-        return (self.header >> Packet.PH_VER_SHIFT) & Packet.PH_VER_MASK
+        return _PAYLOAD_VERSIONS[self.header]
 
     def mark_do_not_retransmit(self):
         self.header = 0xFF
@@ -94,22 +111,14 @@ class Packet:
         return self.header == 0xFF
 
     def parse_payload(self):
-        pt = self.get_payload_type()
-        if pt == Packet.PAYLOAD_TYPE_PATH:
-            return self.parse_payload_type_path()
-        elif pt == Packet.PAYLOAD_TYPE_REQ:
-            return self.parse_payload_type_req()
-        elif pt == Packet.PAYLOAD_TYPE_RESPONSE:
-            return self.parse_payload_type_response()
-        elif pt == Packet.PAYLOAD_TYPE_TXT_MSG:
-            return self.parse_payload_type_txt_msg()
-        elif pt == Packet.PAYLOAD_TYPE_ACK:
-            return self.parse_payload_type_ack()
-        elif pt == Packet.PAYLOAD_TYPE_ADVERT:
-            return self.parse_payload_type_advert()
-        elif pt == Packet.PAYLOAD_TYPE_ANON_REQ:
-            return self.parse_payload_type_anon_req()
-        return None
+        """
+        Decode the payload for this packet's type. The result is cached, so
+        repeated calls are free.
+        """
+        if self._parsed is _UNPARSED:
+            parser = _PAYLOAD_PARSERS.get(_PAYLOAD_TYPES[self.header])
+            self._parsed = parser(self) if parser else None
+        return self._parsed
 
     def parse_payload_type_path(self):
         br = BufferReader(self.payload)
@@ -137,7 +146,7 @@ class Packet:
         return {"src": src, "dest": dest}
 
     def parse_payload_type_ack(self):
-        return {"ack_code": self.payload}
+        return {"ack_code": bytes(self.payload)}
 
     def parse_payload_type_advert(self):
         advert = Advert.from_bytes(self.payload)
@@ -152,3 +161,39 @@ class Packet:
         dest = br.read_byte()
         src_public_key = br.read_bytes(32)
         return {"src": src_public_key, "dest": dest}
+
+
+# 256-entry lookup tables indexed by the raw header byte
+_ROUTE_TYPES = tuple(h & Packet.PH_ROUTE_MASK for h in range(256))
+_PAYLOAD_TYPES = tuple((h >> Packet.PH_TYPE_SHIFT) & Packet.PH_TYPE_MASK for h in range(256))
+_PAYLOAD_VERSIONS = tuple((h >> Packet.PH_VER_SHIFT) & Packet.PH_VER_MASK for h in range(256))
+
+_ROUTE_TYPE_NAMES = {
+    Packet.ROUTE_TYPE_FLOOD: "FLOOD",
+    Packet.ROUTE_TYPE_DIRECT: "DIRECT",
+}
+_PAYLOAD_TYPE_NAMES = {
+    Packet.PAYLOAD_TYPE_REQ: "REQ",
+    Packet.PAYLOAD_TYPE_RESPONSE: "RESPONSE",
+    Packet.PAYLOAD_TYPE_TXT_MSG: "TXT_MSG",
+    Packet.PAYLOAD_TYPE_ACK: "ACK",
+    Packet.PAYLOAD_TYPE_ADVERT: "ADVERT",
+    Packet.PAYLOAD_TYPE_GRP_TXT: "GRP_TXT",
+    Packet.PAYLOAD_TYPE_GRP_DATA: "GRP_DATA",
+    Packet.PAYLOAD_TYPE_ANON_REQ: "ANON_REQ",
+    Packet.PAYLOAD_TYPE_PATH: "PATH",
+    Packet.PAYLOAD_TYPE_TRACE: "TRACE",
+    Packet.PAYLOAD_TYPE_RAW_CUSTOM: "RAW_CUSTOM",
+}
+_ROUTE_TYPE_STRINGS = tuple(_ROUTE_TYPE_NAMES.get(rt) for rt in _ROUTE_TYPES)
+_PAYLOAD_TYPE_STRINGS = tuple(_PAYLOAD_TYPE_NAMES.get(pt) for pt in _PAYLOAD_TYPES)
+
+_PAYLOAD_PARSERS = {
+    Packet.PAYLOAD_TYPE_PATH: Packet.parse_payload_type_path,
+    Packet.PAYLOAD_TYPE_REQ: Packet.parse_payload_type_req,
+    Packet.PAYLOAD_TYPE_RESPONSE: Packet.parse_payload_type_response,
+    Packet.PAYLOAD_TYPE_TXT_MSG: Packet.parse_payload_type_txt_msg,
+    Packet.PAYLOAD_TYPE_ACK: Packet.parse_payload_type_ack,
+    Packet.PAYLOAD_TYPE_ADVERT: Packet.parse_payload_type_advert,
+    Packet.PAYLOAD_TYPE_ANON_REQ: Packet.parse_payload_type_anon_req,
+}
@@ -0,0 +1,131 @@
+from array import array
+from itertools import accumulate
+
+from .buffer_reader import BufferUnderflowError
+from .packet import Packet
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+
+# bytes.translate() tables that split a header byte using the Packet::header layout
+_ROUTE_TYPE_TABLE = bytes(h & Packet.PH_ROUTE_MASK for h in range(256))
+_PAYLOAD_TYPE_TABLE = bytes((h >> Packet.PH_TYPE_SHIFT) & Packet.PH_TYPE_MASK for h in range(256))
+_VERSION_TABLE = bytes((h >> Packet.PH_VER_SHIFT) & Packet.PH_VER_MASK for h in range(256))
+
+
+class PacketBatch:
+    """
+    Columnar view of many raw packets.
+
+    Every column has one entry per frame: header, route_type, payload_type,
+    version and path_len are uint8, payload_offset and payload_len index into
+    data, the frames joined back to back. Columns are NumPy arrays when NumPy
+    is installed and array.array otherwise.
+    """
+
+    def __init__(self, data: bytes, frame_offset, header, route_type, payload_type,
+                 version, path_len, payload_offset, payload_len):
+        self.data = data
+        self.frame_offset = frame_offset
+        self.header = header
+        self.route_type = route_type
+        self.payload_type = payload_type
+        self.version = version
+        self.path_len = path_len
+        self.payload_offset = payload_offset
+        self.payload_len = payload_len
+
+    def __len__(self) -> int:
+        return len(self.header)
+
+    def payload(self, index: int) -> memoryview:
+        start = int(self.payload_offset[index])
+        return memoryview(self.data)[start:start + int(self.payload_len[index])]
+
+    def packet(self, index: int) -> Packet:
+        """
+        Build a Packet for a single row, sharing memory with data.
+        """
+        path_start = int(self.frame_offset[index]) + 2
+        path = memoryview(self.data)[path_start:path_start + int(self.path_len[index])]
+        return Packet(int(self.header[index]), path, self.payload(index))
+
+
+def decode_batch(frames) -> PacketBatch:
+    """
+    Decode the headers of many raw frames at once into a PacketBatch.
+    Raises BufferUnderflowError if a frame is too short for its path.
+    """
+    frames = list(frames)
+    data = b"".join(frames)
+    if HAS_NUMPY:
+        return _decode_batch_numpy(data, frames)
+    return _decode_batch_array(data, frames)
+
+
+def _decode_batch_numpy(data: bytes, frames) -> PacketBatch:
+    buf = np.frombuffer(data, dtype=np.uint8)
+    lengths = np.fromiter(map(len, frames), dtype=np.int64, count=len(frames))
+    frame_offset = np.zeros(len(lengths), dtype=np.int64)
+    np.cumsum(lengths[:-1], out=frame_offset[1:])
+
+    short = np.flatnonzero(lengths < 2)
+    if short.size:
+        raise BufferUnderflowError(2, int(lengths[short[0]]))
+
+    header = buf[frame_offset]
+    path_len = buf[frame_offset + 1]
+    payload_offset = frame_offset + 2 + path_len
+    payload_len = frame_offset + lengths - payload_offset
+
+    truncated = np.flatnonzero(payload_len < 0)
+    if truncated.size:
+        i = truncated[0]
+        raise BufferUnderflowError(int(path_len[i]), int(lengths[i]) - 2)
+
+    return PacketBatch(
+        data,
+        frame_offset,
+        header,
+        header & Packet.PH_ROUTE_MASK,
+        (header >> Packet.PH_TYPE_SHIFT) & Packet.PH_TYPE_MASK,
+        (header >> Packet.PH_VER_SHIFT) & Packet.PH_VER_MASK,
+        path_len,
+        payload_offset,
+        payload_len,
+    )
+
+
+def _decode_batch_array(data: bytes, frames) -> PacketBatch:
+    lengths = array("q", map(len, frames))
+    frame_offset = array("q", accumulate(lengths[:-1], initial=0)) if lengths else array("q")
+
+    for length in lengths:
+        if length < 2:
+            raise BufferUnderflowError(2, length)
+
+    header = bytes(map(data.__getitem__, frame_offset))
+    path_len = bytes(map(data.__getitem__, [offset + 1 for offset in frame_offset]))
+    payload_offset = array("q", [offset + 2 + pl for offset, pl in zip(frame_offset, path_len)])
+    payload_len = array("q", [offset + length - start for offset, length, start
+                              in zip(frame_offset, lengths, payload_offset)])
+
+    for pl, length, remaining in zip(path_len, lengths, payload_len):
+        if remaining < 0:
+            raise BufferUnderflowError(pl, length - 2)
+
+    return PacketBatch(
+        data,
+        frame_offset,
+        array("B", header),
+        array("B", header.translate(_ROUTE_TYPE_TABLE)),
+        array("B", header.translate(_PAYLOAD_TYPE_TABLE)),
+        array("B", header.translate(_VERSION_TABLE)),
+        array("B", path_len),
+        payload_offset,
+        payload_len,
+    )
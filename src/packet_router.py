@@ -0,0 +1,119 @@
+from .packet import Packet
+
+# payload types whose first payload byte is the destination hash
+_DEST_PAYLOAD_TYPES = frozenset((
+    Packet.PAYLOAD_TYPE_REQ,
+    Packet.PAYLOAD_TYPE_RESPONSE,
+    Packet.PAYLOAD_TYPE_TXT_MSG,
+    Packet.PAYLOAD_TYPE_ANON_REQ,
+    Packet.PAYLOAD_TYPE_PATH,
+))
+
+
+class Subscription:
+    __slots__ = ("callback", "route_type", "payload_type", "dest")
+
+    def __init__(self, callback, route_type: int | None, payload_type: int | None, dest: int | None):
+        self.callback = callback
+        self.route_type = route_type
+        self.payload_type = payload_type
+        self.dest = dest
+
+    def matches_header(self, header: int) -> bool:
+        return (self.route_type is None or header & Packet.PH_ROUTE_MASK == self.route_type) and \
+            (self.payload_type is None or
+             (header >> Packet.PH_TYPE_SHIFT) & Packet.PH_TYPE_MASK == self.payload_type)
+
+
+class PacketRouter:
+    """
+    Delivers raw packet frames to the subscribers that asked for them.
+
+    Subscriptions select on route type, payload type and, for payload types
+    that carry one, the destination hash byte; None matches anything. The
+    subscriptions are compiled into a table indexed by header byte, rebuilt
+    only when they change, so a frame nobody wants costs one index and is
+    never decoded. Wanted frames are decoded into a single Packet shared by
+    every matching callback; parse_payload() is cached on it, so the payload
+    is parsed at most once, and only if a callback asks for it.
+
+    Callbacks run synchronously inside route(). If one raises, on_error is
+    called with the exception (or it propagates when on_error is None).
+    """
+
+    def __init__(self, on_error=None):
+        self.on_error = on_error
+        self._subscriptions = ()
+        # header byte -> (subscriptions for any dest, {dest: subscriptions})
+        self._table = [None] * 256
+
+        # counters
+        self.routed = 0
+        self.unrouted = 0
+
+    def __len__(self) -> int:
+        return len(self._subscriptions)
+
+    def subscribe(self, callback, payload_type: int | None = None, route_type: int | None = None,
+                  dest: int | None = None) -> Subscription:
+        if dest is not None and payload_type is not None and payload_type not in _DEST_PAYLOAD_TYPES:
+            raise ValueError(f"payload type {payload_type} has no destination hash")
+        subscription = Subscription(callback, route_type, payload_type, dest)
+        self._subscriptions = self._subscriptions + (subscription,)
+        self._rebuild()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        self._subscriptions = tuple(s for s in self._subscriptions if s is not subscription)
+        self._rebuild()
+
+    def wants(self, header: int) -> bool:
+        return self._table[header] is not None
+
+    def _rebuild(self):
+        table = [None] * 256
+        for header in range(256):
+            any_dest = []
+            by_dest = {}
+            payload_type = (header >> Packet.PH_TYPE_SHIFT) & Packet.PH_TYPE_MASK
+            for subscription in self._subscriptions:
+                if not subscription.matches_header(header):
+                    continue
+                if subscription.dest is None:
+                    any_dest.append(subscription)
+                elif payload_type in _DEST_PAYLOAD_TYPES:
+                    by_dest.setdefault(subscription.dest, []).append(subscription)
+            if any_dest or by_dest:
+                table[header] = (tuple(any_dest), {d: tuple(s) for d, s in by_dest.items()})
+        self._table = table
+
+    def route(self, frame: bytes) -> Packet | None:
+        """
+        Deliver frame to its subscribers. Returns the decoded Packet, or
+        None if no subscriber wanted it.
+        """
+        entry = self._table[frame[0]]
+        if entry is None:
+            self.unrouted += 1
+            return None
+        any_dest, by_dest = entry
+        if by_dest:
+            # first payload byte, right after the path
+            dest = frame[2 + frame[1]] if len(frame) > 2 + frame[1] else None
+            matched = any_dest + by_dest.get(dest, ())
+        else:
+            matched = any_dest
+        if not matched:
+            self.unrouted += 1
+            return None
+
+        packet = Packet.from_bytes(frame)
+        self.routed += 1
+        for subscription in matched:
+            try:
+                subscription.callback(packet)
+            except Exception as e:
+                if self.on_error is None:
+                    raise
+                self.on_error(e)
+        return packet
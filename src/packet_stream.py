@@ -0,0 +1,112 @@
+import asyncio
+from collections import deque
+
+from .packet import Packet
+
+_OVERFLOW_POLICIES = ("drop_oldest", "drop_new", "block")
+
+
+class PacketStream:
+    """
+    One subscriber's bounded queue of raw packet frames, read with
+    `async for`. Frames are decoded into Packet objects only as they are
+    taken off the queue; frames that fail to decode are skipped and counted
+    in errors.
+
+    When maxsize frames are waiting, overflow decides what happens next:
+    - "drop_oldest": discard the oldest waiting frame
+    - "drop_new": discard the incoming frame
+    - "block": keep it, and make the producer wait in wait_room() before
+      reading more from the radio (producers that cannot wait still queue)
+
+    payload_types, if given, is the set of payload types to accept; other
+    frames are rejected from the header byte alone.
+    """
+
+    def __init__(self, maxsize: int = 256, overflow: str = "drop_oldest",
+                 payload_types: frozenset | None = None, on_close=None):
+        if overflow not in _OVERFLOW_POLICIES:
+            raise ValueError(f"overflow must be one of {', '.join(_OVERFLOW_POLICIES)}")
+        self.maxsize = maxsize
+        self.overflow = overflow
+        self.payload_types = payload_types
+        self._on_close = on_close
+        self._frames = deque()
+        self._waiter = None
+        self._room = asyncio.Event()
+        self._room.set()
+        self._closed = False
+
+        # counters
+        self.received = 0
+        self.dropped = 0
+        self.errors = 0
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    def accepts(self, header: int) -> bool:
+        return self.payload_types is None or \
+            (header >> Packet.PH_TYPE_SHIFT) & Packet.PH_TYPE_MASK in self.payload_types
+
+    def push(self, frame: bytes):
+        frames = self._frames
+        if len(frames) >= self.maxsize:
+            if self.overflow == "drop_new":
+                self.dropped += 1
+                return
+            if self.overflow == "drop_oldest":
+                frames.popleft()
+                self.dropped += 1
+        frames.append(frame)
+        self.received += 1
+        if len(frames) >= self.maxsize:
+            self._room.clear()
+        waiter = self._waiter
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
+
+    async def wait_room(self):
+        """Wait until a blocking subscriber has room for another frame."""
+        if self.overflow == "block" and not self._closed:
+            await self._room.wait()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> Packet:
+        frames = self._frames
+        while True:
+            while not frames:
+                if self._closed:
+                    raise StopAsyncIteration
+                self._waiter = asyncio.get_running_loop().create_future()
+                try:
+                    await self._waiter
+                finally:
+                    self._waiter = None
+            frame = frames.popleft()
+            if len(frames) < self.maxsize:
+                self._room.set()
+            try:
+                return Packet.from_bytes(frame)
+            except IndexError:
+                self.errors += 1
+
+    def close(self):
+        """Unsubscribe; frames already queued can still be read."""
+        if self._closed:
+            return
+        self._closed = True
+        self._room.set()
+        if self._on_close is not None:
+            self._on_close(self)
+        waiter = self._waiter
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.close()
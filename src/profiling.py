@@ -0,0 +1,194 @@
+import os
+import signal
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from .advert import Advert
+from .packet import Packet
+
+# phases recorded while the current task handles one frame, None outside
+_frame_phases = ContextVar("frame_phases", default=None)
+
+
+class Profiler:
+    """
+    Opt-in timing hooks. A hook is called as hook(phase, name, elapsed_ns)
+    after each timed call, with the time taken from perf_counter_ns. Phases:
+
+        "frame"   NodeListener frame processing, name = command name
+        "handler" a handle_* coroutine, name = method name
+        "send"    transport send, name = response code
+        "decode"  Packet.from_bytes
+        "parse"   Packet.parse_payload, name = payload type
+        "verify"  Advert.is_verified
+
+    NodeListener.enable_profiling() wires up the first three on one
+    listener. install() wraps the last three on their classes, so they are
+    timed process-wide until uninstall(); it is reference counted, so
+    several profilers can share it. Calls made while a frame is being
+    handled are also added to that frame's phase list (see slow frames in
+    NodeListener.enable_profiling()).
+    """
+
+    # Profiler instances with hooks on the Packet/Advert classes
+    _installed = ()
+    _originals = None
+
+    def __init__(self, hooks=()):
+        self._hooks = tuple(hooks)
+
+    def add_hook(self, hook):
+        self._hooks = self._hooks + (hook,)
+
+    def remove_hook(self, hook):
+        self._hooks = tuple(h for h in self._hooks if h is not hook)
+
+    def record(self, phase: str, name: str, elapsed_ns: int):
+        phases = _frame_phases.get()
+        if phases is not None:
+            phases.append((phase, name, elapsed_ns))
+        for hook in self._hooks:
+            hook(phase, name, elapsed_ns)
+
+    @staticmethod
+    def begin_frame():
+        """
+        Start collecting phases for a frame handled by the current task.
+        Returns (token for end_frame(), the list they are appended to).
+        """
+        phases = []
+        return _frame_phases.set(phases), phases
+
+    @staticmethod
+    def end_frame(token):
+        _frame_phases.reset(token)
+
+    # -------------------------
+    # Class-level hooks
+    # -------------------------
+
+    def install(self):
+        cls = Profiler
+        if self in cls._installed:
+            return
+        cls._installed = cls._installed + (self,)
+        if cls._originals is not None:
+            return
+        cls._originals = (Packet.__dict__["from_bytes"], Packet.parse_payload, Advert.is_verified)
+        from_bytes, parse_payload, is_verified = Packet.from_bytes, Packet.parse_payload, Advert.is_verified
+        perf_counter_ns = time.perf_counter_ns
+
+        def record(phase, name, elapsed_ns):
+            phases = _frame_phases.get()
+            if phases is not None:
+                phases.append((phase, name, elapsed_ns))
+            for profiler in cls._installed:
+                for hook in profiler._hooks:
+                    hook(phase, name, elapsed_ns)
+
+        def timed_from_bytes(data):
+            start = perf_counter_ns()
+            try:
+                return from_bytes(data)
+            finally:
+                record("decode", "", perf_counter_ns() - start)
+
+        def timed_parse_payload(packet):
+            start = perf_counter_ns()
+            try:
+                return parse_payload(packet)
+            finally:
+                record("parse", packet.payload_type_string or "unknown", perf_counter_ns() - start)
+
+        async def timed_is_verified(advert, verifier=None):
+            start = perf_counter_ns()
+            try:
+                return await is_verified(advert, verifier)
+            finally:
+                record("verify", "", perf_counter_ns() - start)
+
+        Packet.from_bytes = staticmethod(timed_from_bytes)
+        Packet.parse_payload = timed_parse_payload
+        Advert.is_verified = timed_is_verified
+
+    def uninstall(self):
+        cls = Profiler
+        cls._installed = tuple(p for p in cls._installed if p is not self)
+        if cls._installed or cls._originals is None:
+            return
+        Packet.from_bytes, Packet.parse_payload, Advert.is_verified = cls._originals
+        cls._originals = None
+
+
+class SamplingProfiler:
+    """
+    Samples the Python stack every interval seconds of CPU time and counts
+    each distinct stack. write() saves them in the collapsed-stack format
+    read by flamegraph.pl and speedscope:
+
+        with SamplingProfiler() as profiler:
+            ...
+        profiler.write("listener.collapsed")
+
+    Samples are taken by a SIGPROF handler, which runs between bytecodes of
+    the main thread (where the event loop normally runs), so the stacks are
+    not biased towards the points where the loop releases the GIL, as they
+    are when sampling from another thread. It must be started from the
+    main thread, on a platform with setitimer().
+    """
+
+    def __init__(self, interval: float = 0.001):
+        self.interval = interval
+        self.stacks = Counter()
+        # frame code object -> label, so each function is formatted once
+        self._labels = {}
+        self._previous_handler = None
+        self._running = False
+
+        # counters
+        self.samples = 0
+
+    def start(self):
+        if self._running:
+            return
+        if not hasattr(signal, "setitimer"):
+            raise RuntimeError("SamplingProfiler needs signal.setitimer()")
+        self._previous_handler = signal.signal(signal.SIGPROF, self._sample)
+        signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+        self._running = True
+
+    def stop(self):
+        if not self._running:
+            return
+        signal.setitimer(signal.ITIMER_PROF, 0)
+        signal.signal(signal.SIGPROF, self._previous_handler)
+        self._running = False
+
+    def _sample(self, signum, frame):
+        labels = self._labels
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            label = labels.get(code)
+            if label is None:
+                label = labels[code] = f"{code.co_qualname} ({os.path.basename(code.co_filename)})".replace(";", ":")
+            names.append(label)
+            frame = frame.f_back
+        names.reverse()
+        self.stacks[";".join(names)] += 1
+        self.samples += 1
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def write(self, path: str):
+        with open(path, "w") as f:
+            f.write(self.collapsed())
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
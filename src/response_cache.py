@@ -0,0 +1,41 @@
+class ResponseCache:
+    """
+    Encoded response frames that only change with node configuration, such
+    as SelfInfo and DeviceInfo, kept so repeated requests are answered with
+    one send of the stored bytes instead of being rebuilt.
+
+    Frames are keyed by whatever identifies their contents (the response
+    and the arguments it was built from). invalidate() drops them all; call
+    it whenever configuration they are built from changes. At most
+    max_entries frames are kept, the oldest being dropped first.
+    """
+
+    def __init__(self, max_entries: int = 64):
+        self.max_entries = max_entries
+        self._frames = {}
+
+        # counters
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    def get(self, key) -> bytes | None:
+        frame = self._frames.get(key)
+        if frame is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return frame
+
+    def put(self, key, frame: bytes) -> bytes:
+        """Store a copy of frame under key and return the copy."""
+        frame = bytes(frame)
+        if len(self._frames) >= self.max_entries:
+            del self._frames[next(iter(self._frames))]
+        self._frames[key] = frame
+        return frame
+
+    def invalidate(self):
+        self._frames.clear()
@@ -0,0 +1,221 @@
+import asyncio
+import math
+import time
+from collections import deque
+
+from .events import EventEmitter
+from .packet import Packet
+from .random_utils import RandomUtils
+
+
+def lora_airtime(length: int, sf: int = 7, bw: int = 125_000, cr: int = 1, preamble: int = 8,
+                 explicit_header: bool = True, crc: bool = True, low_data_rate: bool | None = None) -> float:
+    """
+    Time on air in seconds of a LoRa packet carrying length bytes
+    (Semtech AN1200.13). cr is the coding rate index 1..4 (4/5..4/8); the
+    denominators 5..8 are accepted as well. low_data_rate defaults to on
+    when a symbol lasts longer than 16 ms, as the radio requires.
+    """
+    if cr >= 5:
+        cr -= 4
+    symbol = (1 << sf) / bw
+    if low_data_rate is None:
+        low_data_rate = symbol > 0.016
+    bits = 8 * length - 4 * sf + 28 + (16 if crc else 0) - (0 if explicit_header else 20)
+    payload_symbols = 8 + max(math.ceil(bits / (4 * (sf - (2 if low_data_rate else 0)))) * (cr + 4), 0)
+    return (preamble + 4.25 + payload_symbols) * symbol
+
+
+class TxScheduler(EventEmitter):
+    """
+    Orders mesh packets for a half-duplex radio.
+
+    Packets wait in one queue per priority (ACKs, direct, flood, adverts)
+    and are handed to send one at a time, highest priority first. Flood
+    packets are held back by a random delay so that nodes re-flooding the
+    same packet don't all transmit at once. Before each transmission the
+    scheduler waits until the packet's time on air fits the duty-cycle
+    budget (duty_cycle of every window seconds), then stays idle for that
+    time on air while the radio is busy. Failed sends are emitted as
+    "error".
+    """
+
+    PRIORITY_ACK = 0
+    PRIORITY_DIRECT = 1
+    PRIORITY_FLOOD = 2
+    PRIORITY_ADVERT = 3
+
+    def __init__(self, send, sf: int = 7, bw: int = 125_000, cr: int = 1, preamble: int = 8,
+                 duty_cycle: float = 1.0, window: float = 3600.0,
+                 flood_delay_ms: tuple[int, int] = (0, 500), max_queue: int = 256):
+        super().__init__()
+        self._send = send
+        self.sf = sf
+        self.bw = bw
+        self.cr = cr
+        self.preamble = preamble
+        self.duty_cycle = duty_cycle
+        self.window = window
+        self.flood_delay_ms = flood_delay_ms
+        self.max_queue = max_queue
+        # per priority: deque of (not_before, frame)
+        self._queues = tuple(deque() for _ in range(4))
+        # (sent_at, airtime) of transmissions inside the window
+        self._history = deque()
+        self._history_airtime = 0.0
+        self._wake = asyncio.Event()
+        self._task = None
+
+        # counters
+        self.sent = 0
+        self.dropped = 0
+        self.airtime_total = 0.0
+
+    # -------------------------
+    # Configuration
+    # -------------------------
+
+    def set_radio_params(self, sf: int, bw: int, cr: int):
+        self.sf = sf
+        self.bw = bw
+        self.cr = cr
+
+    def on_radio_params(self, params: dict):
+        """'radio_params' listener: take SF/BW/CR from a NodeListener."""
+        self.set_radio_params(params["radio_sf"], params["radio_bw"], params["radio_cr"])
+
+    def airtime(self, length: int) -> float:
+        return lora_airtime(length, self.sf, self.bw, self.cr, self.preamble)
+
+    @property
+    def budget(self) -> float:
+        """Seconds of airtime allowed per window."""
+        return self.duty_cycle * self.window
+
+    # -------------------------
+    # Queueing
+    # -------------------------
+
+    @classmethod
+    def classify(cls, frame: bytes) -> int:
+        header = frame[0]
+        payload_type = (header >> Packet.PH_TYPE_SHIFT) & Packet.PH_TYPE_MASK
+        if payload_type == Packet.PAYLOAD_TYPE_ACK:
+            return cls.PRIORITY_ACK
+        if payload_type == Packet.PAYLOAD_TYPE_ADVERT:
+            return cls.PRIORITY_ADVERT
+        if header & Packet.PH_ROUTE_MASK == Packet.ROUTE_TYPE_DIRECT:
+            return cls.PRIORITY_DIRECT
+        return cls.PRIORITY_FLOOD
+
+    def submit(self, frame: bytes, priority: int | None = None) -> bool:
+        """
+        Queue a packet frame. Returns False if its queue is full and the
+        packet was dropped.
+        """
+        frame = bytes(frame)
+        if priority is None:
+            priority = self.classify(frame)
+        queue = self._queues[priority]
+        if len(queue) >= self.max_queue:
+            self.dropped += 1
+            return False
+        not_before = 0.0
+        if frame[0] & Packet.PH_ROUTE_MASK == Packet.ROUTE_TYPE_FLOOD:
+            not_before = time.monotonic() + RandomUtils.get_random_int(*self.flood_delay_ms) / 1000
+        queue.append((not_before, frame))
+        self._wake.set()
+        return True
+
+    async def send(self, frame: bytes):
+        """NodeTransport-style send: queue the packet and return."""
+        self.submit(frame)
+
+    def queue_depth(self) -> list[int]:
+        return [len(queue) for queue in self._queues]
+
+    def airtime_in_window(self) -> float:
+        self._expire(time.monotonic())
+        return self._history_airtime
+
+    def stats(self) -> dict:
+        return {
+            "queue_depth": self.queue_depth(),
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "airtime_total": self.airtime_total,
+            "airtime_window": self.airtime_in_window(),
+            "airtime_budget": self.budget,
+        }
+
+    # -------------------------
+    # Transmit loop
+    # -------------------------
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def _expire(self, now: float):
+        history = self._history
+        while history and history[0][0] <= now - self.window:
+            self._history_airtime -= history.popleft()[1]
+        if not history:
+            self._history_airtime = 0.0
+
+    def _next(self, now: float):
+        """
+        (queue, frame, None) for the highest priority packet that is due,
+        or (None, None, seconds until one is due; None if all are empty).
+        """
+        wait = None
+        for queue in self._queues:
+            if queue:
+                not_before, frame = queue[0]
+                if not_before <= now:
+                    return queue, frame, None
+                wait = not_before - now if wait is None else min(wait, not_before - now)
+        return None, None, wait
+
+    async def _wait(self, timeout: float | None):
+        """Sleep for timeout, waking early if a packet is queued."""
+        self._wake.clear()
+        try:
+            await asyncio.wait_for(self._wake.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _run(self):
+        while True:
+            now = time.monotonic()
+            queue, frame, wait = self._next(now)
+            if queue is None:
+                # nothing due yet; a newly queued packet may be
+                await self._wait(wait)
+                continue
+
+            airtime = self.airtime(len(frame))
+            self._expire(now)
+            if self._history and self._history_airtime + airtime > self.budget:
+                # wait for the oldest transmission to leave the window
+                await self._wait(self._history[0][0] + self.window - now)
+                continue
+
+            queue.popleft()
+            self._history.append((now, airtime))
+            self._history_airtime += airtime
+            self.airtime_total += airtime
+            self.sent += 1
+            try:
+                await self._send(frame)
+            except Exception as e:
+                self.emit("error", {"error": e})
+                continue
+            # the radio is busy until the packet is on air
+            await asyncio.sleep(airtime)
@@ -0,0 +1,29 @@
+"""
+src/ is the meshcore package, but its __init__ (src/index.py) imports
+connection modules that are not part of this tree, and the listeners
+import BufferReader/BufferWriter from meshcore.buffer. Build the package
+from src/ here without running index.py, so the modules can be tested.
+"""
+import os
+import sys
+import types
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+meshcore = types.ModuleType("meshcore")
+meshcore.__path__ = [os.path.join(ROOT, "src")]
+sys.modules["meshcore"] = meshcore
+
+buffer = types.ModuleType("meshcore.buffer")
+buffer.__path__ = []
+sys.modules["meshcore.buffer"] = buffer
+
+from meshcore import buffer_reader, buffer_writer  # noqa: E402
+
+sys.modules["meshcore.buffer.buffer_reader"] = buffer_reader
+sys.modules["meshcore.buffer.buffer_writer"] = buffer_writer
+buffer.buffer_reader = buffer_reader
+buffer.buffer_writer = buffer_writer
+
+# the SX1262 driver package is imported as sx1262
+sys.path.insert(0, os.path.join(ROOT, "transport"))
@@ -0,0 +1,84 @@
+import struct
+
+import pytest
+
+from meshcore.advert import Advert
+from meshcore.advert_store import AdvertStore
+from meshcore.buffer_reader import BufferUnderflowError
+
+
+def advert(key: bytes, timestamp: int, name: str | None = None, latlon=None) -> bytes:
+    flags = Advert.ADV_TYPE_CHAT
+    app_data = b""
+    if latlon is not None:
+        flags |= Advert.ADV_LATLON_MASK
+        app_data += struct.pack("<ii", *latlon)
+    if name is not None:
+        flags |= Advert.ADV_NAME_MASK
+        app_data += name.encode()
+    return key + struct.pack("<I", timestamp) + bytes(64) + bytes((flags,)) + app_data
+
+
+KEY_A = b"\xa1" + bytes(31)
+KEY_B = b"\xa1" + b"\x01" * 31
+KEY_C = b"\x07" * 32
+
+
+def test_stale_adverts_are_skipped_without_parsing():
+    store = AdvertStore()
+    assert store.add_payload(advert(KEY_A, 100, "Alpha"))
+    # claims a location but carries none; parsing it would underflow
+    broken = advert(KEY_A, 100)[:-1] + bytes((Advert.ADV_LATLON_MASK,))
+    assert not store.add_payload(broken)
+    assert not store.add_payload(advert(KEY_A, 99, "Older"))
+    assert store.get(KEY_A).name == "Alpha"
+
+    assert store.add_payload(advert(KEY_A, 101, "Newer"))
+    assert store.get(KEY_A).timestamp == 101
+    assert store.get(KEY_A).name == "Newer"
+
+
+@pytest.mark.parametrize("length", [0, 35, 100])
+def test_short_payload_raises_underflow(length):
+    with pytest.raises(BufferUnderflowError):
+        AdvertStore().add_payload(advert(KEY_A, 1)[:length])
+
+
+def test_hash_index():
+    store = AdvertStore()
+    for key in (KEY_A, KEY_B, KEY_C):
+        store.update(key, 1)
+    assert {record.public_key for record in store.find_by_hash(0xA1)} == {KEY_A, KEY_B}
+    assert store.remove(KEY_A)
+    assert [record.public_key for record in store.find_by_hash(0xA1)] == [KEY_B]
+    assert store.remove(KEY_B)
+    assert store.find_by_hash(0xA1) == []
+    assert not store.remove(KEY_B)
+
+
+def test_name_prefix_index_follows_renames():
+    store = AdvertStore()
+    store.update(KEY_A, 1, name="Base Camp")
+    store.update(KEY_B, 1, name="bastion")
+    store.update(KEY_C, 1, name="Summit")
+    assert sorted(record.name for record in store.find_by_name_prefix("BAS")) == ["Base Camp", "bastion"]
+
+    store.update(KEY_B, 2, name="Ridge")
+    assert [record.name for record in store.find_by_name_prefix("bas")] == ["Base Camp"]
+    assert [record.name for record in store.find_by_name_prefix("r")] == ["Ridge"]
+    # an update that is not newer changes nothing
+    store.update(KEY_C, 1, name="Valley")
+    assert store.find_by_name_prefix("valley") == []
+
+
+def test_grid_index_follows_moves():
+    store = AdvertStore(cell_size=100_000)
+    store.update(KEY_A, 1, lat=51_450_000, lon=-150_000)
+    store.update(KEY_B, 1, lat=51_550_000, lon=-50_000)
+    store.update(KEY_C, 1)
+    assert [record.public_key for record in store.find_near(51_400_001, -199_999)] == [KEY_A]
+    assert {record.public_key for record in store.find_near(51_450_000, -150_000, cells=1)} == {KEY_A, KEY_B}
+
+    store.update(KEY_A, 2, lat=10_000_000, lon=10_000_000)
+    assert store.find_near(51_450_000, -150_000) == []
+    assert [record.public_key for record in store.find_near(10_000_000, 10_000_000)] == [KEY_A]
@@ -0,0 +1,114 @@
+import asyncio
+import concurrent.futures
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+pytest.importorskip("nacl")
+from nacl.signing import SigningKey  # noqa: E402
+
+from meshcore.advert import Advert  # noqa: E402
+from meshcore.advert_verifier import AdvertVerifier  # noqa: E402
+
+
+def signed_advert(signing_key: SigningKey, timestamp: int = 1, app_data: bytes = b"\x01") -> Advert:
+    public_key = bytes(signing_key.verify_key)
+    unsigned = Advert(public_key, timestamp, bytes(64), app_data)
+    signature = signing_key.sign(unsigned.get_signed_data()).signature
+    return Advert(public_key, timestamp, signature, app_data)
+
+
+class CountingExecutor(ThreadPoolExecutor):
+    def __init__(self):
+        super().__init__(max_workers=1)
+        self.batches = 0
+
+    def submit(self, fn, *args, **kwargs):
+        self.batches += 1
+        return super().submit(fn, *args, **kwargs)
+
+
+def test_adverts_are_verified_in_batches():
+    executor = CountingExecutor()
+    verifier = AdvertVerifier(executor, batch_size=2)
+    adverts = [signed_advert(SigningKey.generate()) for _ in range(5)]
+    # a re-flooded copy shares the first one's verification
+    results = asyncio.run(verifier.verify_many(adverts + adverts[:1]))
+    executor.shutdown()
+    assert results == [True] * 6
+    assert executor.batches == 3
+    assert verifier.verified == 5
+
+
+def test_results_are_cached_and_evicted_oldest_first():
+    async def main():
+        verifier = AdvertVerifier(result_cache_size=1)
+        first, second = (signed_advert(SigningKey.generate()) for _ in range(2))
+        await verifier.verify(first)
+        await verifier.verify(first)
+        hits = verifier.cache_hits
+        await verifier.verify(second)
+        await verifier.verify(first)
+        verifier.close()
+        return hits, verifier.cache_hits, verifier.verified
+
+    assert asyncio.run(main()) == (1, 1, 3)
+
+
+def test_verify_keys_are_kept_in_an_lru():
+    async def main():
+        verifier = AdvertVerifier(key_cache_size=1)
+        signing_key = SigningKey.generate()
+        await verifier.verify(signed_advert(signing_key, timestamp=1))
+        key = verifier._keys[bytes(signing_key.verify_key)]
+        await verifier.verify(signed_advert(signing_key, timestamp=2))
+        reused = verifier._keys[bytes(signing_key.verify_key)] is key
+        await verifier.verify(signed_advert(SigningKey.generate()))
+        verifier.close()
+        return reused, list(verifier._keys), signing_key
+
+    reused, keys, signing_key = asyncio.run(main())
+    assert reused
+    assert keys != [bytes(signing_key.verify_key)]
+    assert len(keys) == 1
+
+
+def test_bad_signature_and_malformed_key_fail():
+    good = signed_advert(SigningKey.generate())
+    tampered = Advert(good.public_key, good.timestamp, good.signature, b"\x02")
+    short_key = Advert(good.public_key[:31], good.timestamp, good.signature, good.app_data)
+
+    async def main():
+        verifier = AdvertVerifier()
+        results = await verifier.verify_many([good, tampered, short_key])
+        verifier.close()
+        return results, len(verifier._keys)
+
+    assert asyncio.run(main()) == ([True, False, False], 1)
+
+
+def test_cancelled_batch_cancels_waiters():
+    class StuckExecutor(concurrent.futures.Executor):
+        def __init__(self):
+            self.jobs = []
+
+        def submit(self, fn, *args, **kwargs):
+            job = concurrent.futures.Future()
+            self.jobs.append(job)
+            return job
+
+    async def main():
+        executor = StuckExecutor()
+        verifier = AdvertVerifier(executor)
+        task = asyncio.ensure_future(verifier.verify(signed_advert(SigningKey.generate())))
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        (pending,) = verifier._pending.values()
+        executor.jobs[0].cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        return pending, task, verifier._pending
+
+    pending, task, still_pending = asyncio.run(main())
+    assert pending.cancelled()
+    assert task.cancelled()
+    assert still_pending == {}
@@ -0,0 +1,88 @@
+import pytest
+
+from meshcore.buffer_reader import BufferReader, BufferUnderflowError
+
+FIXED_WIDTH = [
+    ("read_byte", 1),
+    ("read_uint8", 1),
+    ("read_int8", 1),
+    ("read_uint16_le", 2),
+    ("read_uint16_be", 2),
+    ("read_int16_le", 2),
+    ("read_int16_be", 2),
+    ("read_int24_be", 3),
+    ("read_uint32_le", 4),
+    ("read_uint32_be", 4),
+    ("read_int32_le", 4),
+]
+
+
+@pytest.mark.parametrize("zero_copy", [False, True])
+@pytest.mark.parametrize("method, size", FIXED_WIDTH)
+def test_short_reads_underflow_without_moving(method, size, zero_copy):
+    reader = BufferReader(b"\xff" + bytes(size - 1), zero_copy=zero_copy)
+    reader.read_byte()
+    with pytest.raises(BufferUnderflowError) as error:
+        getattr(reader, method)()
+    assert (error.value.requested, error.value.available) == (size, size - 1)
+    assert reader.pointer == 1
+    assert isinstance(error.value, IndexError)
+
+
+def test_read_bytes_underflow():
+    reader = BufferReader(b"abc")
+    with pytest.raises(BufferUnderflowError):
+        reader.read_bytes(4)
+    with pytest.raises(BufferUnderflowError):
+        reader.read_bytes(-1)
+    with pytest.raises(BufferUnderflowError):
+        reader.read_cstring(4)
+    assert reader.pointer == 0
+    assert reader.read_bytes(3) == b"abc"
+    assert reader.read_remaining_bytes() == b""
+
+
+def test_values():
+    data = bytes.fromhex("ff fe01 01fe ffff ffff7f 78563412 12345678 feffffff")
+    reader = BufferReader(data)
+    assert reader.read_int8() == -1
+    assert reader.read_uint16_le() == 0x01FE
+    assert reader.read_uint16_be() == 0x01FE
+    assert reader.read_int16_le() == -1
+    assert reader.read_int24_be() == -129
+    assert reader.read_uint32_le() == 0x12345678
+    assert reader.read_uint32_be() == 0x12345678
+    assert reader.read_int32_le() == -2
+    assert reader.get_remaining_bytes_count() == 0
+
+
+def test_zero_copy_reads_are_views():
+    data = bytearray(b"\x01hello\x00\x00world")
+    reader = BufferReader(data, zero_copy=True)
+    assert reader.read_uint8() == 1
+    view = reader.read_bytes(5)
+    assert isinstance(view, memoryview)
+    assert reader.read_cstring(2) == ""
+    rest = reader.read_remaining_bytes()
+    data[1:6] = b"HELLO"
+    assert bytes(view) == b"HELLO"
+    assert bytes(rest) == b"world"
+
+
+def test_default_reads_are_copies():
+    data = bytearray(b"hello")
+    view = BufferReader(memoryview(data)).read_bytes(5)
+    data[:] = b"HELLO"
+    assert view == b"hello"
+
+
+def test_zero_copy_accepts_non_byte_views():
+    reader = BufferReader(memoryview(bytearray(4)).cast("I"), zero_copy=True)
+    assert reader.get_remaining_bytes_count() == 4
+    assert reader.read_uint32_le() == 0
+
+
+def test_strings():
+    reader = BufferReader("näme\x00pad".encode() + "tail".encode())
+    assert reader.read_cstring(9) == "näme"
+    assert reader.read_string() == "tail"
@@ -0,0 +1,95 @@
+import struct
+
+import pytest
+
+from meshcore.buffer_reader import BufferReader
+from meshcore.buffer_writer import BufferWriter
+
+
+def test_grows_past_its_capacity_without_blocking_views():
+    writer = BufferWriter(capacity=2)
+    writer.write_bytes(b"ab")
+    view = writer.getbuffer()
+    writer.write_uint32_le(0x64636261)
+    writer.write_cstring("xyz", 8)
+    assert len(writer) == 14
+    assert writer.to_bytes() == b"ababcdxyz" + bytes(5)
+    # the old view still sees the old buffer
+    assert bytes(view) == b"ab"
+
+
+def test_reset_reuses_the_buffer():
+    writer = BufferWriter()
+    buffer = writer.buffer
+    writer.write_bytes(b"first frame")
+    writer.reset()
+    assert writer.to_bytes() == b""
+    writer.write_uint8(7)
+    assert writer.to_bytes() == b"\x07"
+    assert writer.buffer is buffer
+
+
+def test_getbuffer_is_a_view_and_to_bytes_a_copy():
+    writer = BufferWriter()
+    writer.write_bytes(b"abc")
+    view = writer.getbuffer()
+    copy = writer.to_bytes()
+    writer.reset()
+    writer.write_bytes(b"xyz")
+    assert bytes(view) == b"xyz"
+    assert copy == b"abc"
+
+
+def test_reserve_returns_the_offset_to_pack_into():
+    writer = BufferWriter(capacity=1)
+    writer.write_uint8(1)
+    offset = writer.reserve(2)
+    struct.pack_into("<H", writer.buffer, offset, 0x0302)
+    assert writer.to_bytes() == b"\x01\x02\x03"
+
+
+def test_write_cstring_truncates_and_pads():
+    writer = BufferWriter()
+    writer.write_cstring("toolong", 4)
+    writer.write_cstring("ab", 4)
+    writer.write_cstring("", 2)
+    assert writer.to_bytes() == b"too\x00" + b"ab\x00\x00" + b"\x00\x00"
+    reader = BufferReader(writer.getbuffer())
+    assert [reader.read_cstring(4), reader.read_cstring(4), reader.read_cstring(2)] == ["too", "ab", ""]
+
+
+@pytest.mark.parametrize("value", [0, 1, -1, -129, 0x7FFFFF, -0x800000, 0x123456])
+def test_int24_round_trip(value):
+    writer = BufferWriter()
+    writer.write_int24_be(value)
+    assert len(writer) == 3
+    assert BufferReader(writer.to_bytes()).read_int24_be() == value
+
+
+def test_fixed_width_round_trip():
+    writer = BufferWriter()
+    writer.write_int8(-2)
+    writer.write_uint16_le(0xBEEF)
+    writer.write_uint16_be(0xBEEF)
+    writer.write_int16_le(-300)
+    writer.write_int16_be(-300)
+    writer.write_uint32_le(0xDEADBEEF)
+    writer.write_uint32_be(0xDEADBEEF)
+    writer.write_int32_le(-70000)
+    writer.write_string("né")
+    reader = BufferReader(writer.to_bytes())
+    assert [
+        reader.read_int8(), reader.read_uint16_le(), reader.read_uint16_be(), reader.read_int16_le(),
+        reader.read_int16_be(), reader.read_uint32_le(), reader.read_uint32_be(), reader.read_int32_le(),
+        reader.read_string(),
+    ] == [-2, 0xBEEF, 0xBEEF, -300, -300, 0xDEADBEEF, 0xDEADBEEF, -70000, "né"]
+
+
+def test_out_of_range_write_leaves_the_frame_unchanged():
+    writer = BufferWriter()
+    writer.write_uint8(1)
+    with pytest.raises(struct.error):
+        writer.write_uint16_le(0x10000)
+    with pytest.raises(ValueError):
+        writer.write_uint8(256)
+    assert writer.to_bytes() == b"\x01"
@@ -0,0 +1,71 @@
+import struct
+
+import pytest
+
+from meshcore.buffer_writer import BufferWriter
+from meshcore.cayenne_lpp import CayenneLpp, LppTemplate
+
+
+def test_polyline_round_trip():
+    writer = BufferWriter()
+    CayenneLpp.write(writer, 1, CayenneLpp.LPP_POLYLINE, b"\x01\x02\x03")
+    CayenneLpp.write(writer, 2, CayenneLpp.LPP_TEMPERATURE, 21.5)
+    assert CayenneLpp.parse(writer.to_bytes()) == [
+        {"channel": 1, "type": CayenneLpp.LPP_POLYLINE, "value": b"\x01\x02\x03"},
+        {"channel": 2, "type": CayenneLpp.LPP_TEMPERATURE, "value": 21.5},
+    ]
+
+
+def test_polyline_size_zero_is_malformed():
+    with pytest.raises(ValueError):
+        CayenneLpp.parse(bytes([1, 240, 0, 1, 103, 0, 200]))
+
+
+@pytest.mark.parametrize("channel, type_, value", [
+    (1, CayenneLpp.LPP_POLYLINE, bytes(255)),
+    (256, CayenneLpp.LPP_POLYLINE, b"\x01"),
+    (256, CayenneLpp.LPP_TEMPERATURE, 20.0),
+])
+def test_failed_write_leaves_nothing(channel, type_, value):
+    writer = BufferWriter()
+    CayenneLpp.write(writer, 1, CayenneLpp.LPP_DIGITAL_INPUT, 1)
+    with pytest.raises(ValueError):
+        CayenneLpp.write(writer, channel, type_, value)
+    assert writer.to_bytes() == bytes((1, CayenneLpp.LPP_DIGITAL_INPUT, 1))
+
+
+LAYOUT = [(1, CayenneLpp.LPP_TEMPERATURE), (2, CayenneLpp.LPP_ACCELEROMETER)]
+
+
+def test_template_matches_write():
+    template = LppTemplate(LAYOUT)
+    template.update([21.5, (0.25, -1.0, 0.5)])
+    writer = BufferWriter()
+    CayenneLpp.write(writer, 1, CayenneLpp.LPP_TEMPERATURE, 21.5)
+    CayenneLpp.write(writer, 2, CayenneLpp.LPP_ACCELEROMETER, (0.25, -1.0, 0.5))
+    assert bytes(template.getbuffer()) == writer.to_bytes()
+
+    template.set(0, -3.0)
+    assert CayenneLpp.parse_tuples(template.getbuffer())[0].value == -3.0
+
+
+def test_template_out_of_range_value_changes_nothing():
+    template = LppTemplate(LAYOUT)
+    template.update([21.5, (1.0, 2.0, 3.0)])
+    before = bytes(template.getbuffer())
+
+    with pytest.raises(struct.error):
+        template.set(1, (1.0, 2.0, 99.0))
+    assert bytes(template.getbuffer()) == before
+
+    with pytest.raises(struct.error):
+        template.update([-5.0, (4.0, 5.0, 99.0)])
+    assert bytes(template.getbuffer()) == before
+
+    with pytest.raises(struct.error):
+        template.update([9999.0])
+    assert bytes(template.getbuffer()) == before
+
+    # a good update after a failed one still writes every field
+    template.update([18.0, (4.0, 5.0, 6.0)])
+    assert CayenneLpp.parse_tuples(template.getbuffer())[1].value == (4.0, 5.0, 6.0)
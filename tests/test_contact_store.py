@@ -0,0 +1,56 @@
+import asyncio
+import struct
+
+from meshcore.constants import Constants
+from meshcore.contact_store import ContactStore
+from meshcore.listener.memory_transport import MemoryTransport
+from meshcore.listener.node_listener import NodeListener
+
+_BODY = struct.Struct("<32sBBb64s32sIii")
+
+
+def contact_body(key_byte: int, name: bytes) -> bytes:
+    return _BODY.pack(bytes((key_byte,)) * 32, 1, 0, -1, bytes(64), name, 1700000000, 10, -20)
+
+
+def test_export_contact_sends_stored_contact():
+    store = ContactStore()
+    body = contact_body(7, b"alice")
+    store.add_update(body)
+
+    async def main():
+        node_side, client = MemoryTransport.pair()
+        listener = NodeListener(node_side, contacts=store)
+        await listener.start()
+        await client.send(bytes((Constants.CommandCodes.ExportContact,)) + bytes((7,)) * 32)
+        known = await client.receive()
+        await client.send(bytes((Constants.CommandCodes.ExportContact,)) + bytes((8,)) * 32)
+        unknown = await client.receive()
+        await listener.stop()
+        return known, unknown
+
+    known, unknown = asyncio.run(main())
+    assert known == bytes((Constants.ResponseCodes.ExportContact,)) + body
+    assert unknown == bytes((Constants.ResponseCodes.Err, Constants.ErrorCodes.NotFound))
+
+
+def test_torn_trailing_record_is_dropped_on_load(tmp_path):
+    path = str(tmp_path / "contacts.log")
+    store = ContactStore(path)
+    store.add_update(contact_body(1, b"one"))
+    store.add_update(contact_body(2, b"two"))
+    store.close()
+    with open(path, "ab") as f:
+        # a crash part-way through appending a third record
+        f.write(bytes((Constants.ResponseCodes.Contact,)) + contact_body(3, b"three")[:40])
+
+    store = ContactStore(path)
+    assert len(store) == 2
+    assert store.get(bytes((2,)) * 32)["adv_name"] == "two"
+    store.add_update(contact_body(3, b"three"))
+    store.remove(bytes((1,)) * 32)
+    store.close()
+
+    store = ContactStore(path)
+    assert sorted(record[1] for record in store.records()) == [2, 3]
+    store.close()
@@ -0,0 +1,85 @@
+import asyncio
+import os
+
+import pytest
+
+from meshcore.buffer_reader import BufferUnderflowError
+from meshcore.duplicate_filter import DuplicateFilter
+from meshcore.frame_parser import FrameParser
+from meshcore.listener.node_listener import NodeListener
+from meshcore.packet import Packet
+
+# flood-routed TXT_MSG, empty path
+FLOOD_TXT = bytes(((Packet.PAYLOAD_TYPE_TXT_MSG << Packet.PH_TYPE_SHIFT) | Packet.ROUTE_TYPE_FLOOD, 0)) + b"\x12\x34hello"
+
+
+def test_radio_rx_drops_reflooded_copies():
+    serial = pytest.importorskip("serial")  # noqa: F841
+    pty = pytest.importorskip("pty")
+    import tty
+
+    from sx1262 import SerialRadio, SX1262Transport
+
+    async def main():
+        master, slave = pty.openpty()
+        tty.setraw(master)
+        tty.setraw(slave)
+        transport = SX1262Transport(radio=SerialRadio(os.ttyname(slave)))
+        listener = NodeListener(transport)
+        heard = []
+        listener.on("packet", heard.append, sync=True)
+        await transport.start()
+        await listener.start()
+        # the same flood packet arrives twice, with a hop added to the second copy
+        relayed = FLOOD_TXT[:1] + b"\x01\xaa" + FLOOD_TXT[2:]
+        os.write(master, FrameParser.encode(FLOOD_TXT) + FrameParser.encode(relayed))
+        for _ in range(100):
+            if listener.duplicate_filter.duplicates:
+                break
+            await asyncio.sleep(0.01)
+        await listener.stop()
+        os.close(master)
+        return listener, heard
+
+    listener, heard = asyncio.run(main())
+    assert listener.duplicate_filter.unique == 1
+    assert listener.duplicate_filter.duplicates == 1
+    assert len(heard) == 1
+    assert bytes(heard[0].payload) == b"\x12\x34hello"
+
+
+def test_ring_forgets_oldest():
+    duplicates = DuplicateFilter(capacity=2)
+    assert not duplicates.check(Packet.PAYLOAD_TYPE_TXT_MSG, b"a")
+    assert duplicates.check(Packet.PAYLOAD_TYPE_TXT_MSG, b"a")
+    assert not duplicates.check(Packet.PAYLOAD_TYPE_ACK, b"a")
+    assert not duplicates.check(Packet.PAYLOAD_TYPE_TXT_MSG, b"b")
+    assert len(duplicates) == 2
+    assert not duplicates.check(Packet.PAYLOAD_TYPE_TXT_MSG, b"a")
+
+
+def test_window_expires_entries(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("meshcore.duplicate_filter.time.monotonic", lambda: now[0])
+    duplicates = DuplicateFilter(window=5)
+    assert not duplicates.check(Packet.PAYLOAD_TYPE_ACK, b"x")
+    now[0] += 4
+    assert duplicates.check(Packet.PAYLOAD_TYPE_ACK, b"x")
+    now[0] += 2
+    assert not duplicates.check(Packet.PAYLOAD_TYPE_ACK, b"x")
+
+
+def test_malformed_frames_are_rejected_before_recording():
+    duplicates = DuplicateFilter(capacity=1)
+    assert not duplicates.check_frame(FLOOD_TXT)
+    for frame in (b"", FLOOD_TXT[:1], FLOOD_TXT[:1] + b"\x05\xaa"):
+        with pytest.raises(BufferUnderflowError):
+            duplicates.check_frame(frame)
+    # the real entry was not evicted by the junk
+    assert duplicates.check_frame(FLOOD_TXT)
+    assert duplicates.unique == 1
+
+
+def test_capacity_must_be_positive():
+    with pytest.raises(ValueError):
+        DuplicateFilter(capacity=0)
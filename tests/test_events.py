@@ -0,0 +1,114 @@
+import asyncio
+
+from meshcore.events import EventEmitter
+
+
+def test_sync_listeners_run_inside_emit_and_others_after():
+    async def main():
+        emitter = EventEmitter()
+        calls = []
+        emitter.on("x", lambda value: calls.append(("sync", value)), sync=True)
+        emitter.on("x", lambda value: calls.append(("deferred", value)))
+        emitter.emit("x", 1)
+        before = list(calls)
+        await asyncio.sleep(0)
+        return before, calls
+
+    before, calls = asyncio.run(main())
+    assert before == [("sync", 1)]
+    assert calls == [("sync", 1), ("deferred", 1)]
+
+
+def test_listener_errors_are_emitted_as_error():
+    async def main():
+        emitter = EventEmitter()
+        errors = []
+        emitter.on("error", errors.append, sync=True)
+
+        async def failing(value):
+            raise RuntimeError(f"task {value}")
+
+        def raising(value):
+            raise ValueError(f"sync {value}")
+
+        emitter.on("x", failing)
+        emitter.on("x", raising, sync=True)
+        emitter.emit("x", 1)
+        for _ in range(3):
+            await asyncio.sleep(0)
+        return errors
+
+    errors = asyncio.run(main())
+    assert [(type(e["error"]), str(e["error"]), e["event"]) for e in errors] == [
+        (ValueError, "sync 1", "x"),
+        (RuntimeError, "task 1", "x"),
+    ]
+
+
+def test_once_fires_once_when_emitted_twice_before_it_runs():
+    async def main():
+        emitter = EventEmitter()
+        calls = []
+        emitter.on("x", calls.append, sync=True)
+        emitter.once("x", lambda value: calls.append(("once", value)))
+        emitter.once("x", lambda value: calls.append(("once sync", value)), sync=True)
+        emitter.emit("x", 1)
+        emitter.emit("x", 2)
+        await asyncio.sleep(0)
+        return calls, emitter.listener_count("x")
+
+    calls, count = asyncio.run(main())
+    assert calls == [1, ("once sync", 1), 2, ("once", 1)]
+    assert count == 1
+
+
+def test_off_during_emit_applies_from_the_next_emit():
+    emitter = EventEmitter()
+    calls = []
+
+    def second(value):
+        calls.append(("second", value))
+
+    def first(value):
+        calls.append(("first", value))
+        emitter.off("x", second)
+
+    emitter.on("x", first, sync=True)
+    emitter.on("x", second, sync=True)
+    emitter.emit("x", 1)
+    emitter.emit("x", 2)
+    assert calls == [("first", 1), ("second", 1), ("first", 2)]
+
+    emitter.off("x", first)
+    assert emitter.listener_count("x") == 0
+    emitter.emit("x", 3)
+    assert len(calls) == 3
+
+
+def test_off_removes_a_pending_once_listener():
+    emitter = EventEmitter()
+    calls = []
+    emitter.once("x", calls.append, sync=True)
+    emitter.off("x", calls.append)
+    emitter.emit("x", 1)
+    assert calls == []
+
+
+def test_stream_drops_the_oldest_items_on_overflow():
+    async def main():
+        emitter = EventEmitter()
+        async with emitter.stream("x", maxsize=3) as stream:
+            for value in range(5):
+                emitter.emit("x", value)
+            emitter.emit("x", 5, 6)
+            items = [await stream.__anext__() for _ in range(len(stream))]
+            dropped = stream.dropped
+        emitter.emit("x", 7)
+        rest = [item async for item in stream]
+        return items, dropped, rest, emitter.listener_count("x")
+
+    items, dropped, rest, count = asyncio.run(main())
+    assert items == [3, 4, (5, 6)]
+    assert dropped == 3
+    assert rest == []
+    assert count == 0
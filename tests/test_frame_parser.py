@@ -0,0 +1,38 @@
+from meshcore.frame_parser import FrameParser
+
+
+def frame(data: bytes) -> bytes:
+    return FrameParser.encode(data, ord("<"))
+
+
+def frames(parser: FrameParser, *chunks) -> list[bytes]:
+    return [bytes(f) for chunk in chunks for f in parser.feed(chunk)]
+
+
+def test_resyncs_after_garbage():
+    parser = FrameParser()
+    assert frames(parser, b"\x00\xffjunk" + frame(b"abc") + b"xy" + frame(b"de")) == [b"abc", b"de"]
+    assert parser.dropped_bytes == 8
+    assert parser.frames == 2
+
+
+def test_skips_header_with_impossible_length():
+    parser = FrameParser(max_frame_len=16)
+    # a stray marker announcing 0xffff bytes must not swallow the next frame
+    assert frames(parser, b"<\xff\xff" + frame(b"ok")) == [b"ok"]
+    assert parser.dropped_bytes == 3
+
+
+def test_split_header_and_body():
+    parser = FrameParser()
+    data = frame(b"hello world")
+    assert frames(parser, data[:1], data[1:2], data[2:7]) == []
+    assert frames(parser, data[7:]) == [b"hello world"]
+    assert len(parser) == 0
+
+
+def test_frame_wrapping_the_ring():
+    parser = FrameParser(capacity=32)
+    assert frames(parser, frame(b"a" * 20)) == [b"a" * 20]
+    # starts at offset 23 of 32, so its body wraps around the end
+    assert frames(parser, frame(b"0123456789abcdef")) == [b"0123456789abcdef"]
@@ -0,0 +1,104 @@
+import asyncio
+import contextvars
+
+from meshcore.constants import Constants
+from meshcore.frame_parser import FrameParser
+from meshcore.listener.memory_transport import MemoryTransport
+from meshcore.listener.node_listener import NodeListener
+from meshcore.listener.tcp_listener import TCPNodeListener, _current_client
+from meshcore.message_queue import MessageQueue
+
+MSG_WAITING = bytes((Constants.PushCodes.MsgWaiting,))
+
+
+def message(text: bytes) -> bytes:
+    return bytes((Constants.ResponseCodes.ContactMsgRecv,)) + bytes(6) + b"\x00\x00" + bytes(4) + text
+
+
+def test_start_pushes_msg_waiting_for_persisted_messages(tmp_path):
+    path = str(tmp_path / "messages.log")
+    queue = MessageQueue(path)
+    for i in range(3):
+        queue.push(message(b"m%d" % i))
+    queue.close()
+
+    async def main():
+        node_side, client = MemoryTransport.pair()
+        listener = NodeListener(node_side, messages=MessageQueue(path))
+        await listener.start()
+        push = await asyncio.wait_for(client.receive(), 1)
+        await asyncio.sleep(0.01)
+        extra = client.pending()
+        await listener.stop()
+        return push, extra
+
+    push, extra = asyncio.run(main())
+    assert push == MSG_WAITING
+    assert extra == 0
+
+
+def test_reconnecting_client_gets_one_msg_waiting():
+    async def main():
+        listener = TCPNodeListener(host="127.0.0.1", port=0)
+        await listener.start()
+        # a burst arrives while no client is connected
+        for i in range(50):
+            listener.queue_message(message(b"m%d" % i))
+        await asyncio.sleep(0)
+        port = listener.server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        push = await asyncio.wait_for(reader.readexactly(4), 1)
+        writer.write(FrameParser.encode(bytes((Constants.CommandCodes.SyncNextMessage,)),
+                                        Constants.SerialFrameTypes.Outgoing))
+        header = await asyncio.wait_for(reader.readexactly(3), 1)
+        first = await reader.readexactly(int.from_bytes(header[1:], "little"))
+        await listener.stop()
+        writer.close()
+        return push, first
+
+    push, first = asyncio.run(main())
+    assert push == FrameParser.encode(MSG_WAITING)
+    assert first == message(b"m0")
+
+
+def test_cursor_survives_restart(tmp_path):
+    path = str(tmp_path / "messages.log")
+    queue = MessageQueue(path)
+    for i in range(4):
+        queue.push(message(b"m%d" % i))
+    assert queue.pop() == message(b"m0")
+    assert queue.pop() == message(b"m1")
+    queue.close()
+
+    queue = MessageQueue(path)
+    assert len(queue) == 2
+    assert queue.pop() == message(b"m2")
+    queue.close()
+
+    queue = MessageQueue(path)
+    assert [queue.pop(), queue.pop()] == [message(b"m3"), None]
+    queue.close()
+
+
+def test_msg_waiting_queued_by_a_handler_reaches_every_client():
+    async def main():
+        listener = TCPNodeListener(host="127.0.0.1", port=0)
+        await listener.start()
+        port = listener.server.sockets[0].getsockname()[1]
+        connections = [await asyncio.open_connection("127.0.0.1", port) for _ in range(2)]
+        while len(listener.clients) < 2:
+            await asyncio.sleep(0.01)
+
+        def from_handler():
+            # as if a handler for the first client queued the message
+            _current_client.set(listener.clients[0])
+            listener.queue_message(message(b"hi"))
+
+        contextvars.copy_context().run(from_handler)
+        pushes = [await asyncio.wait_for(reader.readexactly(4), 1) for reader, _ in connections]
+        await listener.stop()
+        for _, writer in connections:
+            writer.close()
+        return pushes
+
+    assert asyncio.run(main()) == [FrameParser.encode(MSG_WAITING)] * 2
@@ -0,0 +1,40 @@
+import asyncio
+
+from meshcore.constants import Constants
+from meshcore.listener.memory_transport import MemoryTransport
+from meshcore.listener.node_listener import NodeListener
+from meshcore.tx_scheduler import TxScheduler
+
+
+class SchedulerTransport(MemoryTransport):
+    """A transport with a TX scheduler, like SX1262Transport."""
+
+    def __init__(self):
+        super().__init__()
+        self.scheduler = TxScheduler(self._transmit)
+
+    async def _transmit(self, frame):
+        pass
+
+
+def test_render_with_transport_scheduler():
+    async def main():
+        node_side = SchedulerTransport()
+        client = MemoryTransport()
+        node_side.peer, client.peer = client, node_side
+        listener = NodeListener(node_side)
+        registry = listener.enable_metrics()
+        await listener.start()
+        await client.send(bytes((Constants.CommandCodes.GetDeviceTime,)))
+        await client.receive()
+        text = registry.render()
+        snapshot = registry.snapshot()
+        await listener.stop()
+        return text, snapshot
+
+    text, snapshot = asyncio.run(main())
+    assert 'meshcore_tx_queue_depth{priority="ack"} 0' in text
+    assert "meshcore_tx_packets_total 0" in text
+    assert text.count("# TYPE meshcore_tx_packets_total") == 1
+    assert snapshot["tx_dropped_total"] == 0
+    assert "meshcore_frames_in_total 1" in text
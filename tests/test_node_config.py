@@ -0,0 +1,102 @@
+import asyncio
+
+import pytest
+
+from meshcore.buffer_writer import BufferWriter
+from meshcore.constants import Constants
+from meshcore.frame_parser import FrameParser
+from meshcore.listener.memory_transport import MemoryTransport
+from meshcore.listener.node_listener import NodeListener
+from meshcore.listener.tcp_listener import TCPNodeListener
+from meshcore.node_config import NodeConfig
+
+
+def set_advert_name(name: str) -> bytes:
+    writer = BufferWriter()
+    writer.write_uint8(Constants.CommandCodes.SetAdvertName)
+    writer.write_string(name)
+    return writer.to_bytes()
+
+
+def test_node_listener_stop_flushes_pending_setter(tmp_path):
+    path = str(tmp_path / "node.cfg")
+
+    async def main():
+        node_side, client = MemoryTransport.pair()
+        listener = NodeListener(node_side, config=NodeConfig(path, flush_delay=60))
+        await listener.start()
+        await client.send(set_advert_name("relay-1"))
+        assert (await client.receive())[0] == Constants.ResponseCodes.Ok
+        await listener.stop()
+
+    asyncio.run(main())
+    assert NodeConfig(path).name == "relay-1"
+
+
+def test_tcp_listener_stop_flushes_pending_setter(tmp_path):
+    path = str(tmp_path / "node.cfg")
+
+    async def main():
+        listener = TCPNodeListener(host="127.0.0.1", port=0, config=NodeConfig(path, flush_delay=60))
+        await listener.start()
+        port = listener.server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(FrameParser.encode(set_advert_name("relay-2"), Constants.SerialFrameTypes.Outgoing))
+        assert (await reader.readexactly(4))[3] == Constants.ResponseCodes.Ok
+        await listener.stop()
+        writer.close()
+
+    asyncio.run(main())
+    assert NodeConfig(path).name == "relay-2"
+
+
+def test_burst_of_updates_is_one_atomic_write(tmp_path):
+    path = tmp_path / "node.cfg"
+
+    async def main():
+        config = NodeConfig(str(path), flush_delay=0.05)
+        changes = []
+        config.on("change", changes.append, sync=True)
+        config.update(name="burst")
+        config.update(tx_power=12)
+        config.update(adv_lat=1, adv_lon=2)
+        config.update(tx_power=12)
+        written_early = path.exists()
+        await asyncio.sleep(0.1)
+        return config, changes, written_early
+
+    config, changes, written_early = asyncio.run(main())
+    assert not written_early
+    assert config.flushes == 1
+    assert changes == [{"name": "burst"}, {"tx_power": 12}, {"adv_lat": 1, "adv_lon": 2}]
+    assert not (tmp_path / "node.cfg.tmp").exists()
+    assert NodeConfig(str(path)).as_dict() == config.as_dict()
+
+
+def test_failed_write_leaves_previous_config(tmp_path, monkeypatch):
+    path = str(tmp_path / "node.cfg")
+    config = NodeConfig(path)
+    config.update(name="before")
+
+    def crash(src, dst):
+        raise OSError("power lost")
+
+    changes = []
+    config.on("change", changes.append, sync=True)
+    monkeypatch.setattr("meshcore.node_config.os.replace", crash)
+    with pytest.raises(OSError):
+        config.update(name="after")
+    assert NodeConfig(path).name == "before"
+    # the change still reached memory and the listeners, and is written later
+    assert config.name == "after"
+    assert changes == [{"name": "after"}]
+    monkeypatch.undo()
+    config.flush()
+    assert NodeConfig(path).name == "after"
+
+
+def test_invalid_value_changes_nothing():
+    config = NodeConfig()
+    with pytest.raises(ValueError):
+        config.update(tx_power=15, radio_sf=300)
+    assert config.tx_power == 10
@@ -0,0 +1,30 @@
+from meshcore.duplicate_filter import DuplicateFilter
+from meshcore.packet import Packet
+from meshcore.packet_batch import decode_batch
+
+FRAMES = [bytes((0x11, 2, 0xAA, 0xBB, 1, 2, 3)), bytes((0x09, 0, 4, 5))]
+
+
+def test_decode_batch_accepts_a_generator():
+    batch = decode_batch(frame for frame in FRAMES)
+    assert len(batch) == 2
+    assert list(batch.header) == [0x11, 0x09]
+    assert bytes(batch.packet(0).path) == b"\xaa\xbb"
+    assert bytes(batch.payload(0)) == b"\x01\x02\x03"
+    assert bytes(batch.payload(1)) == b"\x04\x05"
+
+
+def test_long_path_decodes_the_same_everywhere():
+    # path_len >= 128 must be read unsigned by every decoder
+    frame = bytes((0x11, 200)) + bytes(range(200)) + b"payload"
+    packet = Packet.from_bytes(frame)
+    assert len(packet.path) == 200
+    assert bytes(packet.payload) == b"payload"
+
+    row = decode_batch([frame]).packet(0)
+    assert bytes(row.path) == bytes(packet.path)
+    assert bytes(row.payload) == bytes(packet.payload)
+
+    by_frame, by_packet = DuplicateFilter(), DuplicateFilter()
+    assert by_frame.check_frame(frame) == by_packet.check_packet(packet)
+    assert by_packet.check_frame(frame)
@@ -0,0 +1,75 @@
+import pytest
+
+from meshcore.packet import Packet
+from meshcore.packet_router import PacketRouter
+
+
+def frame(payload_type: int, payload: bytes, route_type: int = Packet.ROUTE_TYPE_DIRECT, path: bytes = b"") -> bytes:
+    return bytes(((payload_type << Packet.PH_TYPE_SHIFT) | route_type, len(path))) + path + payload
+
+
+def test_demultiplexes_on_dest_hash():
+    router = PacketRouter()
+    delivered = []
+    for name, dest in (("a", 0xA1), ("b", 0xB2)):
+        router.subscribe(lambda packet, name=name: delivered.append((name, bytes(packet.payload))),
+                         payload_type=Packet.PAYLOAD_TYPE_TXT_MSG, dest=dest)
+
+    assert router.route(frame(Packet.PAYLOAD_TYPE_TXT_MSG, b"\xa1\x00to a", path=b"\x11\x22")) is not None
+    assert router.route(frame(Packet.PAYLOAD_TYPE_TXT_MSG, b"\xb2\x00to b")) is not None
+    assert router.route(frame(Packet.PAYLOAD_TYPE_TXT_MSG, b"\xc3\x00nobody")) is None
+    # no payload byte at all: nothing to match a dest against
+    assert router.route(frame(Packet.PAYLOAD_TYPE_TXT_MSG, b"")) is None
+    assert delivered == [("a", b"\xa1\x00to a"), ("b", b"\xb2\x00to b")]
+    assert (router.routed, router.unrouted) == (2, 2)
+
+
+def test_any_dest_and_dest_subscribers_share_one_packet():
+    router = PacketRouter()
+    seen = []
+    router.subscribe(seen.append, payload_type=Packet.PAYLOAD_TYPE_REQ)
+    router.subscribe(seen.append, dest=0x42)
+    packet = router.route(frame(Packet.PAYLOAD_TYPE_REQ, b"\x42\x01"))
+    assert seen == [packet, packet]
+
+    # dest-only subscriptions ignore payload types without a dest hash
+    assert router.route(frame(Packet.PAYLOAD_TYPE_ADVERT, b"\x42" * 8)) is None
+
+
+def test_route_type_selects_and_unsubscribe_stops_delivery():
+    router = PacketRouter()
+    flood = []
+    subscription = router.subscribe(flood.append, route_type=Packet.ROUTE_TYPE_FLOOD)
+    assert router.wants(frame(Packet.PAYLOAD_TYPE_ACK, b"", Packet.ROUTE_TYPE_FLOOD)[0])
+    assert not router.wants(frame(Packet.PAYLOAD_TYPE_ACK, b"")[0])
+    router.route(frame(Packet.PAYLOAD_TYPE_ACK, b"ack1", Packet.ROUTE_TYPE_FLOOD))
+    router.route(frame(Packet.PAYLOAD_TYPE_ACK, b"ack2"))
+    router.unsubscribe(subscription)
+    router.route(frame(Packet.PAYLOAD_TYPE_ACK, b"ack3", Packet.ROUTE_TYPE_FLOOD))
+    assert [bytes(packet.payload) for packet in flood] == [b"ack1"]
+    assert len(router) == 0
+
+
+def test_callback_errors_go_to_on_error():
+    errors = []
+    router = PacketRouter(on_error=errors.append)
+    delivered = []
+
+    def failing(packet):
+        raise RuntimeError("boom")
+
+    router.subscribe(failing)
+    router.subscribe(delivered.append)
+    router.route(frame(Packet.PAYLOAD_TYPE_ACK, b"ack!"))
+    assert [str(e) for e in errors] == ["boom"]
+    assert len(delivered) == 1
+
+    router = PacketRouter()
+    router.subscribe(failing)
+    with pytest.raises(RuntimeError):
+        router.route(frame(Packet.PAYLOAD_TYPE_ACK, b"ack!"))
+
+
+def test_dest_needs_a_payload_type_that_carries_one():
+    with pytest.raises(ValueError):
+        PacketRouter().subscribe(print, payload_type=Packet.PAYLOAD_TYPE_ADVERT, dest=0x42)
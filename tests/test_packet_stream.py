@@ -0,0 +1,93 @@
+import asyncio
+
+import pytest
+
+from meshcore.listener.memory_transport import MemoryTransport
+from meshcore.listener.node_listener import NodeListener
+from meshcore.packet import Packet
+from meshcore.packet_stream import PacketStream
+
+
+def frame(payload_type: int, payload: bytes) -> bytes:
+    return bytes(((payload_type << Packet.PH_TYPE_SHIFT) | Packet.ROUTE_TYPE_FLOOD, 0)) + payload
+
+
+def txt(i: int) -> bytes:
+    return frame(Packet.PAYLOAD_TYPE_TXT_MSG, b"m%d" % i)
+
+
+def read(stream: PacketStream, count: int) -> list[bytes]:
+    async def main():
+        return [bytes((await stream.__anext__()).payload) for _ in range(count)]
+
+    return asyncio.run(main())
+
+
+@pytest.mark.parametrize("overflow, kept, received", [
+    ("drop_oldest", [b"m1", b"m2"], 3),
+    ("drop_new", [b"m0", b"m1"], 2),
+])
+def test_dropping_overflow_policies(overflow, kept, received):
+    listener = NodeListener(MemoryTransport())
+    stream = listener.packets(maxsize=2, overflow=overflow)
+    for i in range(3):
+        listener.on_packet_received(txt(i))
+    assert (len(stream), stream.dropped, stream.received) == (2, 1, received)
+    assert read(stream, 2) == kept
+
+
+def test_block_policy_holds_the_producer_until_there_is_room():
+    async def main():
+        listener = NodeListener(MemoryTransport())
+        stream = listener.packets(maxsize=2, overflow="block")
+        for i in range(3):
+            # producers that cannot wait still queue
+            listener.on_packet_received(txt(i))
+        room = asyncio.ensure_future(listener.wait_packet_room())
+        await asyncio.sleep(0)
+        blocked = [room.done()]
+        await stream.__anext__()
+        await asyncio.sleep(0)
+        blocked.append(room.done())
+        await stream.__anext__()
+        await asyncio.wait_for(room, 1)
+        return blocked, stream.dropped
+
+    assert asyncio.run(main()) == ([False, False], 0)
+
+
+def test_payload_type_filter_rejects_on_the_header():
+    listener = NodeListener(MemoryTransport())
+    adverts = listener.packets(payload_type=Packet.PAYLOAD_TYPE_ADVERT)
+    acks_and_txt = listener.packets(payload_type=(Packet.PAYLOAD_TYPE_ACK, Packet.PAYLOAD_TYPE_TXT_MSG))
+    listener.on_packet_received(txt(0))
+    listener.on_packet_received(frame(Packet.PAYLOAD_TYPE_ACK, b"ack!"))
+    assert len(adverts) == 0
+    assert read(acks_and_txt, 2) == [b"m0", b"ack!"]
+    assert not adverts.accepts(txt(0)[0])
+
+
+def test_undecodable_frames_are_skipped():
+    async def main():
+        stream = PacketStream()
+        stream.push(b"\x09\x05\xaa")
+        stream.push(txt(1))
+        stream.close()
+        packets = [bytes(packet.payload) async for packet in stream]
+        return packets, stream.errors
+
+    assert asyncio.run(main()) == ([b"m1"], 1)
+
+
+def test_close_unsubscribes():
+    listener = NodeListener(MemoryTransport())
+    stream = listener.packets()
+    stream.close()
+    listener.on_packet_received(txt(0))
+    assert len(stream) == 0
+    assert listener._packet_streams == ()
+
+
+def test_unknown_overflow_policy():
+    with pytest.raises(ValueError):
+        PacketStream(overflow="drop_all")
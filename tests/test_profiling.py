@@ -0,0 +1,85 @@
+import asyncio
+
+from meshcore.constants import Constants
+from meshcore.listener.memory_transport import MemoryTransport
+from meshcore.listener.node_listener import NodeListener
+from meshcore.packet import Packet
+from meshcore.profiling import Profiler
+
+FRAME = bytes(((Packet.PAYLOAD_TYPE_TXT_MSG << Packet.PH_TYPE_SHIFT) | Packet.ROUTE_TYPE_FLOOD, 0)) + b"hi"
+
+
+def test_install_is_shared_and_reference_counted():
+    original = Packet.__dict__["from_bytes"]
+    first_calls, second_calls = [], []
+    first = Profiler([lambda *call: first_calls.append(call[0])])
+    second = Profiler([lambda *call: second_calls.append(call[0])])
+    first.install()
+    second.install()
+    first.install()
+    try:
+        Packet.from_bytes(FRAME)
+        first.uninstall()
+        assert Packet.__dict__["from_bytes"] is not original
+        Packet.from_bytes(FRAME)
+    finally:
+        first.uninstall()
+        second.uninstall()
+    assert Packet.__dict__["from_bytes"] is original
+    Packet.from_bytes(FRAME)
+    assert first_calls == ["decode"]
+    assert second_calls == ["decode", "decode"]
+
+
+def run_command(listener, client, cmd):
+    async def main():
+        await listener.start()
+        await client.send(bytes((cmd,)))
+        response = await asyncio.wait_for(client.receive(), 1)
+        await listener.stop()
+        return response
+
+    return asyncio.run(main())
+
+
+def test_slow_frames_are_emitted_with_their_phases():
+    node_side, client = MemoryTransport.pair()
+    listener = NodeListener(node_side)
+    listener.enable_profiling(slow_frame_ms=0)
+    slow = []
+    listener.on("slow_frame", slow.append, sync=True)
+    run_command(listener, client, Constants.CommandCodes.GetDeviceTime)
+
+    assert len(slow) == 1
+    assert slow[0]["frame"] == bytes((Constants.CommandCodes.GetDeviceTime,))
+    assert [(phase, name) for phase, name, _ in slow[0]["phases"]] == [
+        ("send", "CurrTime"),
+        ("handler", "handle_get_device_time"),
+    ]
+
+
+def test_enabling_twice_times_each_call_once():
+    node_side, client = MemoryTransport.pair()
+    listener = NodeListener(node_side)
+    calls = []
+    profiler = listener.enable_profiling(Profiler([lambda *call: calls.append(call[:2])]))
+    assert listener.enable_profiling() is profiler
+    run_command(listener, client, Constants.CommandCodes.GetDeviceTime)
+    assert calls == [("send", "CurrTime"), ("handler", "handle_get_device_time"), ("frame", "GetDeviceTime")]
+
+
+def test_send_is_named_before_the_writer_is_reused():
+    class ReusingTransport(MemoryTransport):
+        async def send(self, data):
+            await super().send(data)
+            # another handler builds its response while this send is pending
+            self.listener._response_writer().write_uint8(Constants.ResponseCodes.Err)
+
+    node_side, client = ReusingTransport(), MemoryTransport()
+    node_side.peer, client.peer = client, node_side
+    listener = NodeListener(node_side)
+    node_side.listener = listener
+    calls = []
+    listener.enable_profiling(Profiler([lambda *call: calls.append(call[:2])]))
+    run_command(listener, client, Constants.CommandCodes.GetDeviceTime)
+    assert ("send", "CurrTime") in calls
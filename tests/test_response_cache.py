@@ -0,0 +1,60 @@
+import asyncio
+import struct
+
+from meshcore.constants import Constants
+from meshcore.listener.memory_transport import MemoryTransport
+from meshcore.listener.node_listener import NodeListener
+from meshcore.response_cache import ResponseCache
+
+APP_START = bytes((Constants.CommandCodes.AppStart, 1)) + bytes(6) + b"test"
+# offset of radio_freq in SelfInfo: code, type, tx power, max tx power,
+# public key, lat, lon, reserved, manual add contacts
+RADIO_FREQ = 1 + 3 + 32 + 8 + 3 + 1
+
+
+def test_self_info_is_cached_until_the_config_changes():
+    async def main():
+        node_side, client = MemoryTransport.pair()
+        listener = NodeListener(node_side)
+        cache = listener.responses
+        await listener.start()
+
+        async def request(frame: bytes) -> bytes:
+            await client.send(frame)
+            return await asyncio.wait_for(client.receive(), 1)
+
+        first = await request(APP_START)
+        second = await request(APP_START)
+        counts = [(cache.hits, cache.misses)]
+
+        ok = await request(bytes((Constants.CommandCodes.SetAdvertName,)) + b"Renamed")
+        renamed = await request(APP_START)
+        counts.append((cache.hits, cache.misses))
+
+        await request(bytes((Constants.CommandCodes.SetRadioParams,)) + struct.pack("<IIBB", 868_000_000, 250_000, 9, 2))
+        retuned = await request(APP_START)
+        again = await request(APP_START)
+        counts.append((cache.hits, cache.misses))
+        await listener.stop()
+        return first, second, ok, renamed, retuned, again, counts
+
+    first, second, ok, renamed, retuned, again, counts = asyncio.run(main())
+    assert first[0] == Constants.ResponseCodes.SelfInfo
+    assert second == first
+    assert ok == bytes((Constants.ResponseCodes.Ok,))
+    assert renamed.endswith(b"Renamed")
+    assert renamed[:RADIO_FREQ] == first[:RADIO_FREQ]
+    assert struct.unpack_from("<IIBB", retuned, RADIO_FREQ) == (868_000_000, 250_000, 9, 2)
+    assert again == retuned
+    assert counts == [(1, 1), (1, 2), (2, 3)]
+
+
+def test_oldest_entry_is_dropped_when_full():
+    cache = ResponseCache(max_entries=2)
+    for key in "abc":
+        cache.put(key, key.encode())
+    assert len(cache) == 2
+    assert cache.get("a") is None
+    assert cache.get("c") == b"c"
+    cache.invalidate()
+    assert len(cache) == 0
@@ -0,0 +1,100 @@
+import asyncio
+import os
+
+import pytest
+
+pytest.importorskip("serial")
+pty = pytest.importorskip("pty")
+import tty  # noqa: E402
+
+from meshcore.frame_parser import FrameParser  # noqa: E402
+from meshcore.packet import Packet  # noqa: E402
+from sx1262 import SerialRadio, SX1262Transport  # noqa: E402
+
+
+def open_radio():
+    """A SerialRadio on a pty; the master fd plays the HAT."""
+    master, slave = pty.openpty()
+    tty.setraw(master)
+    tty.setraw(slave)
+    return master, SerialRadio(os.ttyname(slave))
+
+
+def run(test):
+    async def main():
+        master, radio = open_radio()
+        transport = SX1262Transport(radio=radio, settle_time=0.01, flood_delay_ms=(0, 0))
+        await transport.start()
+        try:
+            return await asyncio.wait_for(test(master, transport), 5)
+        finally:
+            await transport.close()
+            os.close(master)
+
+    return asyncio.run(main())
+
+
+async def read_frames(master: int, count: int) -> list[bytes]:
+    parser = FrameParser(marker=ord(">"))
+    frames = []
+    loop = asyncio.get_running_loop()
+    while len(frames) < count:
+        data = await loop.run_in_executor(None, os.read, master, 4096)
+        frames.extend(bytes(frame) for frame in parser.feed(data))
+    return frames
+
+
+def test_frame_split_across_reads():
+    async def test(master, transport):
+        frame = FrameParser.encode(b"\x09\x00split frame")
+        os.write(master, frame[:4])
+        await asyncio.sleep(0.05)
+        assert transport._queue.empty()
+        os.write(master, frame[4:])
+        return await transport.receive()
+
+    assert run(test) == b"\x09\x00split frame"
+
+
+def test_frames_merged_in_one_read():
+    async def test(master, transport):
+        os.write(master, FrameParser.encode(b"first") + FrameParser.encode(b"second") + b">\x05")
+        return [await transport.receive(), await transport.receive(), transport._queue.qsize()]
+
+    assert run(test) == [b"first", b"second", 0]
+
+
+def test_send_is_scheduled_by_priority():
+    flood = bytes(((Packet.PAYLOAD_TYPE_TXT_MSG << Packet.PH_TYPE_SHIFT) | Packet.ROUTE_TYPE_FLOOD, 0)) + b"txt"
+    ack = bytes(((Packet.PAYLOAD_TYPE_ACK << Packet.PH_TYPE_SHIFT) | Packet.ROUTE_TYPE_DIRECT, 0)) + b"ack!"
+
+    async def test(master, transport):
+        # both are queued before the scheduler runs; the ACK goes first
+        await transport.send(flood)
+        await transport.send(ack)
+        frames = await read_frames(master, 2)
+        return frames, transport.scheduler.sent
+
+    frames, sent = run(test)
+    assert frames == [ack, flood]
+    assert sent == 2
+
+
+def test_closed_port_reports_one_error():
+    async def main():
+        master, radio = open_radio()
+        transport = SX1262Transport(radio=radio)
+        errors = []
+        transport.on("error", errors.append, sync=True)
+        await transport.start()
+        try:
+            # the slave end now fails every read with EIO
+            os.close(master)
+            await asyncio.sleep(0.2)
+        finally:
+            await transport.close()
+        return errors
+
+    errors = asyncio.run(main())
+    assert len(errors) == 1
+    assert isinstance(errors[0]["error"], OSError)
@@ -0,0 +1,117 @@
+import asyncio
+
+from meshcore.constants import Constants
+from meshcore.frame_parser import FrameParser
+from meshcore.listener.tcp_listener import TCPNodeListener
+
+
+class StalledTransport:
+    def __init__(self):
+        self.buffered = 0
+
+    def get_write_buffer_size(self):
+        return self.buffered
+
+
+class StalledWriter:
+    """StreamWriter of a client that never reads: drain() never returns once data is written."""
+
+    def __init__(self, reader: asyncio.StreamReader):
+        self.reader = reader
+        self.transport = StalledTransport()
+        self.closed = False
+
+    def get_extra_info(self, name):
+        return ("127.0.0.1", 1)
+
+    def write(self, data):
+        self.transport.buffered += len(data)
+
+    async def drain(self):
+        if self.transport.buffered:
+            await asyncio.Future()
+
+    def close(self):
+        self.closed = True
+        self.reader.feed_eof()
+
+    async def wait_closed(self):
+        pass
+
+
+def request(code: int) -> bytes:
+    return FrameParser.encode(bytes((code,)), Constants.SerialFrameTypes.Outgoing)
+
+
+def test_stalled_client_is_dropped_and_frees_dispatch():
+    async def main():
+        listener = TCPNodeListener(max_queue=2, send_timeout=0.05)
+        reader = asyncio.StreamReader()
+        writer = StalledWriter(reader)
+        handler = asyncio.create_task(listener._handle_client(reader, writer))
+        reader.feed_data(request(Constants.CommandCodes.GetDeviceTime) * 20)
+        await asyncio.wait_for(handler, 2)
+        return listener, writer
+
+    listener, writer = asyncio.run(main())
+    assert writer.closed
+    assert listener.clients == []
+    assert listener._dispatch_workers == {}
+    assert listener._dispatch_slots._value == 16
+
+
+def test_write_loop_failure_removes_client():
+    class ResetWriter(StalledWriter):
+        async def drain(self):
+            raise ConnectionResetError
+
+    async def main():
+        listener = TCPNodeListener()
+        reader = asyncio.StreamReader()
+        writer = ResetWriter(reader)
+        handler = asyncio.create_task(listener._handle_client(reader, writer))
+        reader.feed_data(request(Constants.CommandCodes.GetDeviceTime))
+        await asyncio.wait_for(handler, 2)
+        return listener, writer
+
+    listener, writer = asyncio.run(main())
+    assert writer.closed
+    assert listener.clients == []
+
+
+def test_stop_runs_listener_teardown():
+    async def main():
+        listener = TCPNodeListener(host="127.0.0.1", port=0)
+        listener.enable_metrics(snapshot_interval=60)
+        profiler = listener.enable_profiling()
+        await listener.start()
+        port = listener.server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(request(Constants.CommandCodes.GetDeviceTime))
+        await reader.readexactly(3 + 5)
+        await listener.stop()
+        writer.close()
+        return listener, profiler
+
+    listener, profiler = asyncio.run(main())
+    assert listener._dispatch_workers == {}
+    assert listener._metrics_task.done()
+    assert profiler not in type(profiler)._installed
+    assert listener.clients == []
+
+
+def test_cancelled_handler_cleans_up_and_stays_cancelled():
+    async def main():
+        listener = TCPNodeListener()
+        reader = asyncio.StreamReader()
+        writer = StalledWriter(reader)
+        handler = asyncio.create_task(listener._handle_client(reader, writer))
+        await asyncio.sleep(0)
+        handler.cancel()
+        await asyncio.gather(handler, return_exceptions=True)
+        return listener, handler, writer
+
+    listener, handler, writer = asyncio.run(main())
+    assert handler.cancelled()
+    assert writer.closed
+    assert listener.clients == []
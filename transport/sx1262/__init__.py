@@ -1,4 +1,4 @@
-from .sx1262 import SX1262
+from .sx1262 import SX1262, SerialRadio
 from .sx1262_transport import SX1262Transport
 
-__all__ = ["SX1262", "SX1262Transport"]
+__all__ = ["SX1262", "SerialRadio", "SX1262Transport"]
@@ -1,9 +1,68 @@
 # sx1262.py
-import RPi.GPIO as GPIO
-import serial
 import time
 
-class SX1262:
+import serial
+
+try:
+    import RPi.GPIO as GPIO
+    HAS_GPIO = True
+except ImportError:
+    HAS_GPIO = False
+
+
+class SerialRadio:
+    """
+    UART side of a LoRa HAT: the serial port only, no control pins.
+    On its own it drives anything that looks like a serial port, such as
+    a pty standing in for the HAT in tests.
+    """
+
+    def __init__(self, serial_port="/dev/ttyS0", baudrate=9600):
+        self.serial_port = serial_port
+        self.baudrate = baudrate
+        self.mode = None
+
+        # Setup UART
+        try:
+            self.ser = serial.Serial(self.serial_port, self.baudrate, timeout=1)
+        except serial.SerialException as e:
+            raise RuntimeError(f"Failed to open {self.serial_port}: {e}")
+
+    def fileno(self) -> int:
+        return self.ser.fileno()
+
+    def set_normal_mode(self) -> bool:
+        """
+        Switch to normal (transmit) mode. Returns True if the mode changed,
+        in which case the caller must allow the module to settle.
+        """
+        changed = self.mode != "normal"
+        self.mode = "normal"
+        return changed
+
+    def write(self, data: bytes):
+        self.ser.write(data)
+
+    def read(self) -> bytes:
+        """
+        Read whatever is already buffered, without blocking.
+        """
+        if self.ser.in_waiting > 0:
+            return self.ser.read(self.ser.in_waiting)
+        return b""
+
+    def read_blocking(self) -> bytes:
+        """
+        Wait up to the port timeout for data, then read what is buffered.
+        """
+        return self.ser.read(max(1, self.ser.in_waiting))
+
+    def shutdown(self):
+        if self.ser and self.ser.is_open:
+            self.ser.close()
+
+
+class SX1262(SerialRadio):
     """
     Driver for SX1262 LoRa HAT using UART + GPIO control pins.
     Provides send, read, and shutdown methods for integration
@@ -11,13 +70,14 @@ class SX1262:
     """
 
     def __init__(self, serial_port="/dev/ttyS0", baudrate=9600,
-                 reset_pin=22, busy_pin=27, m0_pin=17, m1_pin=18):
-        self.serial_port = serial_port
-        self.baudrate = baudrate
+                 reset_pin=22, busy_pin=27, m0_pin=17, m1_pin=18, settle_time=0.05):
+        if not HAS_GPIO:
+            raise RuntimeError("SX1262 requires RPi.GPIO")
         self.reset_pin = reset_pin
         self.busy_pin = busy_pin
         self.m0_pin = m0_pin
         self.m1_pin = m1_pin
+        self.settle_time = settle_time
 
         # Setup GPIO
         GPIO.setmode(GPIO.BCM)
@@ -31,35 +91,28 @@ class SX1262:
         time.sleep(0.1)
         GPIO.output(self.reset_pin, GPIO.HIGH)
 
-        # Setup UART
-        try:
-            self.ser = serial.Serial(self.serial_port, self.baudrate, timeout=1)
-        except serial.SerialException as e:
-            raise RuntimeError(f"Failed to open {self.serial_port}: {e}")
+        super().__init__(serial_port, baudrate)
 
-    def send(self, data: bytes):
-        """
-        Send a packet over LoRa.
-        """
-        GPIO.output(self.m0_pin, GPIO.LOW)  # normal mode
+    def set_normal_mode(self) -> bool:
+        if not super().set_normal_mode():
+            return False
+        GPIO.output(self.m0_pin, GPIO.LOW)
         GPIO.output(self.m1_pin, GPIO.LOW)
-        time.sleep(0.05)
-        self.ser.write(data)
+        return True
 
-    def read(self) -> bytes:
+    def send(self, data: bytes):
         """
-        Read a packet if available.
+        Send a packet over LoRa, blocking while the mode pins settle.
         """
-        if self.ser.in_waiting > 0:
-            return self.ser.read(self.ser.in_waiting)
-        return b""
+        if self.set_normal_mode():
+            time.sleep(self.settle_time)
+        self.write(data)
 
     def shutdown(self):
         """
         Clean up GPIO and close serial.
         """
-        if self.ser and self.ser.is_open:
-            self.ser.close()
+        super().shutdown()
         for pin in [self.reset_pin, self.busy_pin, self.m0_pin, self.m1_pin]:
             try:
                 GPIO.cleanup(pin)
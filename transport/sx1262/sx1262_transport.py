@@ -1,39 +1,117 @@
 # src/transport/sx1262_transport.py
 import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from meshcore.constants import Constants
+from meshcore.frame_parser import FrameParser
+from meshcore.listener.node_listener import NodeTransport
+from meshcore.tx_scheduler import TxScheduler
 from sx1262.sx1262 import SX1262
 
-class SX1262Transport:
+# both ends of the radio link frame packets with the same marker
+_RADIO_MARKER = Constants.SerialFrameTypes.Incoming
+
+
+class SX1262Transport(NodeTransport):
     """
     Async transport adapter for SX1262 LoRa HAT.
     Wraps the low-level driver and exposes send/receive for NodeListener.
+
+    Received bytes are read when the serial fd becomes readable
+    (loop.add_reader), or by a reader thread on loops without fd support.
+    Writes and mode-switch settling never block the event loop: writes run
+    on a single-thread executor and settle_time is awaited with
+    asyncio.sleep. Pass radio to use any SerialRadio-like object instead of
+    the GPIO-backed SX1262, e.g. one opened on a pty.
+
+    send() only queues the packet on self.scheduler, a TxScheduler that
+    transmits by priority within the duty_cycle airtime budget.
     """
 
-    def __init__(self, serial_port="/dev/ttyS0", baudrate=9600):
-        self.radio = SX1262(serial_port=serial_port, baudrate=baudrate)
+    carries_packets = True
+
+    def __init__(self, serial_port="/dev/ttyS0", baudrate=9600, settle_time=0.05, radio=None,
+                 duty_cycle=1.0, flood_delay_ms=(0, 500)):
+        super().__init__()
+        self.radio = radio if radio is not None else SX1262(serial_port=serial_port, baudrate=baudrate)
+        self.settle_time = settle_time
+        self.parser = FrameParser(marker=_RADIO_MARKER)
         self._queue = asyncio.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sx1262-write")
+        self._send_lock = asyncio.Lock()
+        self.scheduler = TxScheduler(self._transmit, duty_cycle=duty_cycle, flood_delay_ms=flood_delay_ms)
+        self.scheduler.on("error", lambda info: self.emit("error", info))
+        self._loop = None
+        self._fd = None
+        self._thread = None
         self._running = False
-        self._task = None
 
     async def start(self):
+        self._loop = asyncio.get_running_loop()
         self._running = True
-        self._task = asyncio.create_task(self._poll_radio())
+        self.scheduler.start()
+        try:
+            fd = self.radio.fileno()
+            self._loop.add_reader(fd, self._on_readable)
+            self._fd = fd
+        except (AttributeError, NotImplementedError, OSError):
+            self._thread = threading.Thread(target=self._read_thread, name="sx1262-read", daemon=True)
+            self._thread.start()
 
-    async def stop(self):
+    async def close(self):
         self._running = False
-        if self._task:
-            self._task.cancel()
-            await asyncio.gather(self._task, return_exceptions=True)
+        await self.scheduler.close()
+        if self._fd is not None:
+            self._loop.remove_reader(self._fd)
+            self._fd = None
+        if self._thread is not None:
+            # wakes within the serial read timeout
+            await asyncio.to_thread(self._thread.join)
+            self._thread = None
+        self._executor.shutdown(wait=True)
         self.radio.shutdown()
 
+    async def stop(self):
+        await self.close()
+
     async def send(self, packet: bytes):
-        self.radio.send(packet)
+        self.scheduler.submit(packet)
+
+    async def _transmit(self, packet: bytes):
+        frame = FrameParser.encode(packet, _RADIO_MARKER)
+        async with self._send_lock:
+            if self.radio.set_normal_mode():
+                await asyncio.sleep(self.settle_time)
+            await asyncio.get_running_loop().run_in_executor(self._executor, self.radio.write, frame)
 
     async def receive(self) -> bytes:
         return await self._queue.get()
 
-    async def _poll_radio(self):
-        while self._running:
+    def _on_readable(self):
+        try:
             data = self.radio.read()
+        except Exception as e:
+            # a failed port (unplugged, pty closed) stays readable; stop
+            # watching it so the loop does not spin, as _read_thread stops
+            self._loop.remove_reader(self._fd)
+            self._fd = None
+            self.emit("error", {"error": e})
+            return
+        self._on_data(data)
+
+    def _read_thread(self):
+        while self._running:
+            try:
+                data = self.radio.read_blocking()
+            except Exception as e:
+                if self._running:
+                    self._loop.call_soon_threadsafe(self.emit, "error", {"error": e})
+                return
             if data:
-                await self._queue.put(data)
-            await asyncio.sleep(0.1)
+                self._loop.call_soon_threadsafe(self._on_data, data)
+
+    def _on_data(self, data: bytes):
+        # UART reads can split or merge packets; queue whole frames only
+        for frame in self.parser.feed(data):
+            self._queue.put_nowait(bytes(frame))